@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Measures the gateway bandwidth with and without zlib-stream compression, and the time spent inflating it.
+
+The session is compressed like the gateway does it: one zlib stream for the connection, flushed with Z_SYNC_FLUSH
+after every payload, and split in websocket frames of at most 4096 bytes.
+
+No recorded gateway traffic ships with the repo, it would hold real user data. By default the stream is generated by
+:func:`payloads.session`, whose repeated shapes compress better than real traffic. To measure a recorded stream, give
+a file with one gateway payload per line, as json.
+
+Usage: python benchmarks/bench_compression.py [recorded_payloads.jsonl]
+"""
+
+import json
+import os
+import sys
+import time
+import zlib
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import DiscordWebsocket  # noqa: E402
+from discordaio.codec import default_codec  # noqa: E402
+from payloads import session  # noqa: E402
+
+
+class HTTP:
+    codec = default_codec
+
+
+def record(payloads, frame_size=4096):
+    compressor = zlib.compressobj()
+    frames = []
+    for payload in payloads:
+        data = compressor.compress(json.dumps(payload).encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        for start in range(0, len(data), frame_size):
+            frames.append(aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, data[start:start + frame_size], None))
+    return frames
+
+
+def load(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    payloads = load(sys.argv[1]) if len(sys.argv) > 1 else session()
+    texts = [aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, json.dumps(payload), None) for payload in payloads]
+    frames = record(payloads)
+    raw = sum(len(msg.data) for msg in texts)
+    compressed = sum(len(msg.data) for msg in frames)
+    print(f'{len(payloads)} payloads ({sys.argv[1] if len(sys.argv) > 1 else "generated"})')
+    print(f'  json          {raw / 1024:8.0f} KiB')
+    print(f'  zlib-stream   {compressed / 1024:8.0f} KiB ({raw / compressed:.1f}x smaller)')
+
+    for name, messages, compress in (('json', texts, False), ('zlib-stream', frames, True)):
+        ws = DiscordWebsocket(HTTP(), compress=compress)
+        ws._inflator = zlib.decompressobj()
+        start = time.perf_counter()
+        decoded = [dct for dct in map(ws.decode_message, messages) if dct is not None]
+        elapsed = time.perf_counter() - start
+        assert len(decoded) == len(payloads)
+        print(f'  decode {name:12} {elapsed * 1000:6.1f} ms ({default_codec.name})')
+
+
+if __name__ == '__main__':
+    main()
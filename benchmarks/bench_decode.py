@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Compares the generated model decoders with the generic async loop they replaced, and the lazy decoders used by a
+handler that only reads a couple of fields.
+
+Usage: python benchmarks/bench_decode.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import ChannelMessage, Guild  # noqa: E402
+from discordaio.base import _is_model, _resolve  # noqa: E402
+from payloads import guild_create, message_create  # noqa: E402
+
+
+async def legacy_from_api_res(cls, data, bot=None):
+    """The decoding done before 0.4.0: cls(), then hasattr and an awaited _from_api_ext per key."""
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return [await legacy_from_api_res(cls, item, bot) for item in data]
+
+    field_types = {}
+    for klass in reversed(cls.__mro__):
+        field_types.update(klass.__dict__.get('_fields', {}))
+    # The ids were kept as strings
+    field_types = {name: field_type for name, field_type in field_types.items() if _is_model(field_type)}
+
+    result = cls()
+    result.bot = bot
+    for key, value in data.items():
+        if hasattr(result, key):
+            await legacy_from_api_ext(result, field_types.get(key), key, value)
+    return result
+
+
+async def legacy_from_api_ext(obj, field_type, key, value):
+    if isinstance(field_type, list):
+        value = [await legacy_from_api_res(_resolve(field_type[0]), x, obj.bot) for x in value]
+    elif field_type is not None:
+        value = await legacy_from_api_res(_resolve(field_type), value, obj.bot)
+    setattr(obj, key, value)
+
+
+async def measure(name, cls, payload, number, read):
+    start = time.perf_counter()
+    for _ in range(number):
+        await legacy_from_api_res(cls, payload)
+    legacy = (time.perf_counter() - start) / number
+
+    start = time.perf_counter()
+    for _ in range(number):
+        cls.from_dict(payload)
+    compiled = (time.perf_counter() - start) / number
+
+    start = time.perf_counter()
+    for _ in range(number):
+        read(cls.from_dict(payload, lazy=True))
+    lazy = (time.perf_counter() - start) / number
+
+    print(f'{name:32} legacy {legacy * 1e6:9.1f} us   compiled {compiled * 1e6:9.1f} us '
+          f'({legacy / compiled:4.1f}x)   lazy {lazy * 1e6:9.1f} us ({legacy / lazy:4.1f}x)')
+
+
+async def main():
+    def read_guild(guild):
+        return guild.name, guild.owner_id
+
+    def read_message(message):
+        return message.content, message.author.username
+
+    await measure('GUILD_CREATE (1000 members)', Guild, guild_create(members=1000), 50, read_guild)
+    await measure('GUILD_CREATE (100 members)', Guild, guild_create(members=100), 500, read_guild)
+    await measure('MESSAGE_CREATE', ChannelMessage, message_create(), 20000, read_message)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
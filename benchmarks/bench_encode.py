@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Compares building the outbound payloads with the generated encoders and by hand.
+
+Usage: python benchmarks/bench_encode.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import Channel, ChannelMessage  # noqa: E402
+from discordaio.channel import Overwrite  # noqa: E402
+from discordaio.codec import default_codec  # noqa: E402
+from payloads import channel, message_create  # noqa: E402
+
+CHANNEL_UPDATE = ('position', 'permission_overwrites', 'name', 'topic', 'nsfw', 'bitrate', 'user_limit', 'parent_id')
+
+
+def by_hand(channel):
+    data = dict()
+    if channel.position is not None:
+        data['position'] = channel.position
+    if channel.permission_overwrites is not None:
+        data['permission_overwrites'] = [
+            {'id': str(x.id), 'type': x.type, 'allow': str(x.allow), 'deny': str(x.deny)} for x in channel.permission_overwrites]
+    if channel.name is not None:
+        data['name'] = channel.name
+    if channel.topic is not None:
+        data['topic'] = channel.topic
+    if channel.nsfw is not None:
+        data['nsfw'] = channel.nsfw
+    if channel.bitrate is not None:
+        data['bitrate'] = channel.bitrate
+    if channel.user_limit is not None:
+        data['user_limit'] = channel.user_limit
+    if channel.parent_id is not None:
+        data['parent_id'] = str(channel.parent_id)
+    return data
+
+
+def measure(name, func, count=100000):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = (time.perf_counter() - start) / count
+    print(f'  {name:32} {elapsed * 1e6:7.2f} us')
+
+
+def main():
+    obj = Channel.from_dict(channel('1', 3, []))
+    obj.permission_overwrites = [Overwrite(id=n, type='role', allow=1024, deny=0) for n in range(5)]
+    assert by_hand(obj) == obj.to_dict(include=CHANNEL_UPDATE)
+    print('Channel update, 5 overwrites')
+    measure('if chain', lambda: by_hand(obj))
+    measure('to_dict', lambda: obj.to_dict(include=CHANNEL_UPDATE))
+    measure('if chain + json.dumps', lambda: json.dumps(by_hand(obj)))
+    measure('to_dict + json.dumps', lambda: json.dumps(obj.to_dict(include=CHANNEL_UPDATE)))
+    measure(f'to_json ({default_codec.name})', lambda: obj.to_json(include=CHANNEL_UPDATE))
+
+    message = ChannelMessage.from_dict(message_create())
+    print('Whole MESSAGE_CREATE message')
+    measure('to_dict', message.to_dict, 20000)
+    measure('to_dict, skip_defaults', lambda: message.to_dict(skip_defaults=True), 20000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compares decoding the gateway traffic of a session in json and in the erlang term format.
+
+The etf payloads carry the snowflakes as integers, like discord sends them.
+
+Usage: python benchmarks/bench_etf.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import etf  # noqa: E402
+from discordaio.codec import CODECS  # noqa: E402
+from payloads import session  # noqa: E402
+
+
+def as_etf(value):
+    """The payload as discord sends it with encoding=etf."""
+    if isinstance(value, dict):
+        return {key: as_etf(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [as_etf(item) for item in value]
+    if isinstance(value, str) and len(value) >= 17 and value.isdigit():
+        return int(value)
+    return value
+
+
+def measure(name, loads, messages):
+    size = sum(len(message) for message in messages)
+    start = time.perf_counter()
+    for message in messages:
+        loads(message)
+    elapsed = time.perf_counter() - start
+    print(f'  {name:12} {size / 1024:8.0f} KiB {elapsed * 1000:8.1f} ms {size / elapsed / 2 ** 20:8.1f} MiB/s '
+          f'{len(messages) / elapsed:9.0f} payloads/s')
+
+
+def main():
+    payloads = session()
+    texts = [json.dumps(payload).encode() for payload in payloads]
+    terms = [etf.dumps(as_etf(payload)) for payload in payloads]
+    assert etf.loads(terms[-1]) == as_etf(payloads[-1])
+
+    print(f'{len(payloads)} dispatches')
+    for cls in CODECS.values():
+        try:
+            codec = cls()
+        except ImportError:
+            continue
+        measure(f'json {codec.name}', codec.loads, texts)
+    measure('etf', etf.loads, terms)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Compares the json codecs on gateway payloads.
+
+Usage: python benchmarks/bench_json.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio.codec import CODECS  # noqa: E402
+from payloads import dispatch, guild_create, message_create  # noqa: E402
+
+
+def main():
+    codecs = []
+    for cls in CODECS.values():
+        try:
+            codecs.append(cls())
+        except ImportError:
+            print(f'{cls.name} is not installed, skipping it')
+
+    payloads = [
+        ('GUILD_CREATE (1000 members)', dispatch('GUILD_CREATE', guild_create(members=1000))),
+        ('MESSAGE_CREATE', dispatch('MESSAGE_CREATE', message_create())),
+    ]
+
+    for name, payload in payloads:
+        text = CODECS['json']().dumps(payload)
+        number = max(1, 2000000 // len(text))
+        print(f'\n{name}, {len(text)} bytes, {number} iterations')
+        for codec in codecs:
+            loads = timeit.timeit(lambda: codec.loads(text), number=number) / number
+            dumps = timeit.timeit(lambda: codec.dumps(payload), number=number) / number
+            print(f'  {codec.name:8} loads {loads * 1e6:9.1f} us   dumps {dumps * 1e6:9.1f} us')
+
+
+if __name__ == '__main__':
+    main()
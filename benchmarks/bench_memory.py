@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Measures the memory used by the decoded guild members, with the slotted models, with dict based copies of them
+(what the models were before 0.4.0) and in a MemberStore, and the memory used by cached messages with and without the
+user identity map.
+
+Usage: python benchmarks/bench_memory.py [members]
+"""
+
+import os
+import sys
+import json
+import random
+import tracemalloc
+import weakref
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import ChannelMessage, GuildMember, MemberStore, User  # noqa: E402
+from payloads import guild_create, message_create, user  # noqa: E402
+
+
+def unslotted(cls):
+    """A copy of the model class with a __dict__ per instance."""
+    return type(cls.__name__, (), {'__init__': cls.__init__, 'bot': None})
+
+
+def legacy_decode(member_cls, user_cls, data):
+    member = member_cls()
+    member.bot = None
+    for key, value in data.items():
+        if hasattr(member, key):
+            if key == 'user':
+                user = user_cls()
+                user.bot = None
+                for user_key, user_value in value.items():
+                    if hasattr(user, user_key):
+                        setattr(user, user_key, user_value)
+                value = user
+            setattr(member, key, value)
+    return member
+
+
+class Client:
+    lazy_decoding = False
+
+    def __init__(self):
+        self.users = weakref.WeakValueDictionary()
+
+
+def measure(decode, payloads):
+    """Bytes kept per object, decoding from json like the gateway does so only what the objects keep is counted."""
+    texts = [json.dumps(data) for data in payloads]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [decode(json.loads(text)) for text in texts]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return objects, used / len(payloads)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payloads = guild_create(members=count, channels=0, roles=10)['members']
+
+    member_cls, user_cls = unslotted(GuildMember), unslotted(User)
+    _, legacy = measure(lambda data: legacy_decode(member_cls, user_cls, data), payloads)
+    _, slotted = measure(lambda data: GuildMember.from_dict(data), payloads)
+
+    print(f'{count} members (GuildMember + User)')
+    print(f'  __dict__   {legacy:6.0f} bytes per member')
+    print(f'  __slots__  {slotted:6.0f} bytes per member ({(1 - slotted / legacy) * 100:.0f}% less)')
+
+    text = json.dumps(payloads)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = MemberStore()
+    store.extend(json.loads(text))
+    columnar = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    print(f'  columnar   {columnar:6.0f} bytes per member ({(1 - columnar / legacy) * 100:.0f}% less)')
+
+    # A busy shard: the messages are written by, and mention, a few active users
+    users = [user() for _ in range(1000)]
+    messages = []
+    for _ in range(count // 2):
+        message = message_create()
+        message['author'] = random.choice(users)
+        message['mentions'] = random.sample(users, 2)
+        messages.append(message)
+
+    _, plain = measure(lambda data: ChannelMessage.from_dict(data), messages)
+    client = Client()
+    _, shared = measure(lambda data: ChannelMessage.from_dict(data, client), messages)
+
+    print(f'{len(messages)} messages from {len(users)} users')
+    print(f'  a User per author and mention  {plain:6.0f} bytes per message')
+    print(f'  identity map                   {shared:6.0f} bytes per message ({(1 - shared / plain) * 100:.0f}% less)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Measures computing the channel permissions of the members of a guild, and the cached lookups.
+
+Usage: python benchmarks/bench_permissions.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import Guild, PermissionCache, Permissions, compute_permissions  # noqa: E402
+from payloads import guild_create  # noqa: E402
+
+
+def main():
+    payload = guild_create(members=1000, channels=50, roles=30)
+    # Administrators skip the overwrites, keep the bit off so every lookup walks them
+    for role in payload['roles']:
+        role['permissions'] = str(int(role['permissions']) & ~Permissions.ADMINISTRATOR)
+    payload['owner_id'] = '0'
+    guild = Guild.from_dict(payload)
+    pairs = [(member, channel) for member in guild.members for channel in guild.channels]
+
+    start = time.perf_counter()
+    for member, channel in pairs:
+        compute_permissions(guild, member, channel)
+    elapsed = (time.perf_counter() - start) / len(pairs)
+    print(f'{len(pairs)} member and channel pairs, 30 roles')
+    print(f'  compute_permissions        {elapsed * 1e6:7.2f} us')
+
+    cache = PermissionCache()
+    for member, channel in pairs:
+        cache.get(guild, member, channel)
+    start = time.perf_counter()
+    for member, channel in pairs:
+        Permissions.SEND_MESSAGES in cache.get(guild, member, channel)
+    elapsed = (time.perf_counter() - start) / len(pairs)
+    print(f'  cached check               {elapsed * 1e6:7.2f} us')
+
+
+if __name__ == '__main__':
+    main()
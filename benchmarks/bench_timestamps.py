@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Compares the timestamp parsers on discord timestamps, all different and repeated ones.
+
+Usage: python benchmarks/bench_timestamps.py
+"""
+
+import datetime
+import functools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio.timestamps import TIMESTAMP_CACHE_SIZE, _parse_fixed, parse_timestamp  # noqa: E402
+from payloads import member  # noqa: E402
+
+
+def strptime(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z')
+
+
+def measure(name, parse, values):
+    start = time.perf_counter()
+    for value in values:
+        parse(value)
+    elapsed = (time.perf_counter() - start) / len(values)
+    print(f'  {name:28} {elapsed * 1e9:7.0f} ns')
+
+
+def main():
+    unique = [member([])['joined_at'] for _ in range(100000)]
+    # Members imported together share a few hundred values
+    pool = unique[:300]
+    repeated = [random.choice(pool) for _ in range(100000)]
+
+    for title, values in (('all different', unique), ('300 distinct values', repeated)):
+        print(f'{len(values)} timestamps, {title}')
+        measure('datetime.strptime', strptime, values)
+        measure('datetime.fromisoformat', datetime.datetime.fromisoformat, values)
+        measure('fixed format parser', _parse_fixed.__wrapped__, values)
+        _parse_fixed.cache_clear()
+        measure('fixed format parser, cached', _parse_fixed, values)
+        cached_fromisoformat = functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)(datetime.datetime.fromisoformat)
+        measure('fromisoformat, cached', cached_fromisoformat, values)
+        measure('parse_timestamp', parse_timestamp, values)
+
+
+if __name__ == '__main__':
+    main()
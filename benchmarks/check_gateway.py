@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Runs DiscordWebsocket against a local fake gateway and checks how it recovers from the connection ending.
+
+The fake gateway plays one scenario per connection:
+
+1. READY and a dispatch, then the connection drops: the next connection must RESUME at seq 2.
+2. RESUMED, then a RECONNECT (op 7): the next connection must RESUME again.
+3. INVALID_SESSION (op 9) with d=false: the next connection must IDENTIFY, after waiting 1 to 5 seconds.
+4. IDENTIFY is answered with the close code 4004: start() must raise AuthorizationError.
+
+Usage: python benchmarks/check_gateway.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import AuthorizationError, DiscordWebsocket, PermissionCache, RetryPolicy  # noqa: E402
+from discordaio.codec import default_codec  # noqa: E402
+
+HELLO = {'op': 10, 'd': {'heartbeat_interval': 45000, '_trace': []}, 's': None, 't': None}
+
+
+class Client:
+    lazy_decoding = False
+    columnar_members = False
+
+    def __init__(self):
+        self.users = {}
+        self.permission_cache = PermissionCache()
+        self.events = []
+
+    async def raise_event(self, name, *args):
+        self.events.append(name)
+
+
+class HTTP:
+    codec = default_codec
+    token = 'token'
+
+    def __init__(self, client, session):
+        self.client = client
+        self.gateway_session = session
+
+    def get_client(self):
+        return self.client
+
+
+class FakeGateway:
+    def __init__(self):
+        self.connections = 0
+        # (connection, opcode of the first payload sent by the client, its seq, seconds since the previous connection)
+        self.received = []
+        self._closed_at = None
+
+    async def handle(self, request):
+        self.connections += 1
+        n = self.connections
+        wait = time.monotonic() - self._closed_at if self._closed_at is not None else 0.0
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json(HELLO)
+        first = json.loads((await ws.receive()).data)
+        seq = first['d'].get('seq') if isinstance(first['d'], dict) else None
+        self.received.append((n, first['op'], seq, wait))
+
+        if n == 1:
+            await ws.send_json({'op': 0, 't': 'READY', 's': 1,
+                                'd': {'session_id': 'abc', 'user': {'id': '1'}, 'guilds': []}})
+            await ws.send_json({'op': 0, 't': 'TYPING_START', 's': 2,
+                                'd': {'user_id': '1', 'channel_id': '2', 'timestamp': 1}})
+            await asyncio.sleep(0.05)
+            await ws.close(code=4000)
+        elif n == 2:
+            await ws.send_json({'op': 0, 't': 'RESUMED', 's': 3, 'd': {}})
+            await ws.send_json({'op': 7, 'd': None, 's': None, 't': None})
+            await ws.receive()
+        elif n == 3:
+            await ws.send_json({'op': 9, 'd': False, 's': None, 't': None})
+            await ws.receive()
+        else:
+            await ws.close(code=4004)
+        self._closed_at = time.monotonic()
+        return ws
+
+
+async def run():
+    gateway = FakeGateway()
+    app = web.Application()
+    app.router.add_get('/', gateway.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = Client()
+    error = None
+    async with aiohttp.ClientSession() as session:
+        ws = DiscordWebsocket(HTTP(client, session), reconnect_policy=RetryPolicy(max_retries=3, base_delay=0.05))
+        ws.gateway_url = f'http://127.0.0.1:{port}/'
+        try:
+            await asyncio.wait_for(ws.start(), 30)
+        except AuthorizationError as e:
+            error = e
+    await runner.cleanup()
+    return gateway.received, client.events, error
+
+
+def main():
+    received, events, error = asyncio.run(run())
+    for n, op, seq, wait in received:
+        print(f'connection {n}: first payload op {op}, seq {seq}, opened {wait:.2f} s after the previous one')
+    print('events:', ', '.join(events))
+    print('stopped with:', repr(error))
+
+    ops = [(n, op, seq) for n, op, seq, _ in received]
+    assert ops == [(1, 2, None), (2, 6, 2), (3, 6, 3), (4, 2, None)], ops
+    assert 1 <= received[3][3] <= 5.5, 'INVALID_SESSION must be followed by a 1 to 5 seconds wait'
+    assert 'on_invalid_session' in events and 'on_resumed' in events, events
+    assert isinstance(error, AuthorizationError)
+    print('ok')
+
+
+if __name__ == '__main__':
+    main()
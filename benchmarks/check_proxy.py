@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Runs a RESTProxy in front of a local stand-in for the discord api and checks what reaches the api.
+
+Several workers, each with its own ProxyHTTPHandler, send the same GET at the same time: the proxy must send it
+upstream once and give every worker the response. A DELETE of the resource must then drop the cached response, so
+the next GET reaches the api again.
+
+Usage: python benchmarks/check_proxy.py [workers]
+"""
+
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from discordaio import ProxyHTTPHandler, RESTProxy, ResponseCache  # noqa: E402
+
+
+class StandInAPI:
+    def __init__(self):
+        self.calls = []
+        self.app = web.Application()
+        self.app.router.add_route('*', '/api/v8/{path:.*}', self.handle)
+
+    async def handle(self, request):
+        self.calls.append((request.method, '/' + request.match_info['path'],
+                           request.headers.get('Authorization')))
+        if request.method == 'DELETE':
+            return web.Response(status=204)
+        # Slow enough for the requests of the workers to overlap
+        await asyncio.sleep(0.2)
+        return web.json_response({'id': '100', 'name': 'general', 'type': 0})
+
+
+async def serve(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def run(workers):
+    api = StandInAPI()
+    api_runner, api_port = await serve(api.app)
+    proxy = RESTProxy('token', api_url=f'http://127.0.0.1:{api_port}/api/v8', cache=ResponseCache())
+    # Like proxy.start(), on a free port
+    await proxy.http.create_session()
+    proxy_runner, proxy_port = await serve(proxy.app)
+    proxy_url = f'http://127.0.0.1:{proxy_port}/api/v8'
+
+    handlers = [ProxyHTTPHandler('token', None, proxy_url) for _ in range(workers)]
+    for http in handlers:
+        await http.create_session()
+
+    bodies = await asyncio.gather(*(http.request_url('/channels/100') for http in handlers))
+    concurrent_calls = len(api.calls)
+    await handlers[0].request_url('/channels/100')
+    cached_calls = len(api.calls)
+    await handlers[0].request_url('/channels/100', type='DELETE')
+    await handlers[1 % workers].request_url('/channels/100')
+
+    for http in handlers:
+        await http.close_session()
+    await proxy_runner.cleanup()
+    await proxy.http.close_session()
+    await api_runner.cleanup()
+    return api.calls, bodies, concurrent_calls, cached_calls, proxy.http.coalesced
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    calls, bodies, concurrent_calls, cached_calls, coalesced = asyncio.run(run(workers))
+    print(f'{workers} concurrent GETs -> {concurrent_calls} upstream call(s), {coalesced} coalesced')
+    print(f'repeated GET -> {cached_calls - concurrent_calls} upstream call(s)')
+    print('upstream calls:')
+    for method, path, authorization in calls:
+        print(f'  {method:6} {path}  ({authorization})')
+
+    assert all(body == bodies[0] for body in bodies)
+    assert concurrent_calls == 1, calls
+    assert cached_calls == 1, calls
+    assert [method for method, _, _ in calls] == ['GET', 'DELETE', 'GET'], calls
+    assert all(authorization == 'Bot token' for _, _, authorization in calls)
+    print('ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Gateway payloads shaped like the ones discord sends, used by the benchmarks."""
+
+import itertools
+import random
+
+random.seed(0)
+
+_ids = itertools.count(175928847299117063, 4194305)
+
+
+def snowflake() -> str:
+    return str(next(_ids))
+
+
+def user() -> dict:
+    return {
+        'id': snowflake(),
+        'username': random.choice(['Nelly', 'Ryozuki', 'edg', 'Mason', 'Wumpus']) + str(random.randint(0, 999)),
+        'discriminator': f'{random.randint(1, 9999):04d}',
+        'avatar': '8342729096ea3675442027381ff50dfe',
+        'public_flags': 0,
+    }
+
+
+def member(role_ids: list) -> dict:
+    return {
+        'user': user(),
+        'nick': None if random.random() < 0.7 else 'nickname',
+        'roles': random.sample(role_ids, random.randint(0, min(4, len(role_ids)))),
+        'joined_at': f'2019-0{random.randint(1, 9)}-1{random.randint(0, 9)}T1{random.randint(0, 9)}:'
+                     f'{random.randint(10, 59)}:{random.randint(10, 59)}.{random.randint(100000, 999999)}+00:00',
+        'premium_since': None,
+        'deaf': False,
+        'mute': False,
+    }
+
+
+def role(position: int) -> dict:
+    return {
+        'id': snowflake(),
+        'name': f'role {position}',
+        'color': random.randint(0, 0xffffff),
+        'hoist': random.random() < 0.3,
+        'position': position,
+        'permissions': str(random.getrandbits(40)),
+        'managed': False,
+        'mentionable': True,
+    }
+
+
+def channel(guild_id: str, position: int, role_ids: list) -> dict:
+    return {
+        'id': snowflake(),
+        'type': random.choice([0, 0, 0, 2, 4]),
+        'guild_id': guild_id,
+        'position': position,
+        'permission_overwrites': [
+            {'id': role_id, 'type': 0, 'allow': str(random.getrandbits(20)), 'deny': str(random.getrandbits(20))}
+            for role_id in random.sample(role_ids, min(2, len(role_ids)))
+        ],
+        'name': f'channel-{position}',
+        'topic': 'A channel topic that is a bit long, like most of them are',
+        'nsfw': False,
+        'last_message_id': snowflake(),
+        'rate_limit_per_user': 0,
+        'parent_id': None,
+    }
+
+
+def guild_create(members: int = 250, channels: int = 50, roles: int = 30, emojis: int = 20) -> dict:
+    guild_id = snowflake()
+    role_list = [role(i) for i in range(roles)]
+    role_ids = [r['id'] for r in role_list]
+    member_list = [member(role_ids) for _ in range(members)]
+    return {
+        'id': guild_id,
+        'name': 'Some guild',
+        'icon': '8342729096ea3675442027381ff50dfe',
+        'splash': None,
+        'owner_id': member_list[0]['user']['id'],
+        'region': 'europe',
+        'afk_channel_id': None,
+        'afk_timeout': 300,
+        'verification_level': 1,
+        'default_message_notifications': 1,
+        'explicit_content_filter': 0,
+        'roles': role_list,
+        'emojis': [{'id': snowflake(), 'name': f'emoji{i}', 'roles': [], 'require_colons': True,
+                    'managed': False, 'animated': False, 'available': True} for i in range(emojis)],
+        'features': ['INVITE_SPLASH', 'NEWS'],
+        'mfa_level': 0,
+        'application_id': None,
+        'system_channel_id': None,
+        'joined_at': '2018-02-25T16:21:45.563000+00:00',
+        'large': members >= 250,
+        'unavailable': False,
+        'member_count': members,
+        'voice_states': [],
+        'members': member_list,
+        'channels': [channel(guild_id, i, role_ids) for i in range(channels)],
+        'presences': [{'user': {'id': m['user']['id']}, 'status': 'online', 'activities': [],
+                       'client_status': {'desktop': 'online'}} for m in member_list[:members // 3]],
+    }
+
+
+def message_create(mentions: int = 2, reactions: int = 2) -> dict:
+    return {
+        'id': snowflake(),
+        'channel_id': snowflake(),
+        'guild_id': snowflake(),
+        'author': user(),
+        'member': {'roles': [snowflake()], 'joined_at': '2019-03-14T12:34:56.123456+00:00',
+                   'deaf': False, 'mute': False},
+        'content': 'Hello there! This is a message of a typical length, with a mention <@80351110224678912>',
+        'timestamp': '2020-10-18T15:43:12.654000+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [user() for _ in range(mentions)],
+        'mention_roles': [],
+        'attachments': [{'id': snowflake(), 'filename': 'image.png', 'size': 12345,
+                         'url': 'https://cdn.discordapp.com/attachments/1/2/image.png',
+                         'proxy_url': 'https://media.discordapp.net/attachments/1/2/image.png',
+                         'height': 200, 'width': 300}],
+        'embeds': [],
+        'reactions': [{'count': random.randint(1, 10), 'me': False, 'emoji': {'id': None, 'name': '🔥'}}
+                      for _ in range(reactions)],
+        'pinned': False,
+        'type': 0,
+    }
+
+
+def dispatch(event: str, data: dict, seq: int = 1) -> dict:
+    return {'op': 0, 't': event, 's': seq, 'd': data}
+
+
+def session(guilds: int = 5, messages: int = 500) -> list:
+    """The dispatches of a shard after it connects: the guilds, then the messages sent in them."""
+    events = [('GUILD_CREATE', guild_create()) for _ in range(guilds)]
+    events += [('MESSAGE_CREATE', message_create()) for _ in range(messages)]
+    return [dispatch(event, data, seq) for seq, (event, data) in enumerate(events, 1)]
@@ -9,17 +9,29 @@ from .emoji import Emoji
 from .user import User, UserConnection
 from .guild import Guild, GuildEmbed, GuildMember, Integration, IntegrationAccount
 from .role import Role
-from .http import HTTPHandler
+from .http import HTTPHandler, ConnectorOptions
+from .cache import ResponseCache
+from .codec import JSONCodec, get_codec
+from .retry import RetryPolicy, CircuitBreaker
+from .proxy import RESTProxy, ProxyHTTPHandler
+from .ratelimit import RateLimitBackend, NullRateLimiter, RateLimiter, RateLimitCoordinator, SharedRateLimiter
 from .websocket import DiscordWebsocket
+from .sharding import IdentifyLimiter, ShardManager, shard_for_guild
+from .cluster import ClusterCoordinator, ClusterLauncher, EventBus, SharedIdentifyLimiter, shard_slices
 from .webhook import Webhook
 from .invite import Invite
 from .enums import ChannelTypes, ExplicitContentFilterLevel, MessageActivityTypes, MessageNotificationLevel, \
-    MFALevel, VerificationLevel
-from .exceptions import WebSocketCreationError, AuthorizationError, EventTypeError, UnhandledEndpointStatusError
+    MFALevel, VerificationLevel, RequestPriority
+from .exceptions import WebSocketCreationError, AuthorizationError, EventTypeError, UnhandledEndpointStatusError, \
+    CircuitOpenError, GatewayClosedError
 from .base import DiscordObject
+from .snowflake import Snowflake, to_snowflake
+from .permissions import Permissions, PermissionCache, compute_base_permissions, compute_permissions
+from .members import MemberStore
+from .timestamps import parse_timestamp
 from .voice import VoiceRegion, VoiceState
 from .activity import Activity, ActivityAssets, ActivityParty, ActivityTimestamps
-from .constants import DISCORD_API_URL, DISCORD_CDN
+from .constants import DISCORD_API_URL, DISCORD_CDN, DISCORD_EPOCH
 from .version import __version__
 
 __author__ = 'Edgar <git@edgarluque.com>'
@@ -1,4 +1,5 @@
 from .base import DiscordObject
+from .snowflake import Snowflake
 
 
 class ActivityParty(DiscordObject):
@@ -10,6 +11,7 @@ class ActivityParty(DiscordObject):
         id (:obj:`str`, optional): the id of the party
         size (:obj:`list` of :obj:`int`): array of two integers (current_size, max_size), used to show the party's current and maximum size
     """
+    __slots__ = ('id', 'size')
 
     def __init__(self, id="", size=[]):
         self.id = id
@@ -25,6 +27,7 @@ class ActivityTimestamps(DiscordObject):
         start (:obj:`int`, optional): unix time (in milliseconds) of when the activity started
         end (:obj:`int`, optional): unix time (in milliseconds) of when the activity ends
     """
+    __slots__ = ('start', 'end')
 
     def __init__(self, start=0, end=0):
         self.start = start
@@ -42,6 +45,7 @@ class ActivityAssets(DiscordObject):
         small_image (:obj:`str`, optional): the id for a small asset of the activity, usually a snowflake
         small_text (:obj:`str`, optional): text displayed when hovering over the small image of the activity
     """
+    __slots__ = ('large_image', 'large_text', 'small_image', 'small_text')
 
     def __init__(self, large_image="", large_text="", small_image="", small_text=""):
         self.large_image = large_image
@@ -66,6 +70,13 @@ class Activity(DiscordObject):
         party (:class:`.Party`): object information for the current party of the player
         assets (:class:`.Assets`): object images for the presence and their hover texts
     """
+    __slots__ = ('name', 'type', 'url', 'timestamps', 'application_id', 'details', 'state', 'party', 'assets')
+    _fields = {
+        'application_id': Snowflake,
+        'timestamps': ActivityTimestamps,
+        'party': ActivityParty,
+        'assets': ActivityAssets,
+    }
 
     def __init__(self, name="", type=0, url="", timestamps=None, application_id=0,
                  details="", state="", party=None, assets=None):
@@ -79,16 +90,6 @@ class Activity(DiscordObject):
         self.party = party
         self.assets = assets
 
-    async def _from_api_ext(self, key, value):
-        if key == 'timestamps':
-            setattr(self, key, await ActivityTimestamps.from_api_res(value, self.bot))
-        elif key == 'party':
-            setattr(self, key, await ActivityParty.from_api_res(value, self.bot))
-        elif key == 'assets':
-            setattr(self, key, await ActivityAssets.from_api_res(value, self.bot))
-        else:
-            await super()._from_api_ext(key, value)
-
 
 __all__ = [
     'Activity',
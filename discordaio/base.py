@@ -1,15 +1,47 @@
-import json
 import asyncio
+import datetime
 import aiohttp
 import logging
 import discordaio
+from typing import Iterable
+from .codec import default_codec
+from .timestamps import parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# The generated decoders of every class, see _build_decoder.
+_decoders: dict = {}
+_lazy_decoders: dict = {}
+# The generated encoders by (class, included fields, skip_defaults), see _build_encoder.
+_encoders: dict = {}
+
 
 class DiscordObject:
-    """Base class for discord objects."""
-    bot: 'discordaio.DiscordBot' = None
+    """Base class for discord objects.
+
+    The attributes set by ``__init__`` are the fields read from the api responses, the other keys are ignored.
+    Every subclass lists them in ``__slots__`` so the objects don't carry a ``__dict__``.
+    ``_fields`` maps the fields holding discord objects to their class, a list with the class inside for a list of
+    objects, or the class name when it can't be imported (it's looked up in :mod:`discordaio`). The other callables,
+    like :class:`.Snowflake`, convert the api value.
+    """
+    __slots__ = ('_bot', '__weakref__')
+    _fields: dict = {}
+    # Name of the client attribute holding the objects of the class by id, they are shared and updated in place
+    _identity_map: str = None
+
+    @property
+    def bot(self) -> 'discordaio.DiscordBot':
+        try:
+            return self._bot
+        except AttributeError:
+            return None
+
+    @bot.setter
+    def bot(self, bot: 'discordaio.DiscordBot'):
+        self._bot = bot
 
     @classmethod
     async def from_api_res(cls, coro_or_json_or_str, bot: 'discordaio.DiscordBot' = None):
@@ -19,39 +51,278 @@ class DiscordObject:
             return None
 
         json_obj = coro_or_json_or_str
+        codec = bot.http.codec if bot is not None else default_codec
 
         if isinstance(coro_or_json_or_str, str):
-            json_obj = json.loads(coro_or_json_or_str)
+            json_obj = codec.loads(coro_or_json_or_str)
         elif asyncio.iscoroutine(coro_or_json_or_str):
             json_obj = await coro_or_json_or_str()
         elif isinstance(coro_or_json_or_str, aiohttp.ClientResponse):
-            json_obj = await coro_or_json_or_str.json()
-
-        if isinstance(json_obj, list):
-            lst = []
-            for item in json_obj:
-                result = cls()
-                result.bot = bot
-                for key, value in item.items():
-                    if hasattr(result, key):
-                        await result._from_api_ext(key, value)
-                lst.append(result)
-            return lst
-        elif isinstance(json_obj, dict):
-            result = cls()
-            result.bot = bot
-            for key, value in json_obj.items():
-                if hasattr(result, key):
-                    await result._from_api_ext(key, value)
-            return result
+            json_obj = await coro_or_json_or_str.json(loads=codec.loads)
+
+        return cls.from_dict(json_obj, bot)
+
+    @classmethod
+    def from_dict(cls, data, bot: 'discordaio.DiscordBot' = None, lazy: bool = None):
+        """Builds the object from an already decoded api response, or a list of objects from a list.
+
+        In lazy mode the fields holding discord objects keep the api value, it's decoded the first time the field
+        is read. The lazy objects are instances of a subclass of ``cls`` with the same name.
+
+        .. versionadded:: 0.4.0
+
+        Args:
+            data (:obj:`dict` or :obj:`list`): The decoded json.
+            bot (:class:`.DiscordBot`, optional): The client the objects belong to.
+            lazy (:obj:`bool`, optional): Decode the nested objects on first access, defaults to
+                the ``lazy_decoding`` option of the bot.
+        """
+        if data is None:
+            return None
+
+        if lazy is None:
+            lazy = getattr(bot, 'lazy_decoding', False)
+        if lazy:
+            decoder = _lazy_decoders.get(cls) or _build_decoder(cls, lazy=True)
+        else:
+            decoder = _decoders.get(cls) or _build_decoder(cls)
+        if isinstance(data, dict):
+            return decoder(data, bot)
+        elif isinstance(data, list):
+            return [decoder(item, bot) for item in data]
         else:
             raise ValueError('it must be a dictionary or a list.')
 
-    async def _from_api_ext(self, key, value):
-        """Api response decoding extensions, called automatically by DiscordObject.from_api_res().
-        Used if the class contains a attribute that it's a class and must be initialized with info,
-        also used if the class contains an array of classes as attribute."""
-        setattr(self, key, value)
+    def to_dict(self, include: Iterable[str] = None, skip_defaults: bool = False) -> dict:
+        """Builds the api dict of the object, the reverse of :meth:`from_dict`.
+
+        The fields set to None are left out, the snowflakes are sent as strings, the timestamps in ISO 8601 and
+        the nested objects as dicts, so the result can be given to any json library.
+
+        .. versionadded:: 0.4.0
+
+        Args:
+            include (:obj:`list` of :obj:`str`, optional): Only these fields, in this order. Defaults to all of them.
+            skip_defaults (:obj:`bool`, optional): Leave out the fields equal to their ``__init__`` default too,
+                in the nested objects as well.
+
+        Raises:
+            ValueError: If a field in ``include`` doesn't exist.
+        """
+        if include is not None:
+            include = tuple(include)
+        cls = type(self)
+        encoder = _encoders.get((cls, include, skip_defaults)) or _build_encoder(cls, include, skip_defaults)
+        return encoder(self)
+
+    def to_json(self, include: Iterable[str] = None, skip_defaults: bool = False) -> str:
+        """Like :meth:`to_dict`, encoded with the json codec of the bot.
+
+        .. versionadded:: 0.4.0
+        """
+        http = getattr(self.bot, 'http', None)
+        codec = http.codec if http is not None else default_codec
+        return codec.dumps(self.to_dict(include, skip_defaults))
+
+
+def _resolve(field_type):
+    if isinstance(field_type, str):
+        return getattr(discordaio, field_type)
+    return field_type
+
+
+def _is_model(field_type) -> bool:
+    target = _resolve(field_type[0] if isinstance(field_type, list) else field_type)
+    return isinstance(target, type) and issubclass(target, DiscordObject)
+
+
+class _LazyField:
+    """Wraps the slot of a nested field, decodes the api value kept in it the first time it's read."""
+    __slots__ = ('slot', 'decoder', 'is_list')
+
+    def __init__(self, slot, decoder, is_list: bool):
+        self.slot = slot
+        self.decoder = decoder
+        self.is_list = is_list
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if self.is_list:
+            if value and type(value[0]) is dict:
+                value = [self.decoder(x, obj._bot) for x in value]
+                self.slot.__set__(obj, value)
+        elif type(value) is dict:
+            value = self.decoder(value, obj._bot)
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+
+def _lazy_class(cls, field_types: dict):
+    """Subclass of ``cls`` that decodes the nested fields on first access, the eager objects don't pay for it."""
+    namespace = {'__slots__': (), '__doc__': cls.__doc__, '__module__': cls.__module__,
+                 '__qualname__': cls.__qualname__}
+    for name, field_type in field_types.items():
+        is_list = isinstance(field_type, list)
+        target = _resolve(field_type[0] if is_list else field_type)
+        decoder = _lazy_decoders.get(target) or _build_decoder(target, lazy=True)
+        namespace[name] = _LazyField(getattr(cls, name), decoder, is_list)
+    return type(cls.__name__, (cls,), namespace)
+
+
+def _describe(cls):
+    """The default value of every field of ``cls``, in ``__slots__`` order then the ones set by ``__init__`` for the
+    classes without slots, and the ``_fields`` of the class."""
+    sample = cls()
+    defaults = {}
+    field_types = {}
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            if name not in ('_bot', '__weakref__') and hasattr(sample, name):
+                defaults[name] = getattr(sample, name)
+        field_types.update(klass.__dict__.get('_fields', {}))
+    # A subclass without __slots__ keeps its fields in the instance __dict__
+    for name, value in getattr(sample, '__dict__', {}).items():
+        if name != '_bot':
+            defaults.setdefault(name, value)
+    field_types = {name: field_type for name, field_type in field_types.items() if name in defaults}
+    return defaults, field_types
+
+
+def _build_decoder(cls, lazy: bool = False):
+    """Generates the function that builds a ``cls`` from a dict, without calling ``__init__``.
+
+    The defaults are taken from an instance built with no arguments, the model ``__init__`` methods only store their
+    arguments so it's the same as calling ``cls()`` and setting the fields present in the dict.
+    """
+    decoders = _lazy_decoders if lazy else _decoders
+    # Stands in for the decoder while it's being built, in case a nested class refers back to this one.
+    decoders[cls] = lambda data, bot: decoders[cls](data, bot)
+
+    defaults, field_types = _describe(cls)
+    models = {name: field_type for name, field_type in field_types.items() if _is_model(field_type)}
+
+    new_cls = _lazy_class(cls, models) if lazy and models else cls
+    namespace = {'new': object.__new__, 'cls': new_cls, 'MISSING': _MISSING}
+    build_lines = []
+    update_lines = []
+    for name, default in defaults.items():
+        namespace[f'd_{name}'] = default
+        field_type = field_types.get(name)
+        store = f'self.{name} = {{}}'
+        value = 'value'
+        if lazy and name in models:
+            # Straight into the slot, skipping the _LazyField
+            namespace[f's_{name}'] = getattr(cls, name).__set__
+            store = f's_{name}(self, {{}})'
+        elif field_type is not None:
+            is_list = isinstance(field_type, list)
+            target = _resolve(field_type[0] if is_list else field_type)
+            if name in models:
+                namespace[f'f_{name}'] = _decoders.get(target) or _build_decoder(target)
+                args = ', bot'
+            else:
+                namespace[f'f_{name}'] = target
+                args = ''
+            value = f'[f_{name}(x{args}) for x in value]' if is_list else f'f_{name}(value{args})'
+            value = f'None if value is None else {value}'
+
+        if value == 'value':
+            build_lines.append('    ' + store.format(f'get({name!r}, d_{name})'))
+        else:
+            build_lines.append(f'    value = get({name!r}, MISSING)')
+            build_lines.append('    ' + store.format(f'd_{name} if value is MISSING else {value}'))
+        update_lines.append(f'        value = get({name!r}, MISSING)')
+        update_lines.append('        if value is not MISSING:')
+        update_lines.append('            ' + store.format(value))
+
+    lines = ['def decode(data, bot):',
+             '    get = data.get']
+    identity_map = cls._identity_map
+    if identity_map is not None:
+        # Updates the object already decoded with this id in place, with the keys present in data
+        lines += [f'    identities = getattr(bot, {identity_map!r}, None)',
+                  '    key = get("id")',
+                  '    if identities is not None and key is not None:',
+                  '        key = int(key)',
+                  '        self = identities.get(key)',
+                  '        if self is not None:',
+                  '            if "bot" in data:',
+                  '                self._bot = data["bot"]']
+        lines += ['    ' + line for line in update_lines]
+        lines += ['            return self']
+    # A 'bot' key (User.bot) replaces the client, like it always did
+    lines += ['    self = new(cls)',
+              '    self._bot = get("bot", bot)']
+    lines += build_lines
+    if identity_map is not None:
+        lines += ['    if identities is not None and key is not None:',
+                  '        identities[key] = self']
+    lines.append('    return self')
+
+    exec('\n'.join(lines), namespace)
+    decoder = namespace['decode']
+    decoder.__qualname__ = f'{cls.__qualname__}.decode'
+    decoders[cls] = decoder
+    return decoder
+
+
+def _build_encoder(cls, include: tuple = None, skip_defaults: bool = False):
+    """Generates the function that builds the api dict of a ``cls``, see :meth:`DiscordObject.to_dict`."""
+    defaults, field_types = _describe(cls)
+    if include is not None:
+        unknown = [name for name in include if name not in defaults]
+        if unknown:
+            raise ValueError(f'{cls.__name__} has no field {", ".join(unknown)}')
+        defaults = {name: defaults[name] for name in include}
+
+    key = (cls, include, skip_defaults)
+    # Stands in for the encoder while it's being built, in case a nested class refers back to this one.
+    _encoders[key] = lambda obj: _encoders[key](obj)
+
+    namespace = {'DiscordObject': DiscordObject, 'datetime': datetime.datetime}
+    lines = ['def encode(self):',
+             '    data = {}']
+    for name, default in defaults.items():
+        namespace[f'd_{name}'] = default
+        field_type = field_types.get(name)
+        value = 'value'
+        if field_type is not None:
+            is_list = isinstance(field_type, list)
+            target = _resolve(field_type[0] if is_list else field_type)
+            if _is_model(field_type):
+                # Subclasses go through their own encoder, a dict set by hand is sent as is
+                namespace[f't_{name}'] = target
+                namespace[f'e_{name}'] = _encoders.get((target, None, skip_defaults)) or \
+                    _build_encoder(target, None, skip_defaults)
+                value = (f'e_{name}({{0}}) if type({{0}}) is t_{name} else {{0}}.to_dict(None, {skip_defaults}) '
+                         f'if isinstance({{0}}, DiscordObject) else {{0}}')
+            elif target is parse_timestamp:
+                value = '{0}.isoformat() if isinstance({0}, datetime) else {0}'
+            elif isinstance(target, type) and issubclass(target, int):
+                # Snowflakes are sent as strings, like discord sends them. int() first, str() of an IntFlag is
+                # its name before python 3.11
+                value = 'str(int({0}))'
+            else:
+                value = '{0}'
+            value = f'[{value.format("x")} for x in value]' if is_list else value.format('value')
+        lines.append(f'    value = self.{name}')
+        if skip_defaults and default is not None:
+            lines.append(f'    if value is not None and value != d_{name}:')
+        else:
+            lines.append('    if value is not None:')
+        lines.append(f'        data[{name!r}] = {value}')
+    lines.append('    return data')
+
+    exec('\n'.join(lines), namespace)
+    encoder = namespace['encode']
+    encoder.__qualname__ = f'{cls.__qualname__}.encode'
+    _encoders[key] = encoder
+    return encoder
 
 
 __all__ = [
@@ -0,0 +1,120 @@
+"""Response cache for the read mostly REST endpoints."""
+
+import collections
+import time
+from typing import Any, Optional, Tuple
+
+from .ratelimit import Route
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response is kept in the cache, by route template (see Route.template).
+DEFAULT_TTLS = {
+    '/users/{id}': 300,
+    '/users/@me': 300,
+    '/guilds/{major}': 60,
+    '/guilds/{major}/channels': 60,
+    '/channels/{major}': 60,
+}
+
+
+class ResponseCache:
+    """Size bounded LRU cache of GET responses with a time to live per route.
+
+    Only the routes present in ``ttls`` are cached. A PATCH, PUT, POST or DELETE request sent through the same
+    :class:`.HTTPHandler` invalidates the cached responses of the resource it targets, its sub resources and its
+    parent collection.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `bot = DiscordBot(token, response_cache=ResponseCache(max_size=4096))`
+
+    Attributes:
+        max_size (:obj:`int`): The maximum number of responses kept
+        ttls (:obj:`dict`): The time to live in seconds of every cached route template
+        hits (:obj:`int`): The number of requests answered from the cache
+        misses (:obj:`int`): The number of cacheable requests that had to be sent
+        evictions (:obj:`int`): The number of responses dropped because the cache was full
+        invalidations (:obj:`int`): The number of responses dropped because their resource was modified
+        generation (:obj:`int`): Incremented every time something is invalidated
+    """
+
+    def __init__(self, max_size: int = 1024, ttls: dict = None):
+        self.max_size: int = max_size
+        self.ttls: dict = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        self.generation: int = 0
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of cacheable requests answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_ttl(self, route: Route) -> Optional[float]:
+        """Returns the time to live of the route, None if it isn't cached."""
+        if route.method != 'GET':
+            return None
+        return self.ttls.get(route.template)
+
+    def get(self, key: tuple) -> Optional[Tuple[int, Any]]:
+        """Returns the cached (status, body) of the request or None, counting a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: tuple, ttl: float, response: Tuple[int, Any]):
+        """Caches the (status, body) of a request for ``ttl`` seconds."""
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def affects(path: str, cached_path: str) -> bool:
+        """Whether modifying the resource at ``path`` makes the responses of ``cached_path`` stale: it's the
+        resource itself, one of its sub resources or its parent collection."""
+        path = path.split('?', 1)[0].rstrip('/')
+        cached_path = cached_path.split('?', 1)[0].rstrip('/')
+        return cached_path == path or cached_path == path.rsplit('/', 1)[0] or cached_path.startswith(path + '/')
+
+    def invalidate(self, path: str):
+        """Drops the responses of the resource at ``path``, its sub resources and its parent collection."""
+        path = path.split('?', 1)[0].rstrip('/')
+        self.generation += 1
+
+        stale = [key for key in self._entries if self.affects(path, key[0])]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self.invalidations += len(stale)
+            logger.debug(f'Invalidated {len(stale)} cached responses under {path}')
+
+    def clear(self):
+        """Drops every cached response."""
+        self._entries.clear()
+        self.generation += 1
+
+
+__all__ = [
+    'ResponseCache',
+    'DEFAULT_TTLS',
+]
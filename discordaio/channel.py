@@ -1,11 +1,14 @@
 """Contains all related Channel Discord objects"""
 
 from .base import DiscordObject
+from .snowflake import Snowflake, to_snowflake
+from .timestamps import parse_timestamp
 from .user import User
-from .role import Role
 from .emoji import Emoji
 from .invite import Invite
-from typing import List
+from .enums import RequestPriority
+from typing import List, Union
+from datetime import datetime
 from enum import Enum
 
 
@@ -20,6 +23,12 @@ class Overwrite(DiscordObject):
         allow (:obj:`int`): permission bit set
         deny (:obj:`int`): permission bit set
     """
+    __slots__ = ('id', 'type', 'allow', 'deny')
+    _fields = {
+        'id': Snowflake,
+        'allow': int,
+        'deny': int,
+    }
 
     def __init__(self, id=None, type=None, allow=None, deny=None):
         self.id = id
@@ -60,13 +69,28 @@ class Channel(DiscordObject):
         parent_id: id of the parent category for a channel
         last_pin_timestamp: timestamp when the last pinned message was pinned
     """
+    __slots__ = (
+        'id', 'type', 'guild_id', 'position', 'permission_overwrites', 'name', 'topic', 'nsfw', 'last_message_id',
+        'bitrate', 'user_limit', 'recipients', 'icon', 'owner_id', 'application_id', 'parent_id', 'last_pin_timestamp',
+    )
+    _fields = {
+        'id': Snowflake,
+        'guild_id': Snowflake,
+        'last_message_id': Snowflake,
+        'owner_id': Snowflake,
+        'application_id': Snowflake,
+        'parent_id': Snowflake,
+        'last_pin_timestamp': parse_timestamp,
+        'recipients': [User],
+        'permission_overwrites': [Overwrite],
+    }
 
     def __init__(self, id: int = None, type: int = ChannelTypes.GUILD_TEXT.value,
                  guild_id: int = None, position: int = None, permission_overwrites: List[Overwrite] = [],
                  name: str = None, topic: str = None, nsfw: bool = False, last_message_id: int = None,
                  bitrate: int = None, user_limit: int = None, recipients: List[User] = [], icon: str = None,
                  owner_id: int = None, application_id: int = None, parent_id: int = None,
-                 last_pin_timestamp: int = None):
+                 last_pin_timestamp: datetime = None):
         self.id = id
         self.type = type
         self.guild_id = guild_id
@@ -98,21 +122,24 @@ class Channel(DiscordObject):
                                             data={
                                                 'content': msg,
                                                 'tts': tts
-                                            })
+                                            },
+                                            priority=RequestPriority.INTERACTIVE)
         else:
             for x in range(len(msg) // 2000 + 1):
                 await self.bot.http.request_url(f'/channels/{self.id}/messages', type='POST',
                                                 data={
                                                     'content': msg[x * 2000:x * 2000 + 2000],
                                                     'tts': tts
-                                                })
+                                                },
+                                                priority=RequestPriority.INTERACTIVE)
 
     async def typing(self):
         """Start typing.
 
         .. versionadded:: 0.3.0
         """
-        await self.bot.http.request_url(f'/channels/{self.id}/typing', type='POST')
+        await self.bot.http.request_url(f'/channels/{self.id}/typing', type='POST',
+                                        priority=RequestPriority.INTERACTIVE)
 
     async def delete(self):
         """Deletes the channel.
@@ -120,6 +147,12 @@ class Channel(DiscordObject):
         .. versionadded:: 0.3.0
         """
         await self.bot.http.request_url(f'/channels/{self.id}', type='DELETE')
+        self._invalidate_guild_channels()
+
+    def _invalidate_guild_channels(self):
+        # The guild channel list embeds the channel, the cache only knows the channel path was modified
+        if self.guild_id is not None:
+            self.bot.http.invalidate(f'/guilds/{self.guild_id}/channels')
 
     def mention(self) -> str:
         """Returns formatted channel mention.
@@ -128,11 +161,15 @@ class Channel(DiscordObject):
         """
         return f'<#{self.id}>'
 
-    async def get_messages(self, limit: int = None, around: int = None, before: int = None,
-                           after: int = None) -> List['ChannelMessage']:
+    async def get_messages(self, limit: int = None, around: Union[int, datetime] = None,
+                           before: Union[int, datetime] = None,
+                           after: Union[int, datetime] = None) -> List['ChannelMessage']:
         """Gets channel messages
 
         .. versionadded:: 0.3.0
+
+        .. versionchanged:: 0.4.0
+            around, before and after accept datetimes (naive ones are taken as UTC).
         """
 
         params = dict()
@@ -140,11 +177,11 @@ class Channel(DiscordObject):
         if limit is not None and 100 >= limit >= 1:
             params['limit'] = limit
         if around is not None:
-            params['around'] = around
+            params['around'] = to_snowflake(around)
         elif before is not None:
-            params['before'] = before
+            params['before'] = to_snowflake(before)
         elif after is not None:
-            params['after'] = after
+            params['after'] = to_snowflake(after, high=True)
 
         res = await self.bot.http.request_url(f'/channels/{self.id}/messages', params=params)
         return await ChannelMessage.from_api_res(res, self.bot)
@@ -165,28 +202,13 @@ class Channel(DiscordObject):
         :returns: The updated channel.
         """
 
-        data = dict()
-
         if self.id is None:
             raise AttributeError('The channel must have atleast a id.')
-        if self.position is not None:
-            data['position'] = self.position
-        if self.permission_overwrites is not None:
-            data['permission_overwrites'] = self.permission_overwrites
-        if self.name is not None:
-            data['name'] = self.name
-        if self.topic is not None:
-            data['topic'] = self.topic
-        if self.nsfw is not None:
-            data['nsfw'] = self.nsfw
-        if self.bitrate is not None:
-            data['bitrate'] = self.bitrate
-        if self.user_limit is not None:
-            data['user_limit'] = self.user_limit
-        if self.parent_id is not None:
-            data['parent_id'] = self.parent_id
+        data = self.to_dict(include=('position', 'permission_overwrites', 'name', 'topic', 'nsfw', 'bitrate',
+                                     'user_limit', 'parent_id'))
 
         res = await self.bot.http.request_url(f'/channels/{self.id}', type='PATCH', data=data)
+        self._invalidate_guild_channels()
         return await Channel.from_api_res(res, self.bot)
 
     async def refresh(self) -> 'Channel':
@@ -200,7 +222,7 @@ class Channel(DiscordObject):
 
         :returns: The requested channel.
         """
-        res = await self.bot.http.request_url(f'/channels/{self.id}')
+        res = await self.bot.http.request_url(f'/channels/{self.id}', cache=False)
         return await Channel.from_api_res(res, self.bot)
 
     async def bulk_delete_messages(self, ids: List):
@@ -220,7 +242,8 @@ class Channel(DiscordObject):
         data = {
             "messages": ids
         }
-        await self.bot.http.request_url(f'/channels/{self.id}/messages/bulk-delete', type='POST', data=data)
+        await self.bot.http.request_url(f'/channels/{self.id}/messages/bulk-delete', type='POST', data=data,
+                                        priority=RequestPriority.BULK)
 
     async def get_invites(self) -> List[Invite]:
         """Returns a list of invite objects (with invite metadata) for the channel. Only usable for guild channels.
@@ -252,6 +275,7 @@ class Channel(DiscordObject):
         .. versionadded:: 0.3.0
         """
         await self.bot.http.request_url(f'/channels/{self.id}/permissions/{overwrite_id}', type='DELETE')
+        self._invalidate_guild_channels()
 
     async def get_pinned_messages(self) -> List['ChannelMessage']:
         """Returns all pinned messages in the channel as an array of message objects.
@@ -275,14 +299,6 @@ class Channel(DiscordObject):
         """
         await self.bot.http.request_url(f'/channels/{self.id}/pins/{message_id}', type='DELETE')
 
-    async def _from_api_ext(self, key, value):
-        if key == 'recipients':
-            setattr(self, key, [await User.from_api_res(x, self.bot) for x in value])
-        elif key == 'permission_overwrites':
-            setattr(self, key, [await Overwrite.from_api_res(x, self.bot) for x in value])
-        else:
-            return await super()._from_api_ext(key, value)
-
     def __str__(self):
         return f'{self.name}#{self.id}'
 
@@ -299,6 +315,7 @@ class MessageActivity(DiscordObject):
         type: type of message activity
         party_id: party_id from a Rich Presence event
     """
+    __slots__ = ('type', 'party_id')
 
     def __init__(self, type: int = None, party_id: int = None):
         self.type = type
@@ -317,6 +334,10 @@ class MessageApplication(DiscordObject):
         icon (:obj:`str`): id of the application's icon
         name (:obj:`str`): name of the application
     """
+    __slots__ = ('id', 'cover_image', 'description', 'icon', 'name')
+    _fields = {
+        'id': Snowflake,
+    }
 
     def __init__(self, id=None, cover_image=None, description=None, icon=None, name=None):
         self.id = id
@@ -336,18 +357,16 @@ class Reaction(DiscordObject):
         me: whether the current user reacted using this emoji
         emoji emoji information
     """
+    __slots__ = ('count', 'me', 'emoji')
+    _fields = {
+        'emoji': Emoji,
+    }
 
     def __init__(self, count: int = None, me: bool = False, emoji: Emoji = None):
         self.count = count
         self.me = me
         self.emoji = emoji
 
-    async def _from_api_ext(self, key, value):
-        if key == 'emoji':
-            setattr(self, key, await Emoji.from_api_res(value, self.bot))
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 class EmbedThumbnail(DiscordObject):
     """Represents a embed thumbnail object
@@ -360,6 +379,7 @@ class EmbedThumbnail(DiscordObject):
         height (:obj:`int`): height of thumbnail
         width (:obj:`int`): width of thumbnail
     """
+    __slots__ = ('url', 'proxy_url', 'height', 'width')
 
     def __init__(self, url=None, proxy_url=None, height=None, width=None):
         self.url = url
@@ -378,6 +398,7 @@ class EmbedVideo(DiscordObject):
         height (:obj:`int`): height of video
         width (:obj:`int`): width of video
     """
+    __slots__ = ('url', 'height', 'width')
 
     def __init__(self, url=None, height=None, width=None):
         self.url = url
@@ -396,6 +417,7 @@ class EmbedImage(DiscordObject):
         height (:obj:`int`): height of image
         width (:obj:`int`): width of image
     """
+    __slots__ = ('url', 'proxy_url', 'height', 'width')
 
     def __init__(self, url=None, proxy_url=None, height=None, width=None):
         self.url = url
@@ -413,6 +435,7 @@ class EmbedProvider(DiscordObject):
         name (:obj:`str`): name of provider
         url (:obj:`str`): url of provider
     """
+    __slots__ = ('name', 'url')
 
     def __init__(self, name=None, url=None):
         self.name = name
@@ -430,6 +453,7 @@ class EmbedAuthor(DiscordObject):
         icon_url (:obj:`str`): url of author icon (only supports http(s) and attachments)
         proxy_icon_url (:obj:`str`): a proxied url of author icon
     """
+    __slots__ = ('name', 'url', 'icon_url', 'proxy_icon_url')
 
     def __init__(self, name=None, url=None, icon_url=None, proxy_icon_url=None):
         self.name = name
@@ -448,6 +472,7 @@ class EmbedFooter(DiscordObject):
         icon_url (:obj:`str`): url of footer icon (only supports http(s) and attachments)
         proxy_icon_url (:obj:`str`): a proxied url of footer icon
     """
+    __slots__ = ('text', 'icon_url', 'proxy_icon_url')
 
     def __init__(self, text=None, icon_url=None, proxy_icon_url=None):
         self.text = text
@@ -465,6 +490,7 @@ class EmbedField(DiscordObject):
         value (:obj:`str`): value of the field
         inline (:obj:`bool`): whether or not this field should display inline
     """
+    __slots__ = ('name', 'value', 'inline')
 
     def __init__(self, name=None, value=None, inline=False):
         self.name = name
@@ -482,7 +508,7 @@ class Embed(DiscordObject):
         type (:obj:`str`): type of embed (always "rich" for webhook embeds)
         description (:obj:`str`): description of embed
         url (:obj:`str`): url of embed
-        timestamp (:obj:`int`): timestamp of embed content
+        timestamp (:obj:`datetime.datetime`): timestamp of embed content
         color (:obj:`int`): color code of the embed
         footer (:class:`.EmbedFooter`): footer information
         image (:class:`.EmbedImage`): image information
@@ -492,6 +518,20 @@ class Embed(DiscordObject):
         author (:class:`.EmbedAuthor`): author information
         fields (:obj:`list` of :class:`.EmbedField`): fields information
     """
+    __slots__ = (
+        'title', 'type', 'description', 'url', 'timestamp', 'color', 'footer', 'image', 'thumbnail', 'video',
+        'provider', 'author', 'fields',
+    )
+    _fields = {
+        'timestamp': parse_timestamp,
+        'footer': EmbedFooter,
+        'image': EmbedImage,
+        'thumbnail': EmbedThumbnail,
+        'video': EmbedVideo,
+        'provider': EmbedProvider,
+        'author': EmbedAuthor,
+        'fields': [EmbedField],
+    }
 
     def __init__(self, title=None, type=None, description=None, url=None, timestamp=None,
                  color=None, footer=EmbedFooter(), image=EmbedImage(), thumbnail=EmbedThumbnail(),
@@ -510,24 +550,6 @@ class Embed(DiscordObject):
         self.author = author
         self.fields = fields
 
-    async def _from_api_ext(self, key, value):
-        if key == 'footer':
-            setattr(self, key, await EmbedFooter.from_api_res(value, self.bot))
-        elif key == 'image':
-            setattr(self, key, await EmbedImage.from_api_res(value, self.bot))
-        elif key == 'thumbnail':
-            setattr(self, key, await EmbedThumbnail.from_api_res(value, self.bot))
-        elif key == 'video':
-            setattr(self, key, await EmbedVideo.from_api_res(value, self.bot))
-        elif key == 'provider':
-            setattr(self, key, await EmbedProvider.from_api_res(value, self.bot))
-        elif key == 'author':
-            setattr(self, key, await EmbedAuthor.from_api_res(value, self.bot))
-        elif key == 'fields':
-            setattr(self, key, [await EmbedField.from_api_res(x, self.bot) for x in value])
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 class Attachment(DiscordObject):
     """Represents a attachment
@@ -543,6 +565,10 @@ class Attachment(DiscordObject):
         height (:obj:`int`): height of file (if image)
         width (:obj:`int`): width of file (if image)
     """
+    __slots__ = ('id', 'filename', 'size', 'url', 'proxy_url', 'height', 'width')
+    _fields = {
+        'id': Snowflake,
+    }
 
     def __init__(self, id=None, filename=None, size=None, url=None, proxy_url=None,
                  height=None, width=None):
@@ -588,10 +614,29 @@ class ChannelMessage(DiscordObject):
         activity: activity object sent with Rich Presence-related chat embeds
         application: application object sent with Rich Presence-related chat embeds
     """
-
-    def __init__(self, id=None, channel_id=None, author: User = None, content: str = None, timestamp: int = None,
-                 edited_timestamp: int = None, tts: bool = False, mention_everyone: bool = False,
-                 mentions: List[User] = [], mention_roles: List[Role] = [], attachments: List[Attachment] = [],
+    __slots__ = (
+        'id', 'channel_id', 'author', 'content', 'timestamp', 'edited_timestamp', 'tts', 'mention_everyone', 'mentions',
+        'mention_roles', 'attachments', 'embeds', 'reactions', 'nonce', 'pinned', 'webhook_id', 'type', 'activity',
+        'application',
+    )
+    _fields = {
+        'id': Snowflake,
+        'channel_id': Snowflake,
+        'webhook_id': Snowflake,
+        'mention_roles': [Snowflake],
+        'timestamp': parse_timestamp,
+        'edited_timestamp': parse_timestamp,
+        'author': User,
+        'mentions': [User],
+        'attachments': [Attachment],
+        'reactions': [Reaction],
+        'activity': MessageActivity,
+        'application': MessageApplication,
+    }
+
+    def __init__(self, id=None, channel_id=None, author: User = None, content: str = None, timestamp: datetime = None,
+                 edited_timestamp: datetime = None, tts: bool = False, mention_everyone: bool = False,
+                 mentions: List[User] = [], mention_roles: List[int] = [], attachments: List[Attachment] = [],
                  embeds: List[Embed] = [], reactions: List[Reaction] = [], nonce: int = None,
                  pinned=False, webhook_id=None, type=None,
                  activity=MessageActivity(), application=MessageApplication()):
@@ -667,10 +712,8 @@ class ChannelMessage(DiscordObject):
 
         TODO: Add embed support
         """
-        data = dict()
-        data["content"] = self.content
         res = await self.bot.http.request_url(f'/channels/{self.channel_id}/messages/{self.id}', type='PATCH',
-                                              data=data)
+                                              data=self.to_dict(include=('content',)))
         return await ChannelMessage.from_api_res(res, self.bot)
 
     async def delete(self):
@@ -682,24 +725,6 @@ class ChannelMessage(DiscordObject):
         """
         await self.bot.http.request_url(f'/channels/{self.channel_id}/messages/{self.id}', type='DELETE')
 
-    async def _from_api_ext(self, key, value):
-        if key == 'author':
-            setattr(self, key, await User.from_api_res(value, self.bot))
-        elif key == 'mentions':
-            setattr(self, key, [await User.from_api_res(x, self.bot) for x in value])
-        elif key == 'mention_roles':
-            setattr(self, key, [await Role.from_api_res(x, self.bot) for x in value])
-        elif key == 'attachments':
-            setattr(self, key, [await Attachment.from_api_res(x, self.bot) for x in value])
-        elif key == 'reactions':
-            setattr(self, key, [await Reaction.from_api_res(x, self.bot) for x in value])
-        elif key == 'activity':
-            setattr(self, key, await MessageActivity.from_api_res(value, self.bot))
-        elif key == 'activity':
-            setattr(self, key, await MessageApplication.from_api_res(value, self.bot))
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 __all__ = [
     'Channel',
@@ -1,12 +1,23 @@
 import asyncio
-from typing import Optional, List, Tuple
+import weakref
+from typing import Dict, Iterable, Optional, List, Tuple, Union
 
 from .exceptions import EventTypeError
 from .user import User, UserConnection
 from .guild import Guild
 from .channel import Channel
-from .http import HTTPHandler
+from .cache import ResponseCache
+from .codec import JSONCodec
+from .http import HTTPHandler, ConnectorOptions
+from .members import MemberStore
+from .permissions import PermissionCache
+from .proxy import ProxyHTTPHandler
+from .ratelimit import RateLimitBackend
+from .enums import RequestPriority
+from .retry import RetryPolicy
 from .websocket import DiscordWebsocket
+from .sharding import ShardManager
+from .cluster import EventBus
 
 import logging
 
@@ -24,21 +35,98 @@ class DiscordBot:
         guilds (:obj:`list` of :class:`.Guild`): The list of guilds the bot is in.
         user (:class:`.User`): The user object of the bot.
         ws (:class:`.DiscordWebsocket`): The websocket used for communication
+        lazy_decoding (:obj:`bool`): Whether the nested objects of the models are decoded on first access
+        users (:class:`weakref.WeakValueDictionary`): The users decoded by the bot and still referenced, by id.
+            Every author, mention or member with the same id is the same :class:`.User`, updated in place.
+        permission_cache (:class:`.PermissionCache`): The effective permissions computed by
+            :meth:`.Guild.permissions_for`, invalidated by the role, member, channel and guild events.
+        columnar_members (:obj:`bool`): Whether the GUILD_MEMBERS_CHUNK members go to :attr:`member_stores`
+        member_stores (:obj:`dict`): The :class:`.MemberStore` of every guild by id, filled by the member chunks
+            when ``columnar_members`` is set.
+        compress_gateway (:obj:`bool`): Whether the gateway connection uses zlib-stream compression
+        gateway_encoding (:obj:`str`): The encoding of the gateway payloads, ``'json'`` or ``'etf'``
+        reconnect_policy (:class:`.RetryPolicy`): The gateway reconnection backoff, None for the default one
+        shard_manager (:class:`.ShardManager`): The shard connections when the bot is sharded, the bot has a single
+            unsharded connection in :attr:`ws` otherwise
+        event_bus (:class:`.EventBus`): Forwards events to and from the other processes of a cluster, None if the bot
+            runs alone
     """
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, ratelimiter: RateLimitBackend = None, proxy_url: str = None,
+                 response_cache: ResponseCache = None, connector_options: ConnectorOptions = None,
+                 retry_policy: RetryPolicy = None, json_codec: Union[str, JSONCodec] = 'auto',
+                 lazy_decoding: bool = False, columnar_members: bool = False, compress_gateway: bool = False,
+                 gateway_encoding: str = 'json', reconnect_policy: RetryPolicy = None, shard_count: int = None,
+                 shard_ids: Iterable[int] = None, event_bus: EventBus = None):
         """DiscordBot constructor.
 
         Args:
             token (obj:`str`): The discord token used for authentication.
+            ratelimiter (:class:`.RateLimitBackend`, optional): Where the rate limits are tracked,
+                use a :class:`.SharedRateLimiter` to share them between processes. Defaults to in process tracking.
+            proxy_url (:obj:`str`, optional): Send the REST requests through the :class:`.RESTProxy` at this url.
+            response_cache (:class:`.ResponseCache`, optional): Cache the responses of the read mostly endpoints.
+            connector_options (:class:`.ConnectorOptions`, optional): Size and timeouts of the connection pools.
+            retry_policy (:class:`.RetryPolicy`, optional): Which requests that failed on discord's side are retried.
+            json_codec (:obj:`str` or :class:`.JSONCodec`): The json library used by the REST api, the gateway and
+                the models, see :func:`.get_codec`. Defaults to the fastest installed one.
+            lazy_decoding (:obj:`bool`, optional): Keep the api values of the nested objects (message mentions,
+                guild members, ...) and decode them the first time they are read, see :meth:`.DiscordObject.from_dict`.
+            columnar_members (:obj:`bool`, optional): Decode the GUILD_MEMBERS_CHUNK members into the
+                :class:`.MemberStore` of their guild instead of a list of :class:`.GuildMember`, the
+                ``on_guild_members_chunk`` event gets the store.
+            compress_gateway (:obj:`bool`, optional): Ask the gateway for zlib-stream transport compression, the
+                payloads are inflated as they arrive.
+            gateway_encoding (:obj:`str`, optional): ``'json'``, or ``'etf'`` to receive the gateway payloads in the
+                erlang term format, see :mod:`discordaio.etf`. The etf decoder is pure python, json with a C codec
+                decodes faster.
+            reconnect_policy (:class:`.RetryPolicy`, optional): The backoff between gateway reconnections and how many
+                failed connections in a row are tolerated, see :meth:`.DiscordWebsocket.start`. The default one
+                retries forever.
+            shard_count (:obj:`int`, optional): Run the bot sharded, with this many shards in total. 0 uses the
+                number recommended by discord.
+            shard_ids (:obj:`list` of :obj:`int`, optional): The shards this process runs, all of them by default.
+                Setting it runs the bot sharded too, see :class:`.ShardManager`.
+            event_bus (:class:`.EventBus`, optional): Publish events to the other processes of a cluster and raise
+                theirs, see :class:`.ClusterLauncher`.
         """
         self.token: str = token
-        self.http: HTTPHandler = HTTPHandler(token, self)
+        if proxy_url is not None:
+            self.http: HTTPHandler = ProxyHTTPHandler(token, self, proxy_url, cache=response_cache,
+                                                      connector_options=connector_options, codec=json_codec)
+        else:
+            self.http: HTTPHandler = HTTPHandler(token, self, ratelimiter=ratelimiter, cache=response_cache,
+                                                 connector_options=connector_options, retry_policy=retry_policy,
+                                                 codec=json_codec)
         self.guilds: List[Guild] = []
         self.loop = asyncio.get_event_loop()
         self.do_sync = self.loop.run_until_complete
         self.user: Optional[User] = None
         self.ws: Optional[DiscordWebsocket] = None
+        self.lazy_decoding: bool = lazy_decoding
+        self.users: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.permission_cache: PermissionCache = PermissionCache()
+        self.columnar_members: bool = columnar_members
+        self.member_stores: Dict[int, MemberStore] = {}
+        self.compress_gateway: bool = compress_gateway
+        self.gateway_encoding: str = gateway_encoding
+        self.reconnect_policy: Optional[RetryPolicy] = reconnect_policy
+        self.shard_manager: Optional[ShardManager] = None
+        if shard_count is not None or shard_ids is not None:
+            self.shard_manager = ShardManager(self, shard_count or None, shard_ids)
+        self.event_bus: Optional[EventBus] = event_bus
+
+    @property
+    def latency(self) -> float:
+        """Seconds the gateway took to acknowledge the last heartbeat, infinite if it isn't connected yet.
+
+        .. versionadded:: 0.4.0
+        """
+        if self.shard_manager is not None:
+            return self.shard_manager.latency
+        if self.ws is None:
+            return float('inf')
+        return self.ws.latency
 
     def run(self) -> None:
         """Starts the bot, making it connect to discord.
@@ -48,15 +136,21 @@ class DiscordBot:
         try:
             self.do_sync(self._start())
         except KeyboardInterrupt:
-            self.do_sync(self.ws.close())
-            pass
+            if self.shard_manager is not None:
+                self.do_sync(self.shard_manager.close())
+            else:
+                self.do_sync(self.ws.close())
         except asyncio.CancelledError:
             logger.debug('Tasks has been cancelled')
         finally:
+            if self.event_bus is not None:
+                self.do_sync(self.event_bus.close())
             self.do_sync(self.http.close_session())
             self.loop.close()
 
     async def raise_event(self, event: str, *args, **kwargs) -> None:
+        if self.event_bus is not None and event in self.event_bus.forward:
+            self.event_bus.publish(event, *args)
         try:
             if hasattr(self, event):
                 await getattr(self, event)(*args, **kwargs)
@@ -100,7 +194,13 @@ class DiscordBot:
         .. versionadded:: 0.2.0
         """
         await self.http.create_session()
-        self.ws = DiscordWebsocket(self.http)
+        if self.event_bus is not None:
+            await self.event_bus.start(self)
+        if self.shard_manager is not None:
+            await self.shard_manager.start()
+            return
+        self.ws = DiscordWebsocket(self.http, compress=self.compress_gateway, encoding=self.gateway_encoding,
+                                   reconnect_policy=self.reconnect_policy)
         await self.ws.start()
 
     async def exit(self):
@@ -108,8 +208,12 @@ class DiscordBot:
 
         .. versionadded:: 0.2.0
         """
-        if not self.ws.closed:
+        if self.shard_manager is not None:
+            await self.shard_manager.close()
+        elif not self.ws.closed:
             await self.ws.close()
+        if self.event_bus is not None:
+            await self.event_bus.close()
         await self.http.close_session()
 
     async def change_avatar(self, url: str):
@@ -159,6 +263,31 @@ class DiscordBot:
         res = await self.http.request_url('/guilds/' + str(guild_id))
         return await Guild.from_api_res(res, self)
 
+    async def get_member_store(self, guild_id: int, store: MemberStore = None) -> MemberStore:
+        """Gets every member of a guild, a thousand per request, into a :class:`.MemberStore`.
+
+        .. versionadded:: 0.4.0
+
+        Args:
+            guild_id (:obj:`int`): The guild id
+            store (:class:`.MemberStore`, optional): Add the members to this store instead of a new one.
+
+        Returns:
+            :class:`.MemberStore`: The members
+        """
+        if store is None:
+            store = MemberStore(self)
+        after = 0
+        while True:
+            res = await self.http.request_url(f'/guilds/{guild_id}/members', params={'limit': 1000, 'after': after},
+                                              priority=RequestPriority.BULK)
+            if not res:
+                return store
+            store.extend(res)
+            if len(res) < 1000:
+                return store
+            after = max(int(member['user']['id']) for member in res)
+
     async def move_channels(self, guild_id: int, array: List[Tuple[int, int]]):
         """Modify the positions of a set of channel objects for the guild.
 
@@ -0,0 +1,532 @@
+"""Running the shards of a bot in several processes.
+
+The processes talk to a :class:`ClusterCoordinator` through a unix socket, so it isn't available on windows. Messages
+are json objects separated by newlines, like the ones of the :class:`.RateLimitCoordinator`.
+"""
+
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import tempfile
+from typing import Callable, Dict, Iterable, List, Optional
+
+import discordaio
+from .base import DiscordObject
+from .http import HTTPHandler
+from .retry import RetryPolicy
+from .sharding import IDENTIFY_INTERVAL, IdentifyLimiter
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest message line read from the socket, a forwarded GUILD_CREATE of a large guild is several megabytes
+LINE_LIMIT = 64 * 1024 * 1024
+
+
+def shard_slices(shard_count: int, processes: int) -> List[range]:
+    """Splits the shards in ``processes`` consecutive ranges, the first ones get a shard more when they don't divide
+    evenly.
+
+    .. versionadded:: 0.4.0
+    """
+    if processes < 1:
+        raise ValueError('At least one process is needed')
+    processes = min(processes, shard_count)
+    size, extra = divmod(shard_count, processes)
+    slices = []
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(range(start, end))
+        start = end
+    return slices
+
+
+class ClusterCoordinator:
+    """Spaces the IDENTIFY of the shards of all the processes of a cluster and forwards the events they publish.
+
+    The coordinator runs the only :class:`.IdentifyLimiter` of the cluster, every :class:`SharedIdentifyLimiter`
+    waits for its answer before identifying. The events sent by an :class:`EventBus` are written as they are to the
+    other buses, they aren't decoded by the coordinator.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        path (:obj:`str`): The path of the unix socket
+        identify_limiter (:class:`.IdentifyLimiter`): The IDENTIFY buckets shared by the processes
+        forwarded (:obj:`int`): The number of events forwarded to a bus
+    """
+
+    def __init__(self, path: str, max_concurrency: int = 1, interval: float = IDENTIFY_INTERVAL):
+        self.path: str = path
+        self.identify_limiter: IdentifyLimiter = IdentifyLimiter(max_concurrency, interval)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.forwarded: int = 0
+        self._writers: set = set()
+        self._subscribers: set = set()
+
+    async def start(self):
+        """Starts listening on the unix socket."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, self.path, limit=LINE_LIMIT)
+        logger.debug(f'Cluster coordinator listening on {self.path}')
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+            os.unlink(self.path)
+
+    async def _identify(self, writer: asyncio.StreamWriter, request_id: int, shard_id: int):
+        await self.identify_limiter.acquire(shard_id)
+        writer.write(json.dumps({'op': 'identify', 'id': request_id}).encode() + b'\n')
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = set()
+        self._writers.add(writer)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as e:
+                    logger.error(f'Dropped a message longer than {LINE_LIMIT} bytes: {e}')
+                    continue
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError as e:
+                    logger.error(f'Dropped an invalid message: {e}')
+                    continue
+                op = msg['op']
+
+                if op == 'publish':
+                    for subscriber in self._subscribers:
+                        if subscriber is not writer:
+                            subscriber.write(line)
+                            self.forwarded += 1
+                elif op == 'identify':
+                    task = asyncio.ensure_future(self._identify(writer, msg['id'], msg['shard']))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif op == 'subscribe':
+                    self._subscribers.add(writer)
+        except ConnectionError as e:
+            logger.error(e, exc_info=1)
+        finally:
+            for task in list(pending):
+                task.cancel()
+            self._subscribers.discard(writer)
+            self._writers.discard(writer)
+            writer.close()
+
+
+class _CoordinatorConnection:
+    """A connection to the coordinator, every line received is given to ``on_line`` and ``on_lost`` is called when
+    the connection ends."""
+
+    def __init__(self, path: str, on_line: Callable[[bytes], None], on_lost: Callable[[], None]):
+        self.path: str = path
+        self.on_line = on_line
+        self.on_lost = on_lost
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Future] = None
+        self._closing: bool = False
+
+    async def open(self):
+        reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+        self._reader_task = asyncio.ensure_future(self._read(reader))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as e:
+                    logger.error(f'Dropped a message longer than {LINE_LIMIT} bytes: {e}')
+                    continue
+                if not line:
+                    break
+                try:
+                    self.on_line(line)
+                except Exception as e:
+                    logger.error(e, exc_info=1)
+        except ConnectionError:
+            pass
+
+        if not self._closing:
+            logger.warning(f'Lost the connection with the cluster coordinator on {self.path}')
+        self._writer = None
+        self.on_lost()
+
+    def send(self, line: bytes):
+        if self._writer is not None:
+            self._writer.write(line)
+
+    async def close(self):
+        self._closing = True
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await self._reader_task
+            self._reader_task = None
+
+
+class SharedIdentifyLimiter(IdentifyLimiter):
+    """Identify limiter that waits for the :class:`ClusterCoordinator` on ``path``, so the shards of all the processes
+    together respect ``max_concurrency``.
+
+    If the coordinator can't be reached the shard is spaced by this process only, with the same buckets.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        path (:obj:`str`): The path of the unix socket of the coordinator
+    """
+
+    def __init__(self, path: str, max_concurrency: int = 1, interval: float = IDENTIFY_INTERVAL):
+        super().__init__(max_concurrency, interval)
+        self.path: str = path
+        self._connection: Optional[_CoordinatorConnection] = None
+        self._connect_lock: asyncio.Lock = None
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._next_id: int = 0
+
+    async def _connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self._connection is None:
+                connection = _CoordinatorConnection(self.path, self._received, self._lost)
+                await connection.open()
+                self._connection = connection
+
+    def _received(self, line: bytes):
+        waiter = self._waiters.pop(json.loads(line)['id'], None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _lost(self):
+        self._connection = None
+        waiters = self._waiters
+        self._waiters = {}
+        for waiter in waiters.values():
+            if not waiter.done():
+                waiter.set_exception(ConnectionResetError('Lost the connection with the cluster coordinator'))
+
+    async def acquire(self, shard_id: int) -> None:
+        try:
+            await self._connect()
+        except OSError as e:
+            logger.warning(f'Can\'t reach the cluster coordinator ({e}), shard {shard_id} identifies on its own')
+            return await super().acquire(shard_id)
+
+        self._next_id += 1
+        request_id = self._next_id
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters[request_id] = waiter
+        self._connection.send(json.dumps({'op': 'identify', 'id': request_id, 'shard': shard_id}).encode() + b'\n')
+        try:
+            await waiter
+        except ConnectionResetError:
+            await super().acquire(shard_id)
+        finally:
+            self._waiters.pop(request_id, None)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+def _encode_argument(obj):
+    if isinstance(obj, DiscordObject):
+        return {'__model__': type(obj).__name__, 'data': obj.to_dict()}
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} can\'t be sent to another process')
+
+
+class EventBus:
+    """Forwards events between the processes of a cluster, through the :class:`ClusterCoordinator` on ``path``.
+
+    The events named in ``forward`` are published when the bot raises them, and :meth:`publish` sends any other event.
+    The other processes raise them as ``on_remote_<name>``, with the id of the worker that published it first:
+    ``on_message`` becomes ``on_remote_message(worker_id, message)``.
+
+    The arguments must be json values, datetimes or discord objects. The objects are sent with
+    :meth:`.DiscordObject.to_dict` and built again with :meth:`.DiscordObject.from_dict` by the receiving bot.
+
+    If the connection with the coordinator is lost the bus connects again with a backoff, the events published
+    meanwhile are dropped and counted in :attr:`dropped`.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `bot.event_bus = EventBus(path, forward=['on_guild_create'])`
+
+        `async def on_remote_guild_create(worker_id, guild): ...`
+
+    Attributes:
+        path (:obj:`str`): The path of the unix socket of the coordinator
+        forward (:obj:`frozenset` of :obj:`str`): The events of the bot published automatically
+        worker_id (:obj:`int`): Identifies this process in the events it publishes, the pid by default
+        bot (:class:`.DiscordBot`): The bot that raises the events of the other processes
+        published (:obj:`int`): The number of events published by this process
+        received (:obj:`int`): The number of events received from the other processes
+        dropped (:obj:`int`): The number of events not published because the bus was disconnected
+        reconnect_policy (:class:`.RetryPolicy`): The delays between the reconnection attempts
+    """
+
+    def __init__(self, path: str, forward: Iterable[str] = (), worker_id: int = None):
+        self.path: str = path
+        self.forward: frozenset = frozenset(forward)
+        self.worker_id: int = worker_id if worker_id is not None else os.getpid()
+        self.bot: Optional['discordaio.DiscordBot'] = None
+        self.published: int = 0
+        self.received: int = 0
+        self.dropped: int = 0
+        self.reconnect_policy: RetryPolicy = RetryPolicy(base_delay=0.5, max_delay=10.0)
+        self._connection: Optional[_CoordinatorConnection] = None
+        self._reconnect_task: Optional[asyncio.Future] = None
+        self._closing: bool = False
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    async def start(self, bot: 'discordaio.DiscordBot') -> None:
+        """Connects to the coordinator and subscribes to the events of the other processes.
+
+        .. versionadded:: 0.4.0
+
+        Raises:
+            OSError: If the coordinator can't be reached.
+        """
+        self.bot = bot
+        self._closing = False
+        await self._connect()
+
+    async def _connect(self):
+        connection = _CoordinatorConnection(self.path, self._received, self._lost)
+        await connection.open()
+        self._connection = connection
+        connection.send(json.dumps({'op': 'subscribe', 'worker': self.worker_id}).encode() + b'\n')
+
+    async def _reconnect(self):
+        attempt = 0
+        while not self._closing:
+            attempt += 1
+            await asyncio.sleep(self.reconnect_policy.get_delay(attempt))
+            try:
+                await self._connect()
+            except OSError as e:
+                logger.debug(f'Can\'t reach the cluster coordinator yet: {e!r}')
+                continue
+            logger.info(f'Event bus connected again, {self.dropped} events dropped so far')
+            break
+        self._reconnect_task = None
+
+    def publish(self, event: str, *args) -> bool:
+        """Sends an event to the other processes.
+
+        .. versionadded:: 0.4.0
+
+        Returns:
+            :obj:`bool`: False if the bus isn't connected, the event is then counted in :attr:`dropped`, or the
+            arguments can't be sent.
+        """
+        if self._connection is None:
+            if self.bot is not None:
+                self.dropped += 1
+                logger.debug(f'The event bus is disconnected, dropped {event}')
+            return False
+        try:
+            line = json.dumps({'op': 'publish', 'event': event, 'worker': self.worker_id, 'args': args},
+                              default=_encode_argument)
+        except (TypeError, ValueError) as e:
+            logger.error(f'Can\'t publish {event}: {e}')
+            return False
+        self._connection.send(line.encode() + b'\n')
+        self.published += 1
+        return True
+
+    def _decode_object(self, dct: dict):
+        name = dct.get('__model__')
+        if name is None:
+            return dct
+        cls = getattr(discordaio, name, None)
+        if not (isinstance(cls, type) and issubclass(cls, DiscordObject)):
+            return dct['data']
+        return cls.from_dict(dct['data'], self.bot)
+
+    def _received(self, line: bytes):
+        msg = json.loads(line, object_hook=self._decode_object)
+        event = msg['event']
+        self.received += 1
+        name = 'on_remote_' + (event[3:] if event.startswith('on_') else event)
+        asyncio.ensure_future(self.bot.raise_event(name, msg['worker'], *msg['args']))
+
+    def _lost(self):
+        self._connection = None
+        if not self._closing and self._reconnect_task is None:
+            logger.warning('The event bus lost the cluster coordinator, the events are dropped until it reconnects')
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._connection is not None:
+            await self._connection.close()
+
+
+def _run_worker(token: str, worker_id: int, shard_ids: range, shard_count: int, max_concurrency: int,
+                socket_path: str, forward_events: Optional[List[str]], setup: Optional[Callable], bot_options: dict):
+    """The entry point of the worker processes."""
+    bot = discordaio.DiscordBot(token, shard_count=shard_count, shard_ids=shard_ids, **bot_options)
+    bot.shard_manager.identify_limiter = SharedIdentifyLimiter(socket_path, max_concurrency)
+    if forward_events is not None:
+        bot.event_bus = EventBus(socket_path, forward_events, worker_id)
+    if setup is not None:
+        setup(bot)
+    logger.info(f'Worker {worker_id} (pid {os.getpid()}) runs the shards {list(shard_ids)}')
+    bot.run()
+
+
+class ClusterLauncher:
+    """Runs the shards of a bot in a pool of worker processes, each one a :class:`.DiscordBot` with a slice of the
+    shards, so the decoding and the handlers of the shards use every core.
+
+    The launcher process hosts the :class:`ClusterCoordinator`: the workers identify through it, so all of them
+    together respect the ``max_concurrency`` of the bot, and with ``forward_events`` it forwards the events of their
+    :class:`EventBus`.
+
+    The workers are started with the ``spawn`` method, ``setup`` and the options must be picklable: ``setup`` has to
+    be a function defined at the top level of a module, and the launcher must be run under
+    ``if __name__ == '__main__':``. ``setup`` is called with the bot of the worker before it starts, to register its
+    events. Use a :class:`.SharedRateLimiter` in ``bot_options`` to share the REST rate limits too.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `ClusterLauncher(token, setup=register_events, processes=4, forward_events=['on_guild_create']).run()`
+
+    Attributes:
+        token (:obj:`str`): The discord token used for authentication
+        setup (:obj:`callable`): Called with the :class:`.DiscordBot` of every worker before it starts
+        processes (:obj:`int`): The number of worker processes, the number of cpus by default
+        shard_count (:obj:`int`): The total number of shards, None to use the one recommended by discord
+        max_concurrency (:obj:`int`): The IDENTIFY buckets, None to use the ones of ``/gateway/bot``
+        socket_path (:obj:`str`): The path of the unix socket of the coordinator
+        forward_events (:obj:`list` of :obj:`str`): The events the workers publish to each other, None for no event
+            bus, an empty list for a bus that only carries what the handlers publish
+        bot_options (:obj:`dict`): Keyword arguments of the :class:`.DiscordBot` of the workers
+        workers (:obj:`list` of :class:`multiprocessing.Process`): The worker processes
+        coordinator (:class:`ClusterCoordinator`): The coordinator, while the cluster runs
+    """
+
+    def __init__(self, token: str, setup: Callable[['discordaio.DiscordBot'], None] = None, processes: int = None,
+                 shard_count: int = None, max_concurrency: int = None, socket_path: str = None,
+                 forward_events: Iterable[str] = None, **bot_options):
+        self.token: str = token
+        self.setup: Optional[Callable] = setup
+        self.processes: int = processes or os.cpu_count() or 1
+        self.shard_count: Optional[int] = shard_count
+        self.max_concurrency: Optional[int] = max_concurrency
+        self.socket_path: str = socket_path or os.path.join(tempfile.gettempdir(),
+                                                            f'discordaio-cluster-{os.getpid()}.sock')
+        self.forward_events: Optional[List[str]] = list(forward_events) if forward_events is not None else None
+        self.bot_options: dict = bot_options
+        self.workers: List[multiprocessing.Process] = []
+        self.coordinator: Optional[ClusterCoordinator] = None
+
+    async def _fetch_gateway_info(self):
+        http = HTTPHandler(self.token, None, codec=self.bot_options.get('json_codec', 'auto'))
+        await http.create_session()
+        try:
+            info = await http.request_url('/gateway/bot')
+        finally:
+            await http.close_session()
+        if self.shard_count is None:
+            self.shard_count = info['shards']
+        if self.max_concurrency is None:
+            self.max_concurrency = info.get('session_start_limit', {}).get('max_concurrency', 1)
+
+    async def start(self) -> None:
+        """Starts the coordinator and the workers, and waits until all the workers exit.
+
+        .. versionadded:: 0.4.0
+        """
+        if self.shard_count is None or self.max_concurrency is None:
+            await self._fetch_gateway_info()
+        self.coordinator = ClusterCoordinator(self.socket_path, self.max_concurrency)
+        await self.coordinator.start()
+
+        context = multiprocessing.get_context('spawn')
+        for worker_id, shard_ids in enumerate(shard_slices(self.shard_count, self.processes)):
+            process = context.Process(
+                target=_run_worker, name=f'discordaio-worker-{worker_id}',
+                args=(self.token, worker_id, shard_ids, self.shard_count, self.max_concurrency, self.socket_path,
+                      self.forward_events, self.setup, self.bot_options))
+            process.start()
+            self.workers.append(process)
+        logger.info(f'Started {len(self.workers)} workers for {self.shard_count} shards')
+
+        running = list(self.workers)
+        while running:
+            await asyncio.sleep(0.5)
+            for process in [process for process in running if not process.is_alive()]:
+                running.remove(process)
+                if process.exitcode:
+                    logger.error(f'{process.name} exited with code {process.exitcode}')
+
+    def join(self, timeout: float = None) -> None:
+        """Waits for the workers to exit, the ones still running after ``timeout`` seconds are terminated."""
+        for process in self.workers:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f'{process.name} didn\'t exit, terminating it')
+                process.terminate()
+                process.join()
+
+    async def close(self) -> None:
+        """Stops the coordinator."""
+        if self.coordinator is not None:
+            await self.coordinator.close()
+            self.coordinator = None
+
+    def run(self) -> None:
+        """Runs the cluster until all the workers exit.
+
+        On ctrl-c the workers close their connections, they get the interrupt too, and the launcher waits for them.
+
+        .. versionadded:: 0.4.0
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(self.start())
+        except KeyboardInterrupt:
+            self.join(10.0)
+        finally:
+            loop.run_until_complete(self.close())
+            loop.close()
+
+
+__all__ = [
+    'ClusterCoordinator',
+    'ClusterLauncher',
+    'EventBus',
+    'SharedIdentifyLimiter',
+    'shard_slices',
+]
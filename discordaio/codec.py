@@ -0,0 +1,104 @@
+"""JSON encoding and decoding used by the REST api, the gateway and the models.
+
+A faster json library is used when installed, falling back to the standard library.
+"""
+
+import json
+from typing import Any, Union
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JSONCodec:
+    """Encodes and decodes json using the standard library.
+
+    Subclass it to plug another json library, :meth:`dumps` must return a :obj:`str`.
+
+    .. versionadded:: 0.4.0
+    """
+    name = 'json'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.name}>'
+
+
+class OrjsonCodec(JSONCodec):
+    """Encodes and decodes json using `orjson <https://github.com/ijl/orjson>`_.
+
+    .. versionadded:: 0.4.0
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self.loads = orjson.loads
+
+    def dumps(self, obj: Any) -> str:
+        return self._orjson.dumps(obj).decode()
+
+
+class UjsonCodec(JSONCodec):
+    """Encodes and decodes json using `ujson <https://github.com/ultrajson/ultrajson>`_.
+
+    .. versionadded:: 0.4.0
+    """
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.loads = ujson.loads
+        self.dumps = ujson.dumps
+
+
+CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': JSONCodec,
+}
+
+
+def get_codec(codec: Union[str, JSONCodec] = 'auto') -> JSONCodec:
+    """Returns the json codec with the given name.
+
+    .. versionadded:: 0.4.0
+
+    Args:
+        codec: ``'orjson'``, ``'ujson'``, ``'json'``, a :class:`JSONCodec` instance, or ``'auto'``
+            to use the fastest installed library.
+
+    Raises:
+        ImportError: If the requested library isn't installed.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    if codec == 'auto':
+        for cls in CODECS.values():
+            try:
+                return cls()
+            except ImportError:
+                continue
+
+    if codec not in CODECS:
+        raise ValueError(f'Unknown json codec {codec}, use one of {", ".join(CODECS)} or auto')
+    return CODECS[codec]()
+
+
+# Used when there is no bot to take the codec from.
+default_codec: JSONCodec = get_codec()
+
+__all__ = [
+    'JSONCodec',
+    'OrjsonCodec',
+    'UjsonCodec',
+    'get_codec',
+]
@@ -1,7 +1,10 @@
 DISCORD_CDN = 'https://cdn.discordapp.com'
 DISCORD_API_URL = 'https://discordapp.com/api/v8'
+# First second of 2015 in milliseconds, the snowflake timestamps start there
+DISCORD_EPOCH = 1420070400000
 
 __all__ = [
     'DISCORD_CDN',
     'DISCORD_API_URL',
+    'DISCORD_EPOCH',
 ]
@@ -1,6 +1,7 @@
 import json
 
 from .base import DiscordObject
+from .snowflake import Snowflake
 from .user import User
 from .constants import DISCORD_CDN
 
@@ -19,6 +20,12 @@ class Emoji(DiscordObject):
         managed (:obj:`bool`, optional): whether this emoji is managed
         animated (:obj:`bool`, optional): whether this emoji is animated
     """
+    __slots__ = ('id', 'name', 'roles', 'user', 'require_colons', 'managed', 'animated')
+    _fields = {
+        'id': Snowflake,
+        'roles': [Snowflake],
+        'user': User,
+    }
 
     def __init__(self, id=0, name="", roles=[], user=None, require_colons=False,
                  managed=False, animated=False):
@@ -30,13 +37,6 @@ class Emoji(DiscordObject):
         self.managed = managed
         self.animated = animated
 
-    async def _from_api_ext(self, key, value):
-        # Note: roles here is only an array of ids
-        if key == 'user':
-            setattr(self, key, await User.from_api_res(value))
-        else:
-            return await super()._from_api_ext(key, value)
-
     def get_url(self):
         return DISCORD_CDN + f'/emojis/{self.id}.png'
 
@@ -69,6 +69,17 @@ class ActivityTypes(Enum):
     LISTENING = 2
 
 
+@unique
+class RequestPriority(Enum):
+    """Priority of a REST request, lower values are sent first when requests wait on the same rate limit.
+
+    .. versionadded:: 0.4.0
+    """
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+
 __all__ = [
     'MessageNotificationLevel',
     'ExplicitContentFilterLevel',
@@ -77,4 +88,5 @@ __all__ = [
     'ChannelTypes',
     'MessageActivityTypes',
     'GatewayOpcodes',
+    'RequestPriority',
 ]
@@ -0,0 +1,212 @@
+"""Erlang term format encoder and decoder for the ``encoding=etf`` gateway, in pure python.
+
+Only the terms discord uses are supported. The atoms become :obj:`str`, except ``nil``, ``true`` and ``false`` which
+become None, True and False, and the binaries become :obj:`str`, so the payloads have the same shape as the json ones.
+The only difference is that the snowflakes are integers instead of strings, the models convert both.
+
+http://erlang.org/doc/apps/erts/erl_ext_dist.html
+"""
+
+import struct
+import zlib
+from typing import Any
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_unpack_int = struct.Struct('>i').unpack_from
+_unpack_uint = struct.Struct('>I').unpack_from
+_unpack_ushort = struct.Struct('>H').unpack_from
+_unpack_double = struct.Struct('>d').unpack_from
+
+# Decoded atoms by their bytes, discord sends the same few hundred keys over and over
+_atoms: dict = {b'nil': None, b'true': True, b'false': False}
+
+
+def _atom(raw: bytes):
+    try:
+        return _atoms[raw]
+    except KeyError:
+        if len(_atoms) >= 4096:
+            return raw.decode('utf-8')
+        value = _atoms[raw] = raw.decode('utf-8')
+        return value
+
+
+def _decode(data: bytes, i: int):
+    """Decodes the term at ``data[i]``, returns it and the offset after it."""
+    tag = data[i]
+    i += 1
+    if tag == BINARY_EXT:
+        end = i + 4 + _unpack_uint(data, i)[0]
+        return data[i + 4:end].decode('utf-8'), end
+    if tag == MAP_EXT:
+        arity = _unpack_uint(data, i)[0]
+        i += 4
+        result = {}
+        for _ in range(arity):
+            key, i = _decode(data, i)
+            result[key], i = _decode(data, i)
+        return result, i
+    if tag == SMALL_ATOM_UTF8_EXT or tag == SMALL_ATOM_EXT:
+        end = i + 1 + data[i]
+        return _atom(data[i + 1:end]), end
+    if tag == SMALL_INTEGER_EXT:
+        return data[i], i + 1
+    if tag == SMALL_BIG_EXT:
+        length = data[i]
+        end = i + 2 + length
+        value = int.from_bytes(data[i + 2:end], 'little')
+        return (-value if data[i + 1] else value), end
+    if tag == INTEGER_EXT:
+        return _unpack_int(data, i)[0], i + 4
+    if tag == LIST_EXT:
+        length = _unpack_uint(data, i)[0]
+        i += 4
+        result = []
+        append = result.append
+        for _ in range(length):
+            value, i = _decode(data, i)
+            append(value)
+        # The tail of a proper list is NIL_EXT
+        tail, i = _decode(data, i)
+        if tail != []:
+            append(tail)
+        return result, i
+    if tag == NIL_EXT:
+        return [], i
+    if tag == ATOM_UTF8_EXT or tag == ATOM_EXT:
+        end = i + 2 + _unpack_ushort(data, i)[0]
+        return _atom(data[i + 2:end]), end
+    if tag == NEW_FLOAT_EXT:
+        return _unpack_double(data, i)[0], i + 8
+    if tag == STRING_EXT:
+        end = i + 2 + _unpack_ushort(data, i)[0]
+        return data[i + 2:end].decode('latin-1'), end
+    if tag == SMALL_TUPLE_EXT or tag == LARGE_TUPLE_EXT:
+        if tag == SMALL_TUPLE_EXT:
+            arity = data[i]
+            i += 1
+        else:
+            arity = _unpack_uint(data, i)[0]
+            i += 4
+        result = []
+        for _ in range(arity):
+            value, i = _decode(data, i)
+            result.append(value)
+        return tuple(result), i
+    if tag == LARGE_BIG_EXT:
+        length = _unpack_uint(data, i)[0]
+        end = i + 5 + length
+        value = int.from_bytes(data[i + 5:end], 'little')
+        return (-value if data[i + 4] else value), end
+    if tag == FLOAT_EXT:
+        return float(data[i:i + 31].split(b'\x00', 1)[0]), i + 31
+    raise ValueError(f'Unsupported erlang term tag {tag} at offset {i - 1}')
+
+
+def loads(data: bytes) -> Any:
+    """Decodes an erlang term format payload.
+
+    .. versionadded:: 0.4.0
+
+    Raises:
+        ValueError: If the payload isn't valid or uses a term discord doesn't send.
+    """
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError('Not an erlang term format payload')
+    data = bytes(data)
+    try:
+        if data[1] == COMPRESSED:
+            data = bytes([FORMAT_VERSION]) + zlib.decompress(data[6:])
+        value, end = _decode(data, 1)
+    except (IndexError, struct.error, zlib.error, UnicodeDecodeError) as e:
+        raise ValueError(f'Truncated or invalid erlang term format payload: {e}') from e
+    if end != len(data):
+        raise ValueError(f'{len(data) - end} bytes left after the erlang term')
+    return value
+
+
+def _encode(value, parts: list):
+    if value is None:
+        parts.append(b'\x77\x03nil')
+    elif value is True:
+        parts.append(b'\x77\x04true')
+    elif value is False:
+        parts.append(b'\x77\x05false')
+    elif isinstance(value, str):
+        raw = value.encode('utf-8')
+        parts.append(struct.pack('>BI', BINARY_EXT, len(raw)))
+        parts.append(raw)
+    elif isinstance(value, int):
+        if 0 <= value <= 255:
+            parts.append(struct.pack('>BB', SMALL_INTEGER_EXT, value))
+        elif -2 ** 31 <= value < 2 ** 31:
+            parts.append(struct.pack('>Bi', INTEGER_EXT, value))
+        else:
+            magnitude = abs(value)
+            raw = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'little')
+            if len(raw) > 255:
+                raise ValueError(f'{value} is too large for the erlang term format')
+            parts.append(struct.pack('>BBB', SMALL_BIG_EXT, len(raw), value < 0))
+            parts.append(raw)
+    elif isinstance(value, float):
+        parts.append(struct.pack('>Bd', NEW_FLOAT_EXT, value))
+    elif isinstance(value, dict):
+        parts.append(struct.pack('>BI', MAP_EXT, len(value)))
+        for key, item in value.items():
+            _encode(key, parts)
+            _encode(item, parts)
+    elif isinstance(value, (list, tuple)):
+        if value:
+            parts.append(struct.pack('>BI', LIST_EXT, len(value)))
+            for item in value:
+                _encode(item, parts)
+        parts.append(b'\x6a')
+    elif isinstance(value, (bytes, bytearray)):
+        parts.append(struct.pack('>BI', BINARY_EXT, len(value)))
+        parts.append(bytes(value))
+    else:
+        raise TypeError(f'Object of type {type(value).__name__} is not erlang term format serializable')
+
+
+def dumps(obj: Any) -> bytes:
+    """Encodes an object in the erlang term format: strings as binaries, lists as lists, dicts as maps and None,
+    True and False as atoms.
+
+    .. versionadded:: 0.4.0
+
+    Raises:
+        TypeError: If an object can't be encoded.
+    """
+    parts = [b'\x83']
+    _encode(obj, parts)
+    return b''.join(parts)
+
+
+__all__ = [
+    'loads',
+    'dumps',
+]
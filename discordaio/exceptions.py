@@ -34,9 +34,23 @@ class UnhandledEndpointStatusError(Exception):
     pass
 
 
+class CircuitOpenError(Exception):
+    def __init__(self, message, retry_after):
+        self.message = message
+        self.retry_after = retry_after
+
+
+class GatewayClosedError(Exception):
+    def __init__(self, message, code):
+        self.message = message
+        self.code = code
+
+
 __all__ = [
     'WebSocketCreationError',
     'EventTypeError',
     'AuthorizationError',
-    'UnhandledEndpointStatusError'
+    'UnhandledEndpointStatusError',
+    'CircuitOpenError',
+    'GatewayClosedError',
 ]
@@ -1,9 +1,13 @@
 from .base import DiscordObject
+from .snowflake import Snowflake
+from .timestamps import parse_timestamp
 from .user import User
 from .emoji import Emoji
 from .constants import DISCORD_CDN
 from .channel import Channel
 from .role import Role
+from .enums import RequestPriority
+from .permissions import Permissions, compute_permissions
 
 import logging
 logger = logging.getLogger(__name__)
@@ -18,6 +22,10 @@ class GuildEmbed(DiscordObject):
         enabled (:obj:`bool`): if the embed is enabled
         channel_id (:obj:`int`): the embed channel id
     """
+    __slots__ = ('enabled', 'channel_id')
+    _fields = {
+        'channel_id': Snowflake,
+    }
 
     def __init__(self, enabled=False, channel_id=0):
         self.enabled = enabled
@@ -33,10 +41,16 @@ class GuildMember(DiscordObject):
         user (:class:`.User`): user object
         nick (:obj:`str`, optional): this users guild nickname (if one is set)
         roles (:obj:`list` of :obj:`int`): array of role object ids
-        joined_at (:obj:`int`): timestamp when the user joined the guild
+        joined_at (:obj:`datetime.datetime`): timestamp when the user joined the guild
         deaf (:obj:`bool`): if the user is deafened
         mute (:obj:`bool`): if the user is muted
     """
+    __slots__ = ('user', 'nick', 'roles', 'joined_at', 'deaf', 'mute')
+    _fields = {
+        'roles': [Snowflake],
+        'joined_at': parse_timestamp,
+        'user': User,
+    }
 
     def __init__(self, user=User(), nick="", roles=[], joined_at=None, deaf=False,
                  mute=False):
@@ -47,14 +61,6 @@ class GuildMember(DiscordObject):
         self.deaf = deaf
         self.mute = mute
 
-    async def _from_api_ext(self, key, value):
-        if key == 'user':
-            setattr(self, key, await User.from_api_res(value))
-        elif key == 'guild_id':
-            pass
-        else:
-            await super()._from_api_ext(key, value)
-
     def __str__(self):
         return self.user.__str__()
 
@@ -94,7 +100,7 @@ class Guild(DiscordObject):
         widget_enabled (:obj:`bool`, optional): whether or not the server widget is enabled
         widget_channel_id (:obj:`int`, optional): the channel id for the server widget
         system_channel_id (:obj:`int`): the id of the channel to which system messages are sent
-        joined_at (:obj:`int`, optional): timestamp when this guild was joined at
+        joined_at (:obj:`datetime.datetime`, optional): timestamp when this guild was joined at
         large (:obj:`bool`, optional): whether this is considered a large guild
         unavailable (:obj:`bool`, optional): is this guild unavailable
         member_count (:obj:`int`, optional): total number of members in this guild
@@ -103,6 +109,28 @@ class Guild(DiscordObject):
         channels (:obj:`list` of :class:`.Channel`): channels in the guild
         presences (:obj:`list` of :class:`.Partial`): presences of the users in the guild
     """
+    __slots__ = (
+        'id', 'name', 'icon', 'splash', 'owner', 'owner_id', 'permissions', 'region', 'afk_channel_id', 'afk_timeout',
+        'embed_enabled', 'embed_channel_id', 'verification_level', 'default_message_notifications',
+        'explicit_content_filter', 'roles', 'emojis', 'features', 'mfa_level', 'application_id', 'widget_enabled',
+        'widget_channel_id', 'system_channel_id', 'joined_at', 'large', 'unavailable', 'member_count', 'voice_states',
+        'members', 'channels', 'presences',
+    )
+    _fields = {
+        'id': Snowflake,
+        'owner_id': Snowflake,
+        'permissions': int,
+        'afk_channel_id': Snowflake,
+        'embed_channel_id': Snowflake,
+        'application_id': Snowflake,
+        'widget_channel_id': Snowflake,
+        'system_channel_id': Snowflake,
+        'joined_at': parse_timestamp,
+        'roles': [Role],
+        'members': [GuildMember],
+        'emojis': [Emoji],
+        'channels': [Channel],
+    }
 
     def __init__(self, id=0, name="", icon="", splash="", owner=False,
                  owner_id=0, permissions=0, region="", afk_channel_id=0,
@@ -166,10 +194,8 @@ class Guild(DiscordObject):
 
         .. versionadded:: 0.3.0
         """
-        res = await self.bot.http.request_url(f'/guilds/{self.id}/members')
-        self.members = []
-        for member in res:
-            self.members.append(await GuildMember.from_api_res(member, self.bot))
+        res = await self.bot.http.request_url(f'/guilds/{self.id}/members', priority=RequestPriority.BULK)
+        self.members = GuildMember.from_dict(res, self.bot)
 
     async def create_channel(self, channel: Channel) -> Channel:
         """Creates a new guild channel
@@ -178,29 +204,10 @@ class Guild(DiscordObject):
 
         :param channel: The channel to create.
         """
-        data = dict()
         if channel.name is None:
             raise ValueError('Channel name must be set when creating a guild channel')
-        else:
-            data['name'] = channel.name
-
-        if channel.type is not None:
-            data['type'] = channel.type
-
-        if channel.bitrate is not None:
-            data['bitrate'] = channel.bitrate
-
-        if channel.user_limit is not None:
-            data['user_limit'] = channel.user_limit
-
-        if channel.permission_overwrites is not None:
-            data['permission_overwrites'] = channel.permission_overwrites
-
-        if channel.parent_id is not None:
-            data['parent_id'] = channel.parent_id
-
-        if channel.nsfw is not None:
-            data['nsfw'] = channel.nsfw
+        data = channel.to_dict(include=('name', 'type', 'bitrate', 'user_limit', 'permission_overwrites', 'parent_id',
+                                        'nsfw'))
 
         res = await self.bot.http.request_url(f'/guilds/{self.id}/channels', type='POST', data=data)
         return await Channel.from_api_res(res, self.bot)
@@ -224,22 +231,6 @@ class Guild(DiscordObject):
         """
         return await self.bot.http.request_url(f'/guilds/{self.id}', type='DELETE')
 
-    async def _from_api_ext(self, key, value):
-        if key == 'roles':
-            setattr(self, key, [await Role.from_api_res(x) for x in value])
-            pass
-        elif key == 'members':
-            setattr(self, key, [await GuildMember.from_api_res(x) for x in value])
-            pass
-        elif key == 'emojis':
-            setattr(self, key, [await Emoji.from_api_res(x) for x in value])
-            pass
-        elif key == 'channels':
-            setattr(self, key, [await Channel.from_api_res(x) for x in value])
-            pass
-        else:
-            await super()._from_api_ext(key, value)
-
     def is_owner(self, member: GuildMember) -> bool:
         """Returns wether the guild member is the owner of the guild
 
@@ -253,6 +244,28 @@ class Guild(DiscordObject):
         """
         return self.owner_id == member.user.id
 
+    def permissions_for(self, member: GuildMember, channel: Channel = None) -> Permissions:
+        """Returns the effective permissions of a member in the guild, or in one of its channels.
+
+        They are memoized in the permission cache of the bot, which the gateway events keep up to date.
+
+        .. versionadded:: 0.4.0
+
+        Example:
+            `if Permissions.SEND_MESSAGES in guild.permissions_for(guild_member, channel): ...`
+
+        Args:
+            member (:class:`.GuildMember`): The member
+            channel (:class:`.Channel`, optional): A channel of the guild, the guild wide permissions if None.
+
+        Returns:
+            :class:`.Permissions`: The permission bits.
+        """
+        cache = getattr(self.bot, 'permission_cache', None)
+        if cache is None:
+            return compute_permissions(self, member, channel)
+        return cache.get(self, member, channel)
+
     def get_icon(self) -> str:
         """Returns the guild icon
 
@@ -287,6 +300,7 @@ class IntegrationAccount(DiscordObject):
         id (:obj:`str`): id of the account
         name (:obj:`str`): name of the account
     """
+    __slots__ = ('id', 'name')
 
     def __init__(self, id="", name=""):
         self.id = id
@@ -309,8 +323,19 @@ class Integration(DiscordObject):
         expire_grace_period (:obj:`int`): the grace period before expiring subscribers
         user (:class:`.User`): object user for this integration
         account (:class:`.Account`):  account information
-        synced_at (:obj:`int`): timestamp when this integration was last synced
+        synced_at (:obj:`datetime.datetime`): timestamp when this integration was last synced
     """
+    __slots__ = (
+        'id', 'name', 'type', 'enabled', 'syncing', 'role_id', 'expire_behavior', 'expire_grace_period', 'user',
+        'account', 'synced_at',
+    )
+    _fields = {
+        'id': Snowflake,
+        'role_id': Snowflake,
+        'synced_at': parse_timestamp,
+        'user': User,
+        'account': IntegrationAccount,
+    }
 
     def __init__(self, id=0, name="", type="", enabled=False, syncing=False,
                  role_id=0, expire_behavior=0, expire_grace_period=0, user=None,
@@ -327,14 +352,6 @@ class Integration(DiscordObject):
         self.account = account
         self.synced_at = synced_at
 
-    async def _from_api_ext(self, key, value):
-        if key == 'user':
-            setattr(self, key, await User.from_api_res(value))
-        elif key == 'account':
-            setattr(self, key, await IntegrationAccount.from_api_res(value))
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 class Ban(DiscordObject):
     """Represents a ban
@@ -345,17 +362,15 @@ class Ban(DiscordObject):
         reason (:obj:`str`): the reason for the ban
         user (:class:`.User`): the banned user
     """
+    __slots__ = ('reason', 'user')
+    _fields = {
+        'user': User,
+    }
 
     def __init__(self, reason="", user=None):
         self.reason = reason
         self.user = user
 
-    async def _from_api_ext(self, key, value):
-        if key == 'user':
-            setattr(self, key, await User.from_api_res(value))
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 __all__ = [
     'Guild',
@@ -1,17 +1,24 @@
 import aiohttp
 import asyncio
+import collections
+import functools
 import json
 import logging
 import platform
+from typing import Any, Optional, Tuple, Union
 
 from .user import User, UserConnection
 from .guild import Guild, GuildMember
 from .base import DiscordObject
+from .cache import ResponseCache
+from .codec import JSONCodec, get_codec
 from .constants import DISCORD_API_URL
 from .channel import Channel, ChannelMessage
 from .emoji import Emoji
 from .exceptions import WebSocketCreationError, AuthorizationError, NotFoundError, GatewayUnavailable, UnhandledEndpointStatusError, BadRequestError
-from .enums import GatewayOpcodes
+from .enums import GatewayOpcodes, RequestPriority
+from .ratelimit import RateLimitBackend, RateLimiter, Route, parse_ratelimit_headers, GLOBAL_RATE_LIMIT
+from .retry import RetryPolicy, CircuitBreaker, TRANSPORT_ERRORS
 from .version import __version__
 
 import logging
@@ -19,28 +26,115 @@ logger = logging.getLogger(__name__)
 
 
 class RateLimit(DiscordObject):
+    """Body of a 429 response.
+
+    Attributes:
+        message (:obj:`str`): A message saying you are being rate limited
+        retry_after (:obj:`float`): The number of seconds to wait before submitting another request
+        _global (:obj:`bool`): Whether this is a global rate limit, the ``global`` key of the body
+    """
+
+    __slots__ = ('message', 'retry_after', '_global')
+
     def __init__(self, message="", retry_after=0, _global=False):
         self.message = message
         self.retry_after = retry_after
         self._global = _global
 
 
+def _params_key(params) -> tuple:
+    if not params:
+        return ()
+    if isinstance(params, dict):
+        params = params.items()
+    return tuple(sorted((str(key), str(value)) for key, value in params))
+
+
+class ConnectorOptions:
+    """Configuration of the connection pools used by :class:`HTTPHandler`.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        limit (:obj:`int`): The maximum number of open connections, 0 for no limit
+        limit_per_host (:obj:`int`): The maximum number of open connections to the same host, 0 for no limit
+        keepalive_timeout (:obj:`float`): Seconds an idle connection is kept open for reuse
+        dns_cache_ttl (:obj:`int`): Seconds the resolved addresses are cached, 0 disables the cache
+        timeout (:obj:`float`): Seconds a REST request can take in total, None for no limit
+        connect_timeout (:obj:`float`): Seconds to wait for a connection, including waiting for a free one in the pool
+        separate_gateway (:obj:`bool`): Use a dedicated connection pool for the gateway websocket
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 15.0,
+                 dns_cache_ttl: int = 10, timeout: Optional[float] = 30.0, connect_timeout: Optional[float] = 10.0,
+                 separate_gateway: bool = False):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.separate_gateway = separate_gateway
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                    keepalive_timeout=self.keepalive_timeout,
+                                    use_dns_cache=self.dns_cache_ttl != 0, ttl_dns_cache=self.dns_cache_ttl or None)
+
+    def create_gateway_connector(self) -> aiohttp.TCPConnector:
+        # One connection per shard, each one held for as long as the shard runs, so the pool has no limit.
+        return aiohttp.TCPConnector(limit=0, use_dns_cache=self.dns_cache_ttl != 0,
+                                    ttl_dns_cache=self.dns_cache_ttl or None)
+
+    def create_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+
+
 class HTTPHandler:
-    def __init__(self, token, discord_client):
+    def __init__(self, token, discord_client, global_rate_limit: int = GLOBAL_RATE_LIMIT,
+                 ratelimiter: RateLimitBackend = None, api_url: str = DISCORD_API_URL,
+                 cache: ResponseCache = None, connector_options: ConnectorOptions = None,
+                 retry_policy: RetryPolicy = None, circuit_breaker: CircuitBreaker = None,
+                 codec: Union[str, JSONCodec] = 'auto'):
         self.token: str = token
+        self.api_url: str = api_url
+        self.codec: JSONCodec = get_codec(codec)
         self.loop = asyncio.get_event_loop()
         self.headers: dict = None
         self.update_headers()
-        self.session: aiohttp.ClientResponse = None
+        self.session: aiohttp.ClientSession = None
+        self.gateway_session: aiohttp.ClientSession = None
+        self.connector_options: ConnectorOptions = connector_options or ConnectorOptions()
         self.discord_client = discord_client
+        self.ratelimiter: RateLimitBackend = ratelimiter or RateLimiter(global_rate_limit)
+        self.cache: Optional[ResponseCache] = cache
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.circuit_breaker: CircuitBreaker = circuit_breaker or CircuitBreaker()
+        self.retry_stats: collections.Counter = collections.Counter()
+        self.coalesced: int = 0
+        self._inflight: dict = {}
+        # In flight GETs whose resource was modified meanwhile, their responses aren't cached
+        self._stale: set = set()
+        self._timeout: aiohttp.ClientTimeout = None
 
     async def create_session(self):
         self.update_headers()
+        self._timeout = self.connector_options.create_timeout()
         self.session = aiohttp.ClientSession(
-            headers=self.headers, auto_decompress=True)
+            headers=self.headers, auto_decompress=True, connector=self.connector_options.create_connector(),
+            json_serialize=self.codec.dumps)
+        if self.connector_options.separate_gateway:
+            self.gateway_session = aiohttp.ClientSession(
+                headers=self.headers, connector=self.connector_options.create_gateway_connector(),
+                json_serialize=self.codec.dumps)
+        else:
+            self.gateway_session = self.session
 
     async def close_session(self):
+        if self.gateway_session is not self.session:
+            await self.gateway_session.close()
         await self.session.close()
+        await self.ratelimiter.close()
         logger.debug('Session closed!')
 
     def update_headers(self):
@@ -50,52 +144,176 @@ class HTTPHandler:
     def get_client(self):
         return self.discord_client
 
-    async def request_url(self, url, type='GET', data=None, params=None):
+    async def request(self, url, type='GET', data=None, params=None, cache=True,
+                      priority: RequestPriority = RequestPriority.NORMAL) -> Tuple[int, Any]:
+        """Sends a request to the api, waiting for the rate limits and retrying when we get a 429.
+
+        Identical GET requests sent while one is already in flight don't hit the network,
+        they wait for the first one and get the same result.
+
+        .. versionadded:: 0.4.0
+
+        Args:
+            cache (:obj:`bool`): Whether a response from the :class:`.ResponseCache` can be used.
+            priority (:class:`.RequestPriority`): Requests with a higher priority are sent first
+                when they wait on the same rate limit.
+
+        Returns:
+            :obj:`tuple`: The status and the decoded json body of the response (None if it had no json body).
+                The body may be shared with other callers, don't modify it.
+        """
+        if type != 'GET':
+            self.invalidate(url)
+            try:
+                return await self._send(url, type, data, params, priority)
+            finally:
+                # Again once discord applied it, a GET sent meanwhile may have read the old resource
+                self.invalidate(url)
 
+        key = (url, _params_key(params))
+        ttl = None
+        if self.cache is not None:
+            ttl = self.cache.get_ttl(Route(type, url))
+            if ttl is not None and cache:
+                response = self.cache.get(key)
+                if response is not None:
+                    return response
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._send(url, type, data, params, priority))
+            self._inflight[key] = future
+            future.add_done_callback(functools.partial(self._request_done, key, ttl))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one caller being cancelled doesn't cancel the request for everyone else.
+        return await asyncio.shield(future)
+
+    def _request_done(self, key, ttl, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        stale = future in self._stale
+        self._stale.discard(future)
+        if future.cancelled() or future.exception() is not None:
+            # Retrieving the exception marks it as retrieved in case every caller was cancelled.
+            return
+
+        response = future.result()
+        # Don't cache the response if the resource may have been modified while we were waiting for it.
+        if ttl is not None and 300 > response[0] >= 200 and not stale:
+            self.cache.set(key, ttl, response)
+
+    def invalidate(self, path: str):
+        """Drops the cached responses of the resource at ``path``, its sub resources and its parent collection.
+
+        The GETs of those resources already in flight aren't cached when they return, and the next identical GET
+        doesn't wait for them.
+
+        .. versionadded:: 0.4.0
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate(path)
+        for key, future in list(self._inflight.items()):
+            if self.cache.affects(path, key[0]):
+                self._stale.add(future)
+                del self._inflight[key]
+
+    async def _send(self, url, type, data, params, priority: RequestPriority) -> Tuple[int, Any]:
+        route = Route(type, url)
+        attempt = 0
+
+        while True:
+            attempt += 1
+            self.circuit_breaker.before_request(route)
+            try:
+                status, body = await self._send_once(route, data, params, priority)
+            except TRANSPORT_ERRORS as e:
+                self.circuit_breaker.failure(route)
+                if not self.retry_policy.should_retry(type, attempt, error=e):
+                    if attempt > self.retry_policy.max_retries:
+                        self.retry_stats['gave_up'] += 1
+                    raise
+                reason = e.__class__.__name__
+            except BaseException:
+                # Cancelled, or failed in a way that says nothing about the route (a body that isn't json, ...),
+                # a test request must not keep the circuit half open
+                self.circuit_breaker.cancelled(route)
+                raise
+            else:
+                if status < 500:
+                    self.circuit_breaker.success(route)
+                    return status, body
+                self.circuit_breaker.failure(route)
+                if not self.retry_policy.should_retry(type, attempt, status=status):
+                    if attempt > self.retry_policy.max_retries:
+                        self.retry_stats['gave_up'] += 1
+                    return status, body
+                reason = str(status)
+
+            delay = self.retry_policy.get_delay(attempt)
+            self.retry_stats['retries'] += 1
+            self.retry_stats[reason] += 1
+            logger.debug(f'{route} failed ({reason}), retrying in {delay:.2f} seconds')
+            await asyncio.sleep(delay)
+
+    async def _send_once(self, route: Route, data, params, priority: RequestPriority) -> Tuple[int, Any]:
         while True:
-            operation = None
-            if type == 'GET':
-                operation = self.session.get(DISCORD_API_URL + url, params=params)
-            elif type == 'POST':
-                operation = self.session.post(DISCORD_API_URL + url, json=data)
-            elif type == 'DELETE':
-                operation = self.session.delete(DISCORD_API_URL + url)
-            elif type == 'PATCH':
-                operation = self.session.patch(DISCORD_API_URL + url, json=data)
-
-            async with operation as res:
-                if res.status == 429:
-                    limit = await RateLimit.from_api_res(res)
-
-                    if 'X-RateLimit-Remaining' in res.headers and int(res.headers['X-RateLimit-Remaining']) > 0:
-                        logger.debug(
-                            f"Status is {res.status} but i have {res.headers['X-RateLimit-Remaining']} ratelimits remaining, ")
+            bucket = await self.ratelimiter.acquire(route, priority)
+            try:
+                async with self.session.request(route.method, self.api_url + route.path, params=params, json=data,
+                                                timeout=self._timeout) as res:
+                    ratelimit = parse_ratelimit_headers(res.headers)
+
+                    if res.status == 429:
+                        try:
+                            body = await res.json(loads=self.codec.loads)
+                        except (aiohttp.client_exceptions.ContentTypeError, ValueError):
+                            body = None
+                        if isinstance(body, dict) and body.get('retry_after') is not None:
+                            limit = RateLimit.from_dict(body)
+                            # 'global' is a keyword, the field is _global
+                            limit._global = bool(body.get('global', False))
+                        else:
+                            limit = RateLimit(retry_after=float(res.headers.get('Retry-After', 1)))
+                        logger.debug(f"Status is {res.status} so we must wait {limit.retry_after} seconds!")
+                        self.ratelimiter.limited(route, bucket, limit.retry_after,
+                                                 ratelimit['global'] or limit._global)
                         continue
 
-                    logger.debug(
-                        f"Status is {res.status} so we must wait {limit.retry_after / 1000} seconds!")
-                    await asyncio.sleep(limit.retry_after / 1000)
-                    logger.debug("Done waiting! Requesting again")
-                elif 300 > res.status >= 200:
+                    self.ratelimiter.update(route, bucket, ratelimit)
+
                     try:
-                        return await res.json()
+                        return res.status, await res.json(loads=self.codec.loads)
                     except aiohttp.client_exceptions.ContentTypeError:
-                        return
-                elif res.status == 400:
-                    raise BadRequestError(f'The request was improperly formatted, or the server couldn\'t understand it: {data}')
-                elif res.status == 401:
-                    raise AuthorizationError('The Authorization header was missing or invalid')
-                elif res.status == 403:
-                    raise AuthorizationError('The Authorization token you passed did not have permission to the resource')
-                elif res.status == 404:
-                    raise NotFoundError('The resource at the location specified doesn\'t exist')
-                elif res.status == 502:
-                    raise GatewayUnavailable('There was not a gateway available to process your request. Wait a bit and retry')
-                else:
-                    raise UnhandledEndpointStatusError
+                        return res.status, None
+            finally:
+                # No-op if the bucket was already updated with the response.
+                self.ratelimiter.release(route, bucket)
+
+    async def request_url(self, url, type='GET', data=None, params=None, cache=True,
+                          priority: RequestPriority = RequestPriority.NORMAL):
+        status, body = await self.request(url, type, data, params, cache, priority)
+
+        if 300 > status >= 200:
+            return body
+        elif status == 400:
+            raise BadRequestError(f'The request was improperly formatted, or the server couldn\'t understand it: {data}')
+        elif status == 401:
+            raise AuthorizationError('The Authorization header was missing or invalid')
+        elif status == 403:
+            raise AuthorizationError('The Authorization token you passed did not have permission to the resource')
+        elif status == 404:
+            raise NotFoundError('The resource at the location specified doesn\'t exist')
+        elif status == 502:
+            raise GatewayUnavailable('There was not a gateway available to process your request. Wait a bit and retry')
+        else:
+            raise UnhandledEndpointStatusError
 
 
 __all__ = [
+    'ConnectorOptions',
     'HTTPHandler',
     'RateLimit'
 ]
@@ -1,5 +1,6 @@
 import discordaio
 from .base import DiscordObject
+from .timestamps import parse_timestamp
 
 
 class Invite(DiscordObject):
@@ -7,6 +8,15 @@ class Invite(DiscordObject):
 
     .. versionadded:: 0.2.0
     """
+    __slots__ = (
+        'code', 'guild', 'channel', 'inviter', 'uses', 'max_uses', 'max_age', 'temporary', 'created_at', 'revoked',
+    )
+    _fields = {
+        'created_at': parse_timestamp,
+        'guild': 'Guild',
+        'channel': 'Channel',
+        'inviter': 'User',
+    }
 
     def __init__(self, code="", guild: 'discordaio.Guild' = None, channel: 'discordaio.Channel' = None,
                  inviter: 'discordaio.User' = None, uses=0, max_uses=0, max_age=0, temporary=False,
@@ -22,16 +32,6 @@ class Invite(DiscordObject):
         self.created_at = created_at
         self.revoked = revoked
 
-    async def _from_api_ext(self, key, value):
-        if key == 'guild':
-            setattr(self, key, await discordaio.Guild.from_api_res(value))
-        elif key == 'channel':
-            setattr(self, key, await discordaio.Channel.from_api_res(value))
-        elif key == 'inviter':
-            setattr(self, key, await discordaio.User.from_api_res(value))
-        else:
-            return await super()._from_api_ext(key, value)
-
 
 __all__ = [
     'Invite'
@@ -0,0 +1,258 @@
+"""Columnar storage of guild members, for the guilds too large to keep as objects."""
+
+import bisect
+import datetime
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+import discordaio
+from .guild import GuildMember
+from .timestamps import parse_timestamp
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+# joined_at of the members without one
+_NO_DATE = -(1 << 63)
+
+# Bits of the flags column
+_DEAF = 1
+_MUTE = 2
+_BOT = 4
+
+
+class MemberStore:
+    """The members of a guild kept in columns: typed arrays for the ids, role ids and flags, and a table of the
+    distinct strings for the names.
+
+    :meth:`extend` decodes a list of api member objects straight into the columns, no object is created per member.
+    A :class:`.GuildMember` is built only when a row is read, see :meth:`get`. The rows are appended in the order
+    they are received, a member received again is updated in its row, and :meth:`remove` drops the members that
+    left.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `store = await bot.get_member_store(guild_id)`
+
+        `moderators = [store[row] for row in store.rows_with_role(moderator_role_id)]`
+
+    Attributes:
+        bot (:class:`.DiscordBot`): The client given to the rows.
+        ids (:obj:`array.array`): The user id of every row, ``'Q'`` typed.
+        role_ids (:obj:`array.array`): The role ids of every row one after another, ``'Q'`` typed.
+        role_offsets (:obj:`array.array`): Where the role ids of every row start in ``role_ids``, with one more
+            item for the end of the last row.
+        joined_at (:obj:`array.array`): When the members joined, in microseconds since the unix epoch.
+        flags (:obj:`array.array`): The deaf, mute and bot bits of every row.
+        public_flags (:obj:`array.array`): The public flags of the users.
+        strings (:obj:`list` of :obj:`str`): The distinct strings of the name columns, None first.
+    """
+
+    def __init__(self, bot: 'discordaio.DiscordBot' = None):
+        self.bot = bot
+        self.ids: array = array('Q')
+        self.role_ids: array = array('Q')
+        self.role_offsets: array = array('Q', [0])
+        self.joined_at: array = array('q')
+        self.flags: array = array('B')
+        self.public_flags: array = array('Q')
+        self.strings: List[Optional[str]] = [None]
+        self._string_index: dict = {None: 0}
+        # user id -> row
+        self._rows: Dict[int, int] = {}
+        # Indices into strings
+        self._usernames: array = array('I')
+        self._discriminators: array = array('I')
+        self._avatars: array = array('I')
+        self._nicks: array = array('I')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> GuildMember:
+        return self.get(row)
+
+    def __iter__(self) -> Iterator[GuildMember]:
+        for row in range(len(self.ids)):
+            yield self.get(row)
+
+    def __repr__(self):
+        return f'<MemberStore {len(self.ids)} members, {len(self.strings)} strings>'
+
+    def _intern(self, value: Optional[str]) -> int:
+        index = self._string_index.get(value)
+        if index is None:
+            index = self._string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def extend(self, members: list) -> range:
+        """Adds the api member objects of a list, like the one of GUILD_MEMBERS_CHUNK.
+
+        The members already in the store are overwritten in their row.
+
+        .. versionadded:: 0.4.0
+
+        Returns:
+            :obj:`range`: The rows added.
+        """
+        start = len(self.ids)
+        intern = self._intern
+        rows = self._rows
+        ids, role_ids, role_offsets = self.ids, self.role_ids, self.role_offsets
+        usernames, discriminators, avatars, nicks = self._usernames, self._discriminators, self._avatars, self._nicks
+        joined_at, flags, public_flags = self.joined_at, self.flags, self.public_flags
+
+        for member in members:
+            user = member['user']
+            get = user.get
+            user_id = int(user['id'])
+            roles = member.get('roles')
+            joined = member.get('joined_at')
+            joined = (parse_timestamp(joined) - _EPOCH) // _MICROSECOND if joined else _NO_DATE
+            flag = ((_DEAF if member.get('deaf') else 0) | (_MUTE if member.get('mute') else 0)
+                    | (_BOT if get('bot') else 0))
+
+            row = rows.get(user_id)
+            if row is not None:
+                usernames[row] = intern(get('username'))
+                discriminators[row] = intern(get('discriminator'))
+                avatars[row] = intern(get('avatar'))
+                public_flags[row] = get('public_flags') or 0
+                nicks[row] = intern(member.get('nick'))
+                joined_at[row] = joined
+                flags[row] = flag
+                self._set_roles(row, array('Q', map(int, roles or ())))
+                continue
+
+            rows[user_id] = len(ids)
+            ids.append(user_id)
+            usernames.append(intern(get('username')))
+            discriminators.append(intern(get('discriminator')))
+            avatars.append(intern(get('avatar')))
+            public_flags.append(get('public_flags') or 0)
+            nicks.append(intern(member.get('nick')))
+            if roles:
+                role_ids.extend(map(int, roles))
+            role_offsets.append(len(role_ids))
+            joined_at.append(joined)
+            flags.append(flag)
+
+        return range(start, len(ids))
+
+    def _set_roles(self, row: int, roles: array):
+        start, end = self.role_offsets[row], self.role_offsets[row + 1]
+        if self.role_ids[start:end] == roles:
+            return
+        self.role_ids[start:end] = roles
+        shift = len(roles) - (end - start)
+        if shift:
+            role_offsets = self.role_offsets
+            for i in range(row + 1, len(role_offsets)):
+                role_offsets[i] += shift
+
+    def remove(self, user_id: int) -> bool:
+        """Removes the row of a member, the rows after it move up by one.
+
+        .. versionadded:: 0.4.0
+
+        Returns:
+            :obj:`bool`: False if the member isn't in the store.
+        """
+        row = self._rows.pop(int(user_id), None)
+        if row is None:
+            return False
+        self._set_roles(row, array('Q'))
+        del self.role_offsets[row + 1]
+        for column in (self.ids, self.joined_at, self.flags, self.public_flags, self._usernames,
+                       self._discriminators, self._avatars, self._nicks):
+            del column[row]
+        rows = self._rows
+        for moved in range(row, len(self.ids)):
+            rows[self.ids[moved]] = moved
+        return True
+
+    def clear(self) -> None:
+        """Removes every row."""
+        self.__init__(self.bot)
+
+    def find(self, user_id: int) -> Optional[int]:
+        """Returns the row of the user, None if there isn't any.
+
+        .. versionadded:: 0.4.0
+        """
+        return self._rows.get(int(user_id))
+
+    def roles_of(self, row: int) -> array:
+        """Returns the role ids of a row.
+
+        .. versionadded:: 0.4.0
+        """
+        return self.role_ids[self.role_offsets[row]:self.role_offsets[row + 1]]
+
+    def rows_with_role(self, role_id: int) -> List[int]:
+        """Returns the rows of the members with the role, scanning the role id column.
+
+        .. versionadded:: 0.4.0
+        """
+        role_id = int(role_id)
+        role_ids, role_offsets = self.role_ids, self.role_offsets
+        rows = []
+        position = -1
+        while True:
+            try:
+                position = role_ids.index(role_id, position + 1)
+            except ValueError:
+                return rows
+            rows.append(bisect.bisect_right(role_offsets, position) - 1)
+
+    def nick(self, row: int) -> Optional[str]:
+        """Returns the guild nickname of a row, without building the member.
+
+        .. versionadded:: 0.4.0
+        """
+        return self.strings[self._nicks[row]]
+
+    def username(self, row: int) -> Optional[str]:
+        """Returns the username of a row, without building the member.
+
+        .. versionadded:: 0.4.0
+        """
+        return self.strings[self._usernames[row]]
+
+    def get(self, row: int) -> GuildMember:
+        """Builds the :class:`.GuildMember` of a row, its user goes through the identity map of the bot.
+
+        .. versionadded:: 0.4.0
+        """
+        strings = self.strings
+        flags = self.flags[row]
+        user = {
+            'id': self.ids[row],
+            'username': strings[self._usernames[row]],
+            'discriminator': strings[self._discriminators[row]],
+            'avatar': strings[self._avatars[row]],
+            'public_flags': self.public_flags[row],
+        }
+        if flags & _BOT:
+            user['bot'] = True
+        member = GuildMember.from_dict({
+            'user': user,
+            'nick': strings[self._nicks[row]],
+            'roles': self.roles_of(row),
+            'deaf': bool(flags & _DEAF),
+            'mute': bool(flags & _MUTE),
+        }, self.bot)
+        joined = self.joined_at[row]
+        if joined != _NO_DATE:
+            member.joined_at = _EPOCH + datetime.timedelta(microseconds=joined)
+        return member
+
+
+__all__ = [
+    'MemberStore',
+]
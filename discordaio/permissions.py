@@ -1,6 +1,220 @@
-"""
-TODO: do this, remember to do:
-channel edit permissions endpoint
-https://discordapp.com/developers/docs/topics/permissions#permissions
+"""Permission bits and the computation of the effective permissions of a member.
 
+https://discordapp.com/developers/docs/topics/permissions#permissions
 """
+
+import enum
+from typing import Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Permissions(enum.IntFlag):
+    """The permission bits of roles and permission overwrites.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `Permissions.SEND_MESSAGES in guild.permissions_for(member, channel)`
+    """
+    NONE = 0
+    CREATE_INSTANT_INVITE = 1 << 0
+    KICK_MEMBERS = 1 << 1
+    BAN_MEMBERS = 1 << 2
+    ADMINISTRATOR = 1 << 3
+    MANAGE_CHANNELS = 1 << 4
+    MANAGE_GUILD = 1 << 5
+    ADD_REACTIONS = 1 << 6
+    VIEW_AUDIT_LOG = 1 << 7
+    PRIORITY_SPEAKER = 1 << 8
+    STREAM = 1 << 9
+    VIEW_CHANNEL = 1 << 10
+    SEND_MESSAGES = 1 << 11
+    SEND_TTS_MESSAGES = 1 << 12
+    MANAGE_MESSAGES = 1 << 13
+    EMBED_LINKS = 1 << 14
+    ATTACH_FILES = 1 << 15
+    READ_MESSAGE_HISTORY = 1 << 16
+    MENTION_EVERYONE = 1 << 17
+    USE_EXTERNAL_EMOJIS = 1 << 18
+    VIEW_GUILD_INSIGHTS = 1 << 19
+    CONNECT = 1 << 20
+    SPEAK = 1 << 21
+    MUTE_MEMBERS = 1 << 22
+    DEAFEN_MEMBERS = 1 << 23
+    MOVE_MEMBERS = 1 << 24
+    USE_VAD = 1 << 25
+    CHANGE_NICKNAME = 1 << 26
+    MANAGE_NICKNAMES = 1 << 27
+    MANAGE_ROLES = 1 << 28
+    MANAGE_WEBHOOKS = 1 << 29
+    MANAGE_EMOJIS = 1 << 30
+    USE_APPLICATION_COMMANDS = 1 << 31
+    REQUEST_TO_SPEAK = 1 << 32
+    MANAGE_EVENTS = 1 << 33
+    MANAGE_THREADS = 1 << 34
+    CREATE_PUBLIC_THREADS = 1 << 35
+    CREATE_PRIVATE_THREADS = 1 << 36
+    USE_EXTERNAL_STICKERS = 1 << 37
+    SEND_MESSAGES_IN_THREADS = 1 << 38
+    USE_EMBEDDED_ACTIVITIES = 1 << 39
+    MODERATE_MEMBERS = 1 << 40
+    ALL = (1 << 41) - 1
+
+
+# Only usable with SEND_MESSAGES, discord drops them from the channel permissions without it
+_SEND_DEPENDENT = (Permissions.SEND_TTS_MESSAGES | Permissions.MENTION_EVERYONE | Permissions.EMBED_LINKS
+                   | Permissions.ATTACH_FILES)
+
+
+def _overwrite_targets_member(overwrite) -> bool:
+    # 'role' and 'member' in the old api versions, 0 and 1 since v8
+    return overwrite.type in (1, 'member', '1')
+
+
+def compute_base_permissions(guild, member) -> Permissions:
+    """Returns the guild wide permissions of a member: the @everyone role and the roles of the member.
+
+    .. versionadded:: 0.4.0
+
+    Args:
+        guild (:class:`.Guild`): The guild, with its roles.
+        member (:class:`.GuildMember`): The member.
+    """
+    user_id = member.user.id
+    if guild.owner_id is not None and guild.owner_id == user_id:
+        return Permissions.ALL
+
+    roles = {role.id: role for role in guild.roles or ()}
+    everyone = roles.get(guild.id)
+    permissions = int(everyone.permissions) if everyone is not None else 0
+    for role_id in member.roles or ():
+        role = roles.get(role_id)
+        if role is not None:
+            permissions |= int(role.permissions)
+
+    if permissions & Permissions.ADMINISTRATOR:
+        return Permissions.ALL
+    return Permissions(permissions)
+
+
+def compute_permissions(guild, member, channel=None) -> Permissions:
+    """Returns the effective permissions of a member, in a channel if it's given.
+
+    The permission overwrites of the channel are applied in discord's order: @everyone, then the roles of the member,
+    then the member. Without VIEW_CHANNEL the member has no permission in the channel, and without SEND_MESSAGES
+    the permissions that depend on it are dropped too.
+
+    .. versionadded:: 0.4.0
+
+    Args:
+        guild (:class:`.Guild`): The guild, with its roles.
+        member (:class:`.GuildMember`): The member.
+        channel (:class:`.Channel`, optional): A channel of the guild.
+    """
+    permissions = compute_base_permissions(guild, member)
+    if channel is None or permissions & Permissions.ADMINISTRATOR:
+        return permissions
+
+    permissions = int(permissions)
+    user_id = member.user.id
+    member_roles = set(member.roles or ())
+    role_allow = role_deny = 0
+    member_overwrite = None
+    for overwrite in channel.permission_overwrites or ():
+        if _overwrite_targets_member(overwrite):
+            if overwrite.id == user_id:
+                member_overwrite = overwrite
+        elif overwrite.id == guild.id:
+            permissions = (permissions & ~int(overwrite.deny)) | int(overwrite.allow)
+        elif overwrite.id in member_roles:
+            role_allow |= int(overwrite.allow)
+            role_deny |= int(overwrite.deny)
+    permissions = (permissions & ~role_deny) | role_allow
+    if member_overwrite is not None:
+        permissions = (permissions & ~int(member_overwrite.deny)) | int(member_overwrite.allow)
+
+    if not permissions & Permissions.VIEW_CHANNEL:
+        return Permissions.NONE
+    if not permissions & Permissions.SEND_MESSAGES:
+        permissions &= ~_SEND_DEPENDENT
+    return Permissions(permissions)
+
+
+class PermissionCache:
+    """Memoizes the effective permissions by guild, member and channel.
+
+    The gateway events that change the permissions (role, member, channel and guild updates) drop the entries they
+    affect, see :meth:`invalidate`. The permissions are computed from the objects given to :meth:`get`, they must be
+    up to date.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        hits (:obj:`int`): The number of lookups answered from the cache
+        misses (:obj:`int`): The number of lookups that had to compute the permissions
+    """
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        # guild id -> member id -> channel id (None for the guild wide permissions) -> permissions
+        self._guilds: dict = {}
+
+    def __len__(self):
+        return sum(len(channels) for members in self._guilds.values() for channels in members.values())
+
+    def get(self, guild, member, channel=None) -> Permissions:
+        """Returns the effective permissions of the member, computing them if they aren't cached.
+
+        .. versionadded:: 0.4.0
+
+        Args:
+            guild (:class:`.Guild`): The guild, with its roles.
+            member (:class:`.GuildMember`): The member.
+            channel (:class:`.Channel`, optional): A channel of the guild.
+        """
+        channel_id = channel.id if channel is not None else None
+        try:
+            permissions = self._guilds[guild.id][member.user.id][channel_id]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return permissions
+
+        self.misses += 1
+        permissions = compute_permissions(guild, member, channel)
+        self._guilds.setdefault(guild.id, {}).setdefault(member.user.id, {})[channel_id] = permissions
+        return permissions
+
+    def invalidate(self, guild_id: int, member_id: Optional[int] = None, channel_id: Optional[int] = None) -> None:
+        """Drops the cached permissions of the guild, or only the ones of a member or a channel.
+
+        .. versionadded:: 0.4.0
+        """
+        if member_id is None and channel_id is None:
+            self._guilds.pop(guild_id, None)
+            return
+        members = self._guilds.get(guild_id)
+        if not members:
+            return
+        if member_id is not None:
+            members.pop(member_id, None)
+        if channel_id is not None:
+            for channels in members.values():
+                channels.pop(channel_id, None)
+
+    def clear(self) -> None:
+        """Drops every cached permission."""
+        self._guilds.clear()
+
+
+__all__ = [
+    'Permissions',
+    'PermissionCache',
+    'compute_base_permissions',
+    'compute_permissions',
+]
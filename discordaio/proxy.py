@@ -0,0 +1,139 @@
+"""Local REST proxy, lets many bot processes share a single :class:`.HTTPHandler`.
+
+The proxy owns the connection pool, the rate limits and the retries, the workers send it
+the same requests they would send to discord, without authentication.
+
+Example:
+    Run the proxy in one process::
+
+        RESTProxy(token, port=8900).run()
+
+    And point the bots to it::
+
+        bot = DiscordBot(token, proxy_url='http://127.0.0.1:8900/api/v8')
+"""
+
+import asyncio
+import os
+
+import aiohttp
+from aiohttp import web
+
+from .constants import DISCORD_API_URL
+from .exceptions import CircuitOpenError
+from .http import HTTPHandler
+from .ratelimit import NullRateLimiter
+from .retry import RetryPolicy
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RESTProxy:
+    """Serves the discord REST api over http to other processes through a single :class:`.HTTPHandler`.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        http (:class:`.HTTPHandler`): The handler used to talk to discord
+        host (:obj:`str`): The address to listen on
+        port (:obj:`int`): The port to listen on
+    """
+
+    def __init__(self, token: str, host: str = '127.0.0.1', port: int = 8900, api_url: str = DISCORD_API_URL,
+                 **http_options):
+        """RESTProxy constructor.
+
+        Args:
+            token (:obj:`str`): The discord token used for authentication.
+            host (:obj:`str`): The address to listen on, keep it local, the proxy doesn't authenticate the workers.
+            port (:obj:`int`): The port to listen on.
+            api_url (:obj:`str`): The url of the discord api.
+            **http_options: Passed to the :class:`.HTTPHandler`.
+        """
+        self.http: HTTPHandler = HTTPHandler(token, None, api_url=api_url, **http_options)
+        self.host: str = host
+        self.port: int = port
+        self.app: web.Application = web.Application()
+        self.app.router.add_route('*', '/api/{version}/{path:.*}', self._handle)
+        self._runner: web.AppRunner = None
+
+    @property
+    def url(self) -> str:
+        """The api url the workers must use."""
+        return f'http://{self.host}:{self.port}/api/v8'
+
+    async def start(self):
+        """Starts serving the requests."""
+        await self.http.create_session()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f'REST proxy listening on {self.url}')
+
+    async def close(self):
+        """Stops the proxy."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            await self.http.close_session()
+
+    def run(self):
+        """Runs the proxy until interrupted."""
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            loop.run_until_complete(self.close())
+            loop.close()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        data = None
+        if request.body_exists:
+            data = await request.json(loads=self.http.codec.loads)
+
+        try:
+            status, body = await self.http.request('/' + request.match_info['path'], type=request.method,
+                                                   data=data, params=list(request.query.items()) or None)
+        except CircuitOpenError as e:
+            return web.json_response({'message': e.message}, status=503,
+                                     headers={'Retry-After': str(max(1, int(e.retry_after)))})
+        except asyncio.TimeoutError:
+            return web.json_response({'message': 'Timed out waiting for discord'}, status=504)
+        except aiohttp.ClientError as e:
+            logger.error(e, exc_info=1)
+            return web.json_response({'message': str(e)}, status=502)
+
+        if body is None:
+            return web.Response(status=status)
+        return web.json_response(body, status=status, dumps=self.http.codec.dumps)
+
+
+class ProxyHTTPHandler(HTTPHandler):
+    """A :class:`.HTTPHandler` that sends its requests through a :class:`RESTProxy`.
+
+    The rate limits and the retries of the failed requests are handled by the proxy,
+    so this handler never holds a request and only retries when it can't reach the proxy.
+
+    .. versionadded:: 0.4.0
+    """
+
+    def __init__(self, token, discord_client, proxy_url: str, **http_options):
+        http_options.setdefault('retry_policy', RetryPolicy(statuses=()))
+        super().__init__(token, discord_client, ratelimiter=NullRateLimiter(), api_url=proxy_url, **http_options)
+
+
+__all__ = [
+    'RESTProxy',
+    'ProxyHTTPHandler',
+]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level='INFO')
+    RESTProxy(os.environ['DISCORD_TOKEN'], host=os.environ.get('PROXY_HOST', '127.0.0.1'),
+              port=int(os.environ.get('PROXY_PORT', 8900))).run()
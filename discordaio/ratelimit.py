@@ -0,0 +1,768 @@
+"""Client side handling of the discord REST rate limits.
+
+See https://discord.com/developers/docs/topics/rate-limits
+"""
+
+import asyncio
+import collections
+import heapq
+import itertools
+import json
+import os
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on windows, the shared rate limiter can't be used there.
+    fcntl = None
+
+from .enums import RequestPriority
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Discord allows 50 requests per second across all the routes to every bot.
+GLOBAL_RATE_LIMIT = 50
+
+# Path segments whose following id is a major parameter, the rate limits of these routes are
+# tracked independently for every channel, guild or webhook.
+MAJOR_PARAMETERS = ('channels', 'guilds', 'webhooks')
+
+
+class Route:
+    """Identifies the rate limit route of a request.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        method (:obj:`str`): The http method
+        path (:obj:`str`): The requested path, relative to the api url
+        major (:obj:`str`): The major parameter of the route (e.g. ``channels/1234``), empty if it has none
+        template (:obj:`str`): The path with the minor parameters replaced by placeholders
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.major, self.template = self._parse(path)
+
+    @property
+    def key(self) -> str:
+        """The key used to look up the bucket hash of this route."""
+        return f'{self.method} {self.template}'
+
+    @staticmethod
+    def _parse(path: str):
+        segments = path.split('?', 1)[0].strip('/').split('/')
+        major = ''
+        template = []
+
+        for i, segment in enumerate(segments):
+            if i == 1 and segments[0] in MAJOR_PARAMETERS:
+                template.append('{major}')
+                major = f'{segments[0]}/{segment}'
+            elif i == 2 and segments[0] == 'webhooks':
+                # The webhook token is part of the major parameter.
+                template.append('{token}')
+                major += f'/{segment}'
+            elif i > 0 and segments[i - 1] == 'reactions':
+                template.append('{emoji}')
+            elif segment.isdigit():
+                template.append('{id}')
+            else:
+                template.append(segment)
+
+        return major, '/' + '/'.join(template)
+
+    def __repr__(self):
+        return f'<Route {self.method} {self.path}>'
+
+
+def parse_ratelimit_headers(headers) -> dict:
+    """Extracts the rate limit information from the headers of a discord response.
+
+    .. versionadded:: 0.4.0
+
+    Returns:
+        :obj:`dict`: With the keys ``bucket``, ``limit``, ``remaining``, ``reset_after`` and ``global``,
+        missing values are set to None.
+    """
+    info = {
+        'bucket': headers.get('X-RateLimit-Bucket'),
+        'limit': None,
+        'remaining': None,
+        'reset_after': None,
+        'global': headers.get('X-RateLimit-Global', '').lower() == 'true' or
+                  headers.get('X-RateLimit-Scope') == 'global',
+    }
+
+    if 'X-RateLimit-Limit' in headers:
+        info['limit'] = int(headers['X-RateLimit-Limit'])
+    if 'X-RateLimit-Remaining' in headers:
+        info['remaining'] = int(headers['X-RateLimit-Remaining'])
+    if 'X-RateLimit-Reset-After' in headers:
+        info['reset_after'] = float(headers['X-RateLimit-Reset-After'])
+    elif 'X-RateLimit-Reset' in headers:
+        info['reset_after'] = max(0.0, float(headers['X-RateLimit-Reset']) - time.time())
+
+    return info
+
+
+class _WaitQueue:
+    """Requests waiting on a rate limit, ordered by priority and then by arrival."""
+
+    def __init__(self, depths: collections.Counter):
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._depths: collections.Counter = depths
+        self._len: int = 0
+
+    def __len__(self):
+        return self._len
+
+    def push(self, priority: RequestPriority, waiter: asyncio.Future):
+        heapq.heappush(self._heap, (priority.value, next(self._counter), priority, waiter))
+        self._len += 1
+        self._depths[priority] += 1
+
+    def peek(self) -> Optional[asyncio.Future]:
+        # Waiters that are done at this point were cancelled and already discarded.
+        while self._heap and self._heap[0][3].done():
+            heapq.heappop(self._heap)
+        return self._heap[0][3] if self._heap else None
+
+    def pop(self) -> asyncio.Future:
+        _, _, priority, waiter = heapq.heappop(self._heap)
+        self._len -= 1
+        self._depths[priority] -= 1
+        return waiter
+
+    def discard(self, priority: RequestPriority):
+        """Called when a waiter is cancelled, it's removed from the heap lazily."""
+        self._len -= 1
+        self._depths[priority] -= 1
+
+    async def wait(self, priority: RequestPriority, wakeup, give_back):
+        """Waits in the queue, ``give_back`` is called if we are cancelled right after being granted."""
+        waiter = asyncio.get_event_loop().create_future()
+        self.push(priority, waiter)
+        wakeup()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self.discard(priority)
+            else:
+                give_back()
+            raise
+
+    def grant(self, try_take) -> bool:
+        """Resolves the waiters in order while ``try_take`` allows it, returns True if some are still waiting."""
+        while True:
+            waiter = self.peek()
+            if waiter is None:
+                return False
+            if not try_take():
+                return True
+            self.pop().set_result(None)
+
+
+class RateLimitBucket:
+    """Tracks the state of a discord rate limit bucket and holds the requests that would exceed it.
+
+    Waiting requests are granted by priority and then in the order they arrived. While the limits of the bucket
+    are unknown only one request is let through, the rest wait until its response tells us the limits.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        limit (:obj:`int`): The number of requests that can be made in a window, None if unknown
+        remaining (:obj:`int`): The number of requests left in the current window, None if unknown
+        reset_at (:obj:`float`): When the current window resets, in :func:`time.monotonic` time
+        unlimited (:obj:`bool`): True if discord doesn't send rate limit information for this bucket
+    """
+
+    def __init__(self, depths: collections.Counter = None):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.unlimited: bool = False
+        self._probing: bool = False
+        self._waiters: _WaitQueue = _WaitQueue(collections.Counter() if depths is None else depths)
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def idle(self) -> bool:
+        """True if nobody is waiting on the bucket and its window has expired."""
+        return not self._waiters and not self._probing and \
+            (self.reset_at is None or self.reset_at <= time.monotonic())
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting on this bucket."""
+        return len(self._waiters)
+
+    def _try_take(self) -> bool:
+        if self.unlimited:
+            return True
+
+        if self.reset_at is not None and self.reset_at <= time.monotonic():
+            self.remaining = self.limit
+            self.reset_at = None
+
+        if self.remaining is None:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+        if self.remaining > 0:
+            self.remaining -= 1
+            return True
+        return False
+
+    def _wakeup(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._waiters.grant(self._try_take) and self.reset_at is not None:
+            loop = asyncio.get_event_loop()
+            delay = max(0.0, self.reset_at - time.monotonic())
+            self._timer = loop.call_later(delay, self._wakeup)
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.NORMAL):
+        """Waits until a request can be sent without exceeding the bucket."""
+        if not self._waiters and self._try_take():
+            return
+
+        await self._waiters.wait(priority, self._wakeup, self._give_back)
+
+    def _give_back(self):
+        if self._probing:
+            self._probing = False
+        elif self.remaining is not None:
+            self.remaining += 1
+        self._wakeup()
+
+    def update(self, limit: int = None, remaining: int = None, reset_after: float = None):
+        """Updates the bucket with the rate limit information of a response."""
+        self._probing = False
+
+        if limit is None or remaining is None or reset_after is None:
+            if self.limit is None:
+                self.unlimited = True
+            self._wakeup()
+            return
+
+        reset_at = time.monotonic() + reset_after
+        self.unlimited = False
+        if self.remaining is None or (self.reset_at is not None and reset_at > self.reset_at + 0.1):
+            # The response belongs to a newer window than the one we know about.
+            self.remaining = remaining
+        else:
+            # Responses can arrive out of order, the lowest value is the most recent one.
+            self.remaining = min(self.remaining, remaining)
+        self.limit = limit
+        self.reset_at = reset_at
+        self._wakeup()
+
+    def block(self, retry_after: float):
+        """Holds every request on this bucket for the given amount of seconds."""
+        self._probing = False
+        self.unlimited = False
+        self.remaining = 0
+        self.reset_at = time.monotonic() + retry_after
+        if self.limit is None:
+            self.limit = 1
+        self._wakeup()
+
+    def release(self):
+        """Called when a granted request ended without a response (e.g. connection error)."""
+        self._probing = False
+        if self.reset_at is None and self.remaining == 0:
+            # No response of this window tells when it resets, the next request probes the limits again
+            self.remaining = None
+        self._wakeup()
+
+
+class GlobalRateLimit:
+    """Paces every request of the bot under the global rate limit.
+
+    Requests are let through at most ``rate`` per ``per`` seconds, by priority and then in the order they arrived.
+    When a global 429 is received every request is held until the limit resets, after that the held requests
+    are released at the same pace instead of all at once.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        rate (:obj:`int`): The number of requests allowed every ``per`` seconds
+        per (:obj:`float`): The length of the window in seconds
+        blocked_until (:obj:`float`): Until when the requests are held, in :func:`time.monotonic` time
+    """
+
+    def __init__(self, rate: int = GLOBAL_RATE_LIMIT, per: float = 1.0, depths: collections.Counter = None):
+        self.rate: int = rate
+        self.per: float = per
+        self.blocked_until: float = 0.0
+        self._tokens: float = rate
+        self._updated: float = time.monotonic()
+        self._waiters: _WaitQueue = _WaitQueue(collections.Counter() if depths is None else depths)
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def blocked(self) -> bool:
+        """True while a global rate limit is in effect."""
+        return self.blocked_until > time.monotonic()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting on the global rate limit."""
+        return len(self._waiters)
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+            self._updated = now
+
+    def _try_take(self) -> bool:
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _wakeup(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._waiters.grant(self._try_take):
+            now = time.monotonic()
+            if now < self.blocked_until:
+                delay = self.blocked_until - now
+            else:
+                delay = (1 - self._tokens) * self.per / self.rate
+            self._timer = asyncio.get_event_loop().call_later(max(0.0, delay), self._wakeup)
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.NORMAL):
+        """Waits until a request can be sent without exceeding the global rate limit."""
+        if not self._waiters and self._try_take():
+            return
+
+        await self._waiters.wait(priority, self._wakeup, self._give_back)
+
+    def _give_back(self):
+        self._tokens += 1
+        self._wakeup()
+
+    def block(self, retry_after: float):
+        """Holds every request for the given amount of seconds."""
+        blocked_until = time.monotonic() + retry_after
+        if blocked_until > self.blocked_until:
+            if not self.blocked:
+                logger.warning(f'Hit the global rate limit, holding all the requests for {retry_after} seconds')
+            self.blocked_until = blocked_until
+            # Start from an empty window so the held requests are released gradually.
+            self._tokens = 0
+            self._updated = blocked_until
+        self._wakeup()
+
+
+class RateLimitBackend:
+    """Base class of the rate limit backends used by :class:`.HTTPHandler`.
+
+    :meth:`acquire` is awaited before sending every request and returns a handle,
+    the handle is then passed back with the outcome of the request.
+
+    .. versionadded:: 0.4.0
+    """
+
+    async def acquire(self, route: Route, priority: RequestPriority = RequestPriority.NORMAL):
+        """Waits until a request to the route can be sent and returns its handle.
+
+        Requests with a higher priority are sent first when they wait on the same limit.
+        """
+        raise NotImplementedError()
+
+    def update(self, route: Route, handle, info: dict):
+        """Called with the result of :func:`parse_ratelimit_headers` for every response that isn't a 429."""
+        raise NotImplementedError()
+
+    def limited(self, route: Route, handle, retry_after: float, is_global: bool = False):
+        """Called when a request to the route was answered with a 429 status."""
+        raise NotImplementedError()
+
+    def release(self, route: Route, handle):
+        """Called after every request, it must be a no-op if the handle was already updated."""
+        raise NotImplementedError()
+
+    async def close(self):
+        """Frees the resources used by the backend."""
+        pass
+
+
+class NullRateLimiter(RateLimitBackend):
+    """Rate limit backend that never holds a request.
+
+    Used when somebody else enforces the rate limits, e.g. when talking to a :class:`.RESTProxy`.
+
+    .. versionadded:: 0.4.0
+    """
+
+    async def acquire(self, route: Route, priority: RequestPriority = RequestPriority.NORMAL):
+        return None
+
+    def update(self, route: Route, handle, info: dict):
+        pass
+
+    def limited(self, route: Route, handle, retry_after: float, is_global: bool = False):
+        pass
+
+    def release(self, route: Route, handle):
+        pass
+
+
+class RateLimiter(RateLimitBackend):
+    """Maps every route to its discord rate limit bucket.
+
+    Routes are identified by their method, their template and their major parameter,
+    discord tells us which routes share a bucket using the ``X-RateLimit-Bucket`` header.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        global_limit (:class:`GlobalRateLimit`): The rate limit shared by all the routes
+        depths (:obj:`collections.Counter`): The number of requests waiting on a bucket or on the global limit,
+            by :class:`.RequestPriority`
+    """
+
+    # Idle buckets are dropped every time this many buckets have been created.
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, global_rate: int = GLOBAL_RATE_LIMIT):
+        self.depths: collections.Counter = collections.Counter()
+        self.global_limit: GlobalRateLimit = GlobalRateLimit(global_rate, depths=self.depths)
+        self._hashes: dict = {}
+        self._buckets: dict = {}
+        self._created: int = 0
+
+    def get_bucket(self, route: Route) -> RateLimitBucket:
+        """Returns the bucket a route belongs to, creating it if needed."""
+        key = (self._hashes.get(route.key, route.key), route.major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._created += 1
+            if self._created % self.PURGE_INTERVAL == 0:
+                self._purge()
+            bucket = self._buckets[key] = RateLimitBucket(self.depths)
+        return bucket
+
+    def _purge(self):
+        for key in [key for key, bucket in self._buckets.items() if bucket.idle]:
+            del self._buckets[key]
+
+    def queue_depth(self, priority: RequestPriority) -> int:
+        """The number of requests of the given priority waiting to be sent."""
+        return self.depths[priority]
+
+    async def acquire(self, route: Route, priority: RequestPriority = RequestPriority.NORMAL) -> RateLimitBucket:
+        """Waits until a request to the route can be sent.
+
+        Returns:
+            :class:`RateLimitBucket`: The bucket that must be updated with the response.
+        """
+        bucket = self.get_bucket(route)
+        await bucket.acquire(priority)
+        try:
+            await self.global_limit.acquire(priority)
+        except asyncio.CancelledError:
+            bucket._give_back()
+            raise
+        return bucket
+
+    def update(self, route: Route, bucket: RateLimitBucket, info: dict):
+        """Updates the bucket with the information returned by :func:`parse_ratelimit_headers`."""
+        bucket_hash = info['bucket']
+        if bucket_hash is not None and self._hashes.get(route.key) != bucket_hash:
+            old_key = (self._hashes.get(route.key, route.key), route.major)
+            self._hashes[route.key] = bucket_hash
+            if self._buckets.get(old_key) is bucket:
+                del self._buckets[old_key]
+            self._buckets.setdefault((bucket_hash, route.major), bucket)
+            logger.debug(f'{route.key} uses the bucket {bucket_hash}')
+
+        bucket.update(info['limit'], info['remaining'], info['reset_after'])
+
+    def limited(self, route: Route, bucket: RateLimitBucket, retry_after: float, is_global: bool = False):
+        """Called when a request to the route was answered with a 429 status."""
+        if is_global:
+            self.global_limit.block(retry_after)
+            bucket.release()
+        else:
+            logger.debug(f'{route} is rate limited for {retry_after} seconds')
+            bucket.block(retry_after)
+
+    def release(self, route: Route, bucket: RateLimitBucket):
+        """Called when a request to the route ended without a response."""
+        bucket.release()
+
+
+def _check_posix():
+    if fcntl is None or not hasattr(asyncio, 'start_unix_server'):
+        raise RuntimeError('Sharing the rate limits between processes needs unix sockets and fcntl, '
+                           'they are not available on this platform')
+
+
+class RateLimitCoordinator:
+    """Shares a :class:`RateLimiter` between processes through a unix socket.
+
+    Every :class:`SharedRateLimiter` connected to the coordinator asks it before sending a request,
+    so all the processes together stay under the discord rate limits. Messages are json objects
+    separated by newlines.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `await RateLimitCoordinator('/tmp/discordaio.sock').start()`
+
+    Attributes:
+        path (:obj:`str`): The path of the unix socket
+        ratelimiter (:class:`RateLimiter`): The shared state
+
+    Raises:
+        RuntimeError: On windows, the coordinator needs unix sockets and ``fcntl``.
+    """
+
+    def __init__(self, path: str, global_rate: int = GLOBAL_RATE_LIMIT):
+        _check_posix()
+        self.path: str = path
+        self.ratelimiter: RateLimiter = RateLimiter(global_rate)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._lock_file = None
+        self._writers: set = set()
+
+    async def start(self):
+        """Starts listening on the unix socket.
+
+        Raises:
+            BlockingIOError: If another coordinator is already running on the same path.
+        """
+        self._lock_file = open(self.path + '.lock', 'w')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise
+
+        # We hold the lock, so the socket file can only be a leftover from a dead coordinator.
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, self.path)
+        logger.debug(f'Rate limit coordinator listening on {self.path}')
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+            os.unlink(self.path)
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _acquire(self, writer: asyncio.StreamWriter, handles: dict, handle_id: int, route: Route,
+                       priority: RequestPriority):
+        bucket = await self.ratelimiter.acquire(route, priority)
+        handles[handle_id] = (route, bucket)
+        writer.write(json.dumps({'id': handle_id}).encode() + b'\n')
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        handles = {}
+        pending = {}
+        self._writers.add(writer)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                op = msg['op']
+                handle_id = msg['id']
+
+                if op == 'acquire':
+                    route = Route(msg['method'], msg['path'])
+                    priority = RequestPriority(msg.get('priority', RequestPriority.NORMAL.value))
+                    task = asyncio.ensure_future(self._acquire(writer, handles, handle_id, route, priority))
+                    pending[handle_id] = task
+                    task.add_done_callback(lambda _, handle_id=handle_id: pending.pop(handle_id, None))
+                    continue
+
+                if op == 'release':
+                    task = pending.pop(handle_id, None)
+                    # A finished task already stored its handle, which is released below
+                    if task is not None and not task.done():
+                        task.cancel()
+                        continue
+
+                route, bucket = handles.pop(handle_id, (None, None))
+                if bucket is None:
+                    continue
+                if op == 'update':
+                    self.ratelimiter.update(route, bucket, msg['info'])
+                elif op == 'limited':
+                    self.ratelimiter.limited(route, bucket, msg['retry_after'], msg['global'])
+                self.ratelimiter.release(route, bucket)
+        except (ConnectionError, ValueError) as e:
+            logger.error(e, exc_info=1)
+        finally:
+            for task in list(pending.values()):
+                task.cancel()
+            for route, bucket in handles.values():
+                self.ratelimiter.release(route, bucket)
+            self._writers.discard(writer)
+            writer.close()
+
+
+class SharedRateLimiter(RateLimitBackend):
+    """Rate limit backend that shares the buckets and the global rate limit with other processes.
+
+    It connects to the :class:`RateLimitCoordinator` listening on ``path``. If there is none and ``host`` is True,
+    the coordinator is started in this process, so the first worker that starts hosts it for the rest.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        path (:obj:`str`): The path of the unix socket
+        host (:obj:`bool`): Whether to start the coordinator if there is none running
+        coordinator (:class:`RateLimitCoordinator`): The coordinator if it's hosted by this process
+
+    Raises:
+        RuntimeError: On windows, the coordinator needs unix sockets and ``fcntl``.
+    """
+
+    def __init__(self, path: str, host: bool = True, global_rate: int = GLOBAL_RATE_LIMIT):
+        _check_posix()
+        self.path: str = path
+        self.host: bool = host
+        self.global_rate: int = global_rate
+        self.coordinator: Optional[RateLimitCoordinator] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Future] = None
+        self._connect_lock: asyncio.Lock = None
+        self._waiters: dict = {}
+        self._next_id: int = 0
+        self._closing: bool = False
+
+    async def _connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            while True:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(self.path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if not self.host:
+                        raise
+                try:
+                    coordinator = RateLimitCoordinator(self.path, self.global_rate)
+                    await coordinator.start()
+                    self.coordinator = coordinator
+                    logger.debug(f'No rate limit coordinator on {self.path}, hosting it')
+                except BlockingIOError:
+                    # Another process is starting it right now.
+                    await asyncio.sleep(0.1)
+            self._closing = False
+            self._writer = writer
+            self._reader_task = asyncio.ensure_future(self._read(reader))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                waiter = self._waiters.pop(json.loads(line)['id'], None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(None)
+        except ConnectionError:
+            pass
+
+        if not self._closing:
+            logger.warning('Lost the connection with the rate limit coordinator')
+        self._writer = None
+        self._reader_task = None
+        waiters = self._waiters
+        self._waiters = {}
+        for waiter in waiters.values():
+            if not waiter.done():
+                waiter.set_exception(ConnectionResetError('Lost the connection with the rate limit coordinator'))
+
+    def _send(self, msg: dict):
+        if self._writer is not None:
+            self._writer.write(json.dumps(msg).encode() + b'\n')
+
+    async def acquire(self, route: Route, priority: RequestPriority = RequestPriority.NORMAL) -> int:
+        while True:
+            await self._connect()
+            self._next_id += 1
+            handle_id = self._next_id
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters[handle_id] = waiter
+            self._send({'op': 'acquire', 'id': handle_id, 'method': route.method, 'path': route.path,
+                        'priority': priority.value})
+            try:
+                await waiter
+                return handle_id
+            except ConnectionResetError:
+                # The coordinator went away, ask the new one.
+                continue
+            except asyncio.CancelledError:
+                self._waiters.pop(handle_id, None)
+                self._send({'op': 'release', 'id': handle_id})
+                raise
+
+    def update(self, route: Route, handle_id: int, info: dict):
+        self._send({'op': 'update', 'id': handle_id, 'info': info})
+
+    def limited(self, route: Route, handle_id: int, retry_after: float, is_global: bool = False):
+        self._send({'op': 'limited', 'id': handle_id, 'retry_after': retry_after, 'global': is_global})
+
+    def release(self, route: Route, handle_id: int):
+        self._send({'op': 'release', 'id': handle_id})
+
+    async def close(self):
+        self._closing = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            await self._reader_task
+        if self.coordinator is not None:
+            await self.coordinator.close()
+            self.coordinator = None
+
+
+__all__ = [
+    'Route',
+    'RateLimitBucket',
+    'GlobalRateLimit',
+    'RateLimitBackend',
+    'NullRateLimiter',
+    'RateLimiter',
+    'RateLimitCoordinator',
+    'SharedRateLimiter',
+    'parse_ratelimit_headers',
+]
@@ -0,0 +1,142 @@
+"""Retries and circuit breaking for the REST requests that fail on discord's side."""
+
+import asyncio
+import random
+import time
+from typing import Optional
+
+import aiohttp
+
+from .exceptions import CircuitOpenError
+from .ratelimit import Route
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Methods that only read, retried by default.
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Methods that can be sent twice without changing the result. A retried DELETE can still get a 404 when the first
+# attempt went through, so they are only retried when asked for: RetryPolicy(methods=IDEMPOTENT_METHODS).
+IDEMPOTENT_METHODS = READ_METHODS + ('PUT', 'DELETE')
+
+# Errors raised before the request reached discord, those are safe to retry with any method.
+CONNECT_ERRORS = (aiohttp.ClientConnectorError, )
+
+TRANSPORT_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+class RetryPolicy:
+    """Decides which failed requests are retried and how long to wait before doing it.
+
+    The delays grow exponentially and are picked at random between 0 and the computed delay
+    (full jitter), so the clients that failed at the same time don't retry at the same time.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        max_retries (:obj:`int`): The number of retries after the first attempt, 0 disables retrying and None
+            retries forever
+        base_delay (:obj:`float`): The maximum delay in seconds before the first retry
+        max_delay (:obj:`float`): The maximum delay in seconds before any retry
+        statuses (:obj:`tuple` of :obj:`int`): The statuses that are retried
+        methods (:obj:`tuple` of :obj:`str`): The methods that are retried after a retryable status or a transport
+            error, only the reads by default. ``IDEMPOTENT_METHODS`` adds PUT and DELETE.
+    """
+
+    def __init__(self, max_retries: Optional[int] = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 statuses: tuple = (500, 502, 503, 504), methods: tuple = READ_METHODS):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+        self.methods = methods
+
+    def should_retry(self, method: str, attempt: int, status: int = None, error: Exception = None) -> bool:
+        """Whether to retry a request that failed with the given status or error on its ``attempt`` try."""
+        if self.max_retries is not None and attempt > self.max_retries:
+            return False
+        if error is not None:
+            return isinstance(error, CONNECT_ERRORS) or method in self.methods
+        return status in self.statuses and method in self.methods
+
+    def get_delay(self, attempt: int) -> float:
+        """Seconds to wait before the retry that follows the ``attempt`` try."""
+        # The exponent is capped so retrying forever doesn't overflow the float
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** min(attempt - 1, 64)))
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures: int = 0
+        self.open_until: float = 0.0
+        self.probing: bool = False
+
+
+class CircuitBreaker:
+    """Fails the requests to a route right away while it keeps failing.
+
+    After ``failure_threshold`` consecutive failures (5xx statuses or transport errors) the circuit of the route
+    opens and every request to it raises :class:`.CircuitOpenError` for ``recovery_timeout`` seconds.
+    After that a single request is let through, if it succeeds the circuit closes, otherwise it opens again.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        failure_threshold (:obj:`int`): Consecutive failures that open the circuit
+        recovery_timeout (:obj:`float`): Seconds the circuit stays open
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._circuits: dict = {}
+
+    def is_open(self, route: Route) -> bool:
+        """True if the requests to the route are currently rejected."""
+        circuit = self._circuits.get(route.key)
+        return circuit is not None and circuit.open_until > time.monotonic()
+
+    def before_request(self, route: Route):
+        """Raises :class:`.CircuitOpenError` if the request must not be sent."""
+        circuit = self._circuits.get(route.key)
+        if circuit is None or circuit.failures < self.failure_threshold:
+            return
+
+        retry_after = circuit.open_until - time.monotonic()
+        if retry_after > 0:
+            raise CircuitOpenError(f'{route.key} is failing, not sending requests for {retry_after:.1f} seconds',
+                                   retry_after)
+        if circuit.probing:
+            raise CircuitOpenError(f'{route.key} is failing, waiting for a test request to finish', 0)
+        circuit.probing = True
+
+    def cancelled(self, route: Route):
+        """Called when a request let through by :meth:`before_request` ended without an outcome."""
+        circuit = self._circuits.get(route.key)
+        if circuit is not None:
+            circuit.probing = False
+
+    def success(self, route: Route):
+        circuit = self._circuits.pop(route.key, None)
+        if circuit is not None and circuit.failures >= self.failure_threshold:
+            logger.info(f'{route.key} is working again')
+
+    def failure(self, route: Route):
+        circuit = self._circuits.get(route.key)
+        if circuit is None:
+            circuit = self._circuits[route.key] = _Circuit()
+        circuit.failures += 1
+        circuit.probing = False
+        if circuit.failures >= self.failure_threshold:
+            if circuit.failures == self.failure_threshold:
+                logger.warning(f'{route.key} failed {circuit.failures} times in a row, '
+                               f'rejecting its requests for {self.recovery_timeout} seconds')
+            circuit.open_until = time.monotonic() + self.recovery_timeout
+
+
+__all__ = [
+    'RetryPolicy',
+    'CircuitBreaker',
+]
@@ -1,4 +1,5 @@
 from .base import DiscordObject
+from .snowflake import Snowflake
 
 
 class Role(DiscordObject):
@@ -16,6 +17,11 @@ class Role(DiscordObject):
         managed (:obj:`bool`): whether this role is managed by an integration
         mentionable (:obj:`bool`): whether this role is mentionable
     """
+    __slots__ = ('id', 'name', 'color', 'hoist', 'position', 'permissions', 'managed', 'mentionable')
+    _fields = {
+        'id': Snowflake,
+        'permissions': int,
+    }
 
     def __init__(self, id=0, name="", color=0, hoist=False, position=0,
                  permissions=0, managed=False, mentionable=False):
@@ -0,0 +1,176 @@
+"""Running several gateway connections (shards) for one bot."""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import discordaio
+from .websocket import DiscordWebsocket
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two IDENTIFY of the same rate limit bucket
+IDENTIFY_INTERVAL = 5.0
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Returns the shard that receives the events of a guild.
+
+    .. versionadded:: 0.4.0
+    """
+    return (int(guild_id) >> 22) % shard_count
+
+
+class IdentifyLimiter:
+    """Spaces the IDENTIFY of the shards of a bot, discord allows ``max_concurrency`` of them every 5 seconds.
+
+    The shards are put in ``max_concurrency`` buckets by ``shard_id % max_concurrency``, each bucket identifies a
+    shard at a time.
+
+    .. versionadded:: 0.4.0
+
+    Attributes:
+        max_concurrency (:obj:`int`): The number of buckets, from the ``session_start_limit`` of ``/gateway/bot``
+        interval (:obj:`float`): The seconds between two IDENTIFY of a bucket
+    """
+
+    def __init__(self, max_concurrency: int = 1, interval: float = IDENTIFY_INTERVAL):
+        self.max_concurrency: int = max_concurrency
+        self.interval: float = interval
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._last: Dict[int, float] = {}
+
+    async def acquire(self, shard_id: int) -> None:
+        """Waits until the shard can identify.
+
+        .. versionadded:: 0.4.0
+        """
+        bucket = shard_id % self.max_concurrency
+        lock = self._locks.get(bucket)
+        if lock is None:
+            lock = self._locks[bucket] = asyncio.Lock()
+        async with lock:
+            delay = self._last.get(bucket, -self.interval) + self.interval - time.monotonic()
+            if delay > 0:
+                logger.debug(f'Shard {shard_id} waits {delay:.1f} seconds to identify')
+                await asyncio.sleep(delay)
+            self._last[bucket] = time.monotonic()
+
+    async def close(self) -> None:
+        """Releases what the limiter holds, called when the :class:`ShardManager` closes."""
+
+
+class ShardManager:
+    """Opens a gateway connection per shard and routes all their events into one :class:`.DiscordBot`.
+
+    Every connection identifies with ``[shard_id, shard_count]``, so discord sends it the events of the guilds
+    where ``(guild_id >> 22) % shard_count == shard_id``. A process can run a range of the shards, the other
+    processes running the rest with the same ``shard_count``.
+
+    ``on_shard_ready`` is raised with the shard id when a shard gets READY, and ``on_ready`` once all the shards
+    of the manager did.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `bot = DiscordBot(token, shard_count=16, shard_ids=range(0, 8))`
+
+    Attributes:
+        bot (:class:`.DiscordBot`): The bot the events go to
+        shard_count (:obj:`int`): The total number of shards of the bot, None to use the one recommended by discord
+        shard_ids (:obj:`list` of :obj:`int`): The shards run by this manager, None for all of them
+        identify_limiter (:class:`.IdentifyLimiter`): Spaces the IDENTIFY of the shards, one with the
+            ``max_concurrency`` given by discord is created if it's None
+        websockets (:obj:`dict`): The :class:`.DiscordWebsocket` of every shard by id
+    """
+
+    def __init__(self, bot: 'discordaio.DiscordBot', shard_count: int = None, shard_ids: Iterable[int] = None,
+                 identify_limiter: IdentifyLimiter = None):
+        self.bot = bot
+        self.shard_count: Optional[int] = shard_count
+        self.shard_ids: Optional[List[int]] = list(shard_ids) if shard_ids is not None else None
+        self.identify_limiter: Optional[IdentifyLimiter] = identify_limiter
+        self.websockets: Dict[int, DiscordWebsocket] = {}
+        self._ready_shards: set = set()
+        self._ready_raised: bool = False
+
+    @property
+    def latencies(self) -> Dict[int, float]:
+        """The heartbeat latency of every shard, by id."""
+        return {shard_id: ws.latency for shard_id, ws in self.websockets.items()}
+
+    @property
+    def latency(self) -> float:
+        """The mean heartbeat latency of the shards, infinite if none of them has one yet."""
+        latencies = [latency for latency in self.latencies.values() if latency != float('inf')]
+        return sum(latencies) / len(latencies) if latencies else float('inf')
+
+    def shard_for_guild(self, guild_id: int) -> int:
+        """Returns the shard that receives the events of a guild."""
+        return shard_for_guild(guild_id, self.shard_count)
+
+    def get_websocket(self, guild_id: int) -> Optional[DiscordWebsocket]:
+        """Returns the connection of the shard of a guild, None if it isn't run by this manager."""
+        return self.websockets.get(self.shard_for_guild(guild_id))
+
+    async def start(self) -> None:
+        """Opens the connections of the shards and keeps them connected until :meth:`close` is called.
+
+        .. versionadded:: 0.4.0
+
+        Raises:
+            ValueError: If a shard id isn't lower than ``shard_count``.
+        """
+        bot = self.bot
+        info = await bot.http.request_url('/gateway/bot')
+        if self.shard_count is None:
+            self.shard_count = info['shards']
+        if self.shard_ids is None:
+            self.shard_ids = list(range(self.shard_count))
+        invalid = [shard_id for shard_id in self.shard_ids if not 0 <= shard_id < self.shard_count]
+        if invalid:
+            raise ValueError(f'The shards {invalid} are out of range for {self.shard_count} shards')
+        if self.identify_limiter is None:
+            max_concurrency = info.get('session_start_limit', {}).get('max_concurrency', 1)
+            self.identify_limiter = IdentifyLimiter(max_concurrency)
+        logger.info(f'Starting the shards {self.shard_ids} of {self.shard_count}')
+
+        for shard_id in self.shard_ids:
+            ws = DiscordWebsocket(bot.http, compress=bot.compress_gateway, encoding=bot.gateway_encoding,
+                                  reconnect_policy=bot.reconnect_policy, shard=(shard_id, self.shard_count),
+                                  manager=self)
+            ws.gateway_url = info['url']
+            self.websockets[shard_id] = ws
+        tasks = [asyncio.ensure_future(ws.start()) for ws in self.websockets.values()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def close(self) -> None:
+        """Closes the connections of all the shards.
+
+        .. versionadded:: 0.4.0
+        """
+        await asyncio.gather(*(ws.close() for ws in self.websockets.values()))
+        if self.identify_limiter is not None:
+            await self.identify_limiter.close()
+
+    async def shard_ready(self, ws: DiscordWebsocket) -> None:
+        """Called by the connections when their shard gets READY."""
+        shard_id = ws.shard[0]
+        self._ready_shards.add(shard_id)
+        await self.bot.raise_event('on_shard_ready', shard_id)
+        if not self._ready_raised and self._ready_shards.issuperset(self.websockets):
+            self._ready_raised = True
+            await self.bot.raise_event('on_ready')
+
+
+__all__ = [
+    'IdentifyLimiter',
+    'ShardManager',
+    'shard_for_guild',
+]
@@ -0,0 +1,84 @@
+"""Discord ids, they encode the time they were created at."""
+
+import datetime
+from typing import Union
+
+from .constants import DISCORD_EPOCH
+
+
+class Snowflake(int):
+    """A discord id.
+
+    The ids are sent as strings by the api, the models store them as snowflakes so they can be compared and hashed
+    cheaply and their creation time can be read without a request.
+
+    .. versionadded:: 0.4.0
+
+    Example:
+        `messages = await channel.get_messages(after=datetime.datetime.utcnow() - datetime.timedelta(hours=1))`
+    """
+    __slots__ = ()
+
+    @property
+    def timestamp(self) -> float:
+        """Unix time in seconds the id was created at."""
+        return ((self >> 22) + DISCORD_EPOCH) / 1000
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        """UTC date the id was created at."""
+        return datetime.datetime.fromtimestamp(((self >> 22) + DISCORD_EPOCH) / 1000, datetime.timezone.utc)
+
+    @property
+    def worker_id(self) -> int:
+        """Internal id of the worker that created the id."""
+        return (self >> 17) & 0x1f
+
+    @property
+    def process_id(self) -> int:
+        """Internal id of the process that created the id."""
+        return (self >> 12) & 0x1f
+
+    @property
+    def sequence(self) -> int:
+        """Incremented for every id created by the process in the same millisecond."""
+        return self & 0xfff
+
+    @classmethod
+    def from_datetime(cls, date: datetime.datetime, high: bool = False) -> 'Snowflake':
+        """Returns the lowest id created at the date, or the highest one.
+
+        Use the lowest one as an ``after`` and the highest one as a ``before`` query parameter to include the
+        date, or the other way around to exclude it. Naive dates are taken as UTC.
+        """
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=datetime.timezone.utc)
+        return cls.from_timestamp(date.timestamp(), high)
+
+    @classmethod
+    def from_timestamp(cls, timestamp: float, high: bool = False) -> 'Snowflake':
+        """Returns the lowest id created at the unix time in seconds, or the highest one."""
+        milliseconds = int(timestamp * 1000) - DISCORD_EPOCH
+        return cls((milliseconds << 22) | (0x3fffff if high else 0))
+
+    def __repr__(self):
+        return f'Snowflake({int.__repr__(self)})'
+
+    def __str__(self):
+        return int.__repr__(self)
+
+
+def to_snowflake(value: Union[int, str, datetime.datetime], high: bool = False) -> Snowflake:
+    """Converts an id or a date to a :class:`Snowflake`, see :meth:`Snowflake.from_datetime` for ``high``.
+
+    .. versionadded:: 0.4.0
+    """
+    if isinstance(value, datetime.datetime):
+        return Snowflake.from_datetime(value, high)
+    return Snowflake(value)
+
+
+__all__ = [
+    'Snowflake',
+    'to_snowflake',
+]
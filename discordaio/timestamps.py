@@ -0,0 +1,59 @@
+"""Parsing of the ISO 8601 timestamps sent by discord, like ``2020-10-18T15:43:12.654000+00:00``."""
+
+import datetime
+import functools
+
+# Parsed values kept by the fallback parser, discord repeats the same values a lot (a message and its updates,
+# the members imported together). fromisoformat is faster than a cache lookup, its results aren't cached.
+TIMESTAMP_CACHE_SIZE = 2048
+
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+
+
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _parse_fixed(value: str) -> datetime.datetime:
+    """Parses YYYY-MM-DDTHH:MM:SS[.ffffff][+HH:MM|Z] by position."""
+    if value[-1] == 'Z':
+        tz = datetime.timezone.utc
+        end = len(value) - 1
+    else:
+        end = len(value) - 6
+        sign = value[end]
+        if sign != '+' and sign != '-':
+            raise ValueError(f'Invalid timestamp {value!r}')
+        offset = datetime.timedelta(hours=int(value[end + 1:end + 3]), minutes=int(value[end + 4:end + 6]))
+        tz = datetime.timezone.utc if not offset else datetime.timezone(-offset if sign == '-' else offset)
+
+    microsecond = 0
+    if end > 19:
+        if value[19] != '.':
+            raise ValueError(f'Invalid timestamp {value!r}')
+        microsecond = int(value[20:end].ljust(6, '0')[:6])
+
+    return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                             int(value[11:13]), int(value[14:16]), int(value[17:19]), microsecond, tz)
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """Parses a discord timestamp into an aware datetime.
+
+    Uses :meth:`datetime.datetime.fromisoformat` when it can read the value (it's implemented in C),
+    falling back to a cached parser specialised for discord's format (python 3.6, ``Z`` suffixes before 3.11).
+
+    .. versionadded:: 0.4.0
+
+    Raises:
+        ValueError: If it isn't a timestamp.
+    """
+    if _fromisoformat is not None:
+        try:
+            return _fromisoformat(value)
+        except ValueError:
+            pass
+    return _parse_fixed(value)
+
+
+__all__ = [
+    'parse_timestamp',
+    'TIMESTAMP_CACHE_SIZE',
+]
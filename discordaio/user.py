@@ -4,6 +4,7 @@ Although they are similar, bot users are automated users that are "owned" by ano
 bot users do not have a limitation on the number of Guilds they can be a part of."""
 
 from .base import DiscordObject
+from .snowflake import Snowflake
 from .constants import DISCORD_CDN
 
 
@@ -19,6 +20,7 @@ class UserConnection(DiscordObject):
         revoked (:obj:`bool`): whether the connection is revoked
         integrations (:obj:`list`): an array of partial server integrations
     """
+    __slots__ = ('id', 'name', 'type', 'revoked', 'integrations')
 
     def __init__(self, id="", name="", type="", revoked=False, integrations=[]):
         self.id = id
@@ -47,6 +49,14 @@ class User(DiscordObject):
         premium_type (:obj:`int`, optional): the type of Nitro subscription on a user's account
         public_flags (:obj:`int`, optional): the public flags on a user's account
     """
+    __slots__ = (
+        'id', 'username', 'discriminator', 'avatar', 'system', 'mfa_enabled', 'locale', 'verified', 'email', 'flags',
+        'premium_type', 'public_flags',
+    )
+    _fields = {
+        'id': Snowflake,
+    }
+    _identity_map = 'users'
 
     def __init__(self, id=0, username="", discriminator="", avatar="", bot=False,
                 system=False, mfa_enabled=False, locale="", verified=False, email="", 
@@ -77,12 +87,6 @@ class User(DiscordObject):
     def get_default_avatar_url(self):
         return DISCORD_CDN + f'/embed/avatars/{int(self.discriminator) % 5}.png'
 
-    async def _from_api_ext(self, key, value):
-        if key == 'guild_id':
-            pass
-        else:
-            await super()._from_api_ext(key, value)
-
 
 __all__ = [
     'User',
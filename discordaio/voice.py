@@ -1,5 +1,6 @@
 from typing import Optional
 from .base import DiscordObject
+from .snowflake import Snowflake
 
 
 class VoiceState(DiscordObject):
@@ -16,6 +17,14 @@ class VoiceState(DiscordObject):
         self_mute (:obj:`bool`): whether this user is locally muted
         suppress (:obj:`bool`): whether this user is muted by the current user
     """
+    __slots__ = (
+        'guild_id', 'channel_id', 'user_id', 'session_id', 'deaf', 'mute', 'self_deaf', 'self_mute', 'suppress',
+    )
+    _fields = {
+        'guild_id': Snowflake,
+        'channel_id': Snowflake,
+        'user_id': Snowflake,
+    }
     def __init__(self, guild_id: Optional[int]=None, channel_id: int=0, user_id: int=0, session_id: str='', deaf=False,
                  mute=False, self_deaf=False, self_mute=False, suppress=False):
         self.guild_id: int = guild_id
@@ -39,6 +48,7 @@ class VoiceRegion(DiscordObject):
         deprecated (:obj:`bool`): whether this is a deprecated voice region (avoid switching to these)
         custom (:obj:`bool`): whether this is a custom voice region (used for events/etc)
     """
+    __slots__ = ('id', 'name', 'vip', 'optimal', 'deprecated', 'custom')
     def __init__(self, id="", name="", vip=False, optimal=False, deprecated=False,
                  custom=False):
         self.id = id
@@ -1,6 +1,7 @@
 """Webhooks are a low-effort way to post messages to channels in Discord. They do not require a bot user or authentication to use."""
 
 from .base import DiscordObject
+from .snowflake import Snowflake
 
 
 class Webhook(DiscordObject):
@@ -17,6 +18,12 @@ class Webhook(DiscordObject):
         avatar (:obj:`str`): the default avatar of the webhook
         token (:obj:`str`): the secure token of the webhook
     """
+    __slots__ = ('id', 'guild_id', 'channel_id', 'user', 'name', 'avatar', 'token')
+    _fields = {
+        'id': Snowflake,
+        'guild_id': Snowflake,
+        'channel_id': Snowflake,
+    }
 
     def __init__(self, id=0, guild_id=0, channel_id=0, user=None, name="",
                  avatar="", token=""):
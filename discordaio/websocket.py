@@ -1,13 +1,23 @@
 import asyncio
 import aiohttp
-import json
 import platform
+import random
+import time
+import zlib
+from typing import Optional, Tuple
+
+import discordaio
 
 from .enums import GatewayOpcodes
 from .guild import Guild, GuildMember
 from .user import User
 from .http import HTTPHandler
+from .exceptions import AuthorizationError, GatewayClosedError
+from .retry import RetryPolicy
+from . import etf
+from .members import MemberStore
 from .role import Role
+from .snowflake import Snowflake
 from .channel import Channel, ChannelMessage
 from .emoji import Emoji
 from .activity import Activity
@@ -17,6 +27,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Close codes after which reconnecting won't help
+FATAL_CLOSE_CODES = {
+    4004: 'Authentication failed',
+    4010: 'Invalid shard',
+    4011: 'Sharding required',
+    4012: 'Invalid API version',
+    4013: 'Invalid intents',
+    4014: 'Disallowed intents',
+}
+# Close codes after which the session can't be resumed
+SESSION_CLOSE_CODES = (4007, 4009)
+# Errors opening or reading the connection, they are retried
+CONNECTION_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+
 
 class DiscordWebsocket:
     """Class used for handling the websocket connection with the discord gateway
@@ -26,52 +50,111 @@ class DiscordWebsocket:
     Attributes:
         heartbeat_interval (:obj:`float`): The interval to send pings
         _trace (:obj:`str`): Used for debugging
-        seq (:obj:`str`): Used in pings
+        seq (:obj:`int`): The sequence number of the last dispatch, used in pings and for resuming
         session_id (:obj:`str`): Used for resuming
         http (:class:`HTTPHandler`): Used for sending http requests and session handling.
         gateway_url (:obj:`str`): The gateway url
         shards (:obj:`list` of :obj:`int`): Used for opening multiple connections
         ws (:class:aiohttp.ClientWebSocketResponse``): The websocket
+        compress (:obj:`bool`): Whether the connection uses zlib-stream transport compression
+        encoding (:obj:`str`): The gateway encoding, ``'json'`` or ``'etf'``
+        resume_gateway_url (:obj:`str`): The gateway url to resume the session on, given by READY
+        reconnect_policy (:class:`.RetryPolicy`): The delays between the reconnections, and how many failed
+            connections in a row are tolerated. The default one retries forever
+        latency (:obj:`float`): Seconds between the last heartbeat and its acknowledgement, infinite until the first
+            one is acknowledged
+        shard (:obj:`tuple` of :obj:`int`): The shard id and the shard count sent in IDENTIFY, None if the bot isn't
+            sharded
+        manager (:class:`.ShardManager`): The manager of the shard, it spaces the IDENTIFY of its shards
     """
 
-    def __init__(self, http: HTTPHandler = None, session_id: str = None, shards: list = []):
+    def __init__(self, http: HTTPHandler = None, session_id: str = None, shards: list = [], compress: bool = False,
+                 encoding: str = 'json', reconnect_policy: RetryPolicy = None, shard: Tuple[int, int] = None,
+                 manager: 'discordaio.ShardManager' = None):
+        if encoding not in ('json', 'etf'):
+            raise ValueError(f'Unknown gateway encoding {encoding!r}, it must be json or etf')
         self.heartbeat_interval: float = None
         self._trace: list = []
-        self.seq: str = None
+        self.seq: int = None
         self.heartbeat_future: asyncio.Future = None
+        # IDENTIFY waits for the identify limiter in its own task, the connection keeps being read meanwhile
+        self._identify_future: Optional[asyncio.Future] = None
         self.session_id: str = session_id
         self.http: HTTPHandler = http
         self.gateway_url: str = None
         self.shards: list = shards
         self.ws: aiohttp.ClientWebSocketResponse = None
+        self.compress: bool = compress
+        self.encoding: str = encoding
+        self.resume_gateway_url: str = None
+        self.reconnect_policy: RetryPolicy = reconnect_policy or RetryPolicy(max_retries=None, base_delay=1.0,
+                                                                             max_delay=60.0)
+        self._closing: bool = False
+        # Whether the current connection got READY or RESUMED
+        self._ready: bool = False
+        # Whether the current connection ended with INVALID_SESSION
+        self._invalid_session: bool = False
+        self.latency: float = float('inf')
+        self._heartbeat_acked: bool = True
+        self._heartbeat_sent_at: float = None
+        self.shard: Optional[Tuple[int, int]] = shard
+        self.manager: Optional['discordaio.ShardManager'] = manager
+        # One zlib context for the whole connection, the frames only make sense in order
+        self._inflator = None
+        self._buffer: bytearray = bytearray()
 
     @property
     def closed(self) -> bool:
         return self.ws is None or self.ws.closed
 
     async def send_heartbeat(self):
-        while True:
-            if self.ws is None or self.ws.closed:
+        """Heartbeats every ``heartbeat_interval`` until the connection closes.
+
+        The first heartbeat is sent at a random point of the first interval, as discord asks, so the clients that
+        reconnected together don't heartbeat together. If the previous heartbeat wasn't acknowledged when the next
+        one is due, the connection is a zombie: it's closed so it's reopened and the session resumed.
+        """
+        interval = self.heartbeat_interval / 1000
+        await asyncio.sleep(interval * random.random())
+        while self.ws is not None and not self.ws.closed:
+            if not self._heartbeat_acked:
+                logger.warning(f'No HEARTBEAT_ACK in {interval} seconds, closing the zombie connection')
+                await self.ws.close(code=4000)
                 break
-            logger.debug(f'Waiting {self.heartbeat_interval / 1000} seconds to send heartbeat')
-            await asyncio.sleep(self.heartbeat_interval / 1000)
-            await self.ws.send_json({
-                'op': 1,
-                'd': self.seq
-            })
-            logger.debug("Sent heartbeat")
+            await self.heartbeat()
+            logger.debug(f'Sent heartbeat, waiting {interval} seconds to send the next one')
+            await asyncio.sleep(interval)
+
+    def _cancel_tasks(self):
+        for future in (self.heartbeat_future, self._identify_future):
+            if future is not None:
+                future.cancel()
+        self.heartbeat_future = None
+        self._identify_future = None
+
+    async def heartbeat(self):
+        """Sends a heartbeat with the last sequence number.
+
+        .. versionadded:: 0.4.0
+        """
+        self._heartbeat_acked = False
+        self._heartbeat_sent_at = time.monotonic()
+        await self.send({
+            'op': 1,
+            'd': self.seq
+        })
 
     async def close(self) -> bool:
-        """Closes the websocket
+        """Closes the websocket, it isn't reconnected.
 
         .. versionadded:: 0.2.0
 
         Returns:
             bool: True if succeeded closing. False if the websocket was already closed
         """
+        self._closing = True
+        self._cancel_tasks()
         if self.ws is not None and not self.ws.closed:
-            if self.heartbeat_future is not None and not self.heartbeat_future.cancelled():
-                self.heartbeat_future.cancel()
             await self.ws.close()
             logger.debug('Websocket closed!')
             return True
@@ -79,205 +162,405 @@ class DiscordWebsocket:
             return False
 
     async def start(self):
-        """Starts the websocket
+        """Starts the websocket and keeps it connected until :meth:`close` is called.
+
+        When the connection drops it's opened again after a backoff delay given by ``reconnect_policy``, and the
+        session is resumed so the events missed in between are replayed. A new session is identified only when
+        there is none or discord refuses to resume it. By default it keeps reconnecting through outages of any
+        length, only the close codes of ``FATAL_CLOSE_CODES`` stop it; set ``reconnect_policy.max_retries`` to give
+        up after that many failed connections in a row.
 
         .. versionadded:: 0.2.0
+
+        Raises:
+            AuthorizationError: If discord refused the token.
+            GatewayClosedError: If discord closed the connection with a close code that can't be recovered from, or
+                the connection failed more than ``reconnect_policy.max_retries`` times in a row, if it's set.
         """
         if self.ws is not None and not self.ws.closed:
             await self.ws.close()
             self.ws = None
 
-        info = await self.http.request_url('/gateway/bot')
-        self.gateway_url = info['url']
-        self.shards = info['shards']
+        self._closing = False
+        failures = 0
+        while True:
+            error = None
+            self._ready = False
+            self._invalid_session = False
+            try:
+                if self.gateway_url is None:
+                    info = await self.http.request_url('/gateway/bot')
+                    self.gateway_url = info['url']
+                    self.shards = info['shards']
+                    logger.debug(f'I can use {self.shards} shards!')
+                code = await self.connect()
+            except CONNECTION_ERRORS as e:
+                error = e
+                code = None
+                logger.warning(f'Could not connect to the gateway: {e!r}')
+            finally:
+                self._cancel_tasks()
+
+            if self._closing:
+                return
+            if code == 4004:
+                raise AuthorizationError('The gateway refused the token (close code 4004)')
+            if code in FATAL_CLOSE_CODES:
+                raise GatewayClosedError(f'{FATAL_CLOSE_CODES[code]} (close code {code})', code)
+            if code in SESSION_CLOSE_CODES:
+                logger.info(f'The session can\'t be resumed (close code {code}), identifying again')
+                self.reset_session()
+
+            failures = 1 if self._ready else failures + 1
+            max_retries = self.reconnect_policy.max_retries
+            if max_retries is not None and failures > max_retries:
+                raise GatewayClosedError(f'Gave up after {failures} failed connections', code) from error
+            delay = self.reconnect_policy.get_delay(failures)
+            if self._invalid_session:
+                # discord asks to wait between 1 and 5 seconds after an invalid session
+                delay = max(delay, random.uniform(1, 5))
+            logger.info(f'Gateway connection closed (code {code}), reconnecting in {delay:.1f} seconds')
+            await asyncio.sleep(delay)
+
+    def reset_session(self):
+        """Forgets the session, the next connection identifies instead of resuming.
+
+        .. versionadded:: 0.4.0
+        """
+        self.session_id = None
+        self.seq = None
+        self.resume_gateway_url = None
+
+    async def connect(self) -> Optional[int]:
+        """Opens one connection to the gateway and handles its payloads until it's closed.
 
-        logger.debug(f'I can use {self.shards} shards!')
+        .. versionadded:: 0.4.0
 
-        async with self.http.session.ws_connect(self.gateway_url + '?v=6&encoding=json') as ws:
+        Returns:
+            :obj:`int`: The close code of the connection.
+        """
+        resuming = self.session_id is not None and self.seq is not None
+        url = (self.resume_gateway_url if resuming and self.resume_gateway_url else self.gateway_url)
+        url += f'?v=6&encoding={self.encoding}'
+        if self.compress:
+            url += '&compress=zlib-stream'
+        self._inflator = zlib.decompressobj()
+        self._buffer.clear()
+
+        async with self.http.gateway_session.ws_connect(url) as ws:
             self.ws = ws
             async for msg in self.ws:
                 # logger.debug(msg)
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    dct = json.loads(msg.data)
-                    opcode = dct['op']
-                    data = dct['d']
-                    if GatewayOpcodes(opcode) == GatewayOpcodes.HELLO:
-                        if self.heartbeat_future is not None:
-                            if not self.heartbeat_future.cancelled():
-                                self.heartbeat_future.cancel()
-                                self.heartbeat_future = None
-                        self.heartbeat_interval = dct['d']['heartbeat_interval']
-                        self._trace = dct['d']['_trace']
-                        self.seq = dct['s']
-                        if self.session_id is not None:
-                            pass
-                            await ws.send_json({
-                                "op": 6,  # Resume
-                                "d": {
-                                    "token": self.http.token,
-                                    "session_id": self.session_id,
-                                    "seq": self.seq
-                                }
-                            })
-                        else:
-                            await ws.send_json({
-                                "op": 2,  # Identify
-                                "d": {
-                                    "token": self.http.token,
-                                    "properties": {
-                                        '$os': platform.system(),
-                                        '$browser': 'discord.aio',
-                                        '$device': 'discord.aio'
-                                    },
-                                    "compress": False,
-                                    "large_threshold": 250
-                                }
-                            })
-                        logger.debug(f'Ensuring to heartbeat every {self.heartbeat_interval / 1000} seconds!')
-                        self.heartbeat_future = asyncio.ensure_future(self.send_heartbeat())
-                    elif GatewayOpcodes(opcode) == GatewayOpcodes.HEARTBEAT_ACK:
-                        logger.debug(f'Got HEARTBEAT_ACK (new s: {dct["s"]}, old s: {self.seq})')
-                        self.seq = dct['s']
-                    elif GatewayOpcodes(opcode) == GatewayOpcodes.DISPATCH:
-                        event_type = dct['t']
-                        asyncio.ensure_future(self.dispatch_event(event_type, data))
+                dct = self.decode_message(msg)
+                if dct is not None:
+                    await self.handle_payload(dct)
+            return ws.close_code
+
+    async def handle_payload(self, dct: dict):
+        """Acts on a decoded gateway payload.
+
+        .. versionadded:: 0.4.0
+        """
+        opcode = dct['op']
+        data = dct['d']
+        if opcode == GatewayOpcodes.DISPATCH.value:
+            if dct['s'] is not None:
+                self.seq = dct['s']
+            event_type = dct['t']
+            if event_type == 'READY':
+                self.session_id = data['session_id']
+                self.resume_gateway_url = data.get('resume_gateway_url')
+                self._ready = True
+            elif event_type == 'RESUMED':
+                logger.info(f'Resumed the session at seq {self.seq}')
+                self._ready = True
+            asyncio.ensure_future(self.dispatch_event(event_type, data))
+        elif opcode == GatewayOpcodes.HELLO.value:
+            self._cancel_tasks()
+            self.heartbeat_interval = data['heartbeat_interval']
+            self._trace = data['_trace']
+            self._heartbeat_acked = True
+            # Heartbeating starts right away, a shard can wait a while for its turn to identify
+            logger.debug(f'Ensuring to heartbeat every {self.heartbeat_interval / 1000} seconds!')
+            self.heartbeat_future = asyncio.ensure_future(self.send_heartbeat())
+            if self.session_id is not None and self.seq is not None:
+                await self.resume()
+            else:
+                self._identify_future = asyncio.ensure_future(self.identify())
+        elif opcode == GatewayOpcodes.HEARTBEAT_ACK.value:
+            self._heartbeat_acked = True
+            if self._heartbeat_sent_at is not None:
+                self.latency = time.monotonic() - self._heartbeat_sent_at
+            logger.debug(f'Got HEARTBEAT_ACK, latency {self.latency * 1000:.0f} ms')
+        elif opcode == GatewayOpcodes.HEARTBEAT.value:
+            # The gateway wants a heartbeat right away
+            await self.heartbeat()
+        elif opcode == GatewayOpcodes.RECONNECT.value:
+            logger.info('The gateway asked to reconnect')
+            # Any code but 1000 and 1001 keeps the session alive
+            await self.ws.close(code=4000)
+        elif opcode == GatewayOpcodes.INVALID_SESSION.value:
+            if not data:
+                self.reset_session()
+            await self.http.get_client().raise_event('on_invalid_session', data)
+            # start() waits the 1 to 5 seconds discord asks for, then resumes or identifies on a new connection
+            self._invalid_session = True
+            await self.ws.close(code=4000)
+
+    async def identify(self):
+        """Starts a new session.
+
+        .. versionadded:: 0.4.0
+        """
+        payload = {
+            "op": 2,  # Identify
+            "d": {
+                "token": self.http.token,
+                "properties": {
+                    '$os': platform.system(),
+                    '$browser': 'discord.aio',
+                    '$device': 'discord.aio'
+                },
+                "compress": False,
+                "large_threshold": 250
+            }
+        }
+        if self.shard is not None:
+            payload['d']['shard'] = list(self.shard)
+            if self.manager is not None:
+                await self.manager.identify_limiter.acquire(self.shard[0])
+                if self.closed:
+                    return
+        logger.debug(f'Identifying, shard {self.shard}')
+        await self.send(payload)
+
+    async def resume(self):
+        """Resumes the session, discord replays the events after ``seq``.
+
+        .. versionadded:: 0.4.0
+        """
+        logger.debug(f'Resuming session {self.session_id} at seq {self.seq}')
+        await self.send({
+            "op": 6,  # Resume
+            "d": {
+                "token": self.http.token,
+                "session_id": self.session_id,
+                "seq": self.seq
+            }
+        })
+
+    def decode_message(self, msg: aiohttp.WSMessage) -> Optional[dict]:
+        """Decodes a gateway message, None if it isn't a complete payload.
+
+        With zlib-stream compression the payloads come in binary frames, a payload is complete when the data received
+        ends with the ``Z_SYNC_FLUSH`` suffix, ``00 00 ff ff``. The etf payloads are binary frames too, an uncompressed binary
+        frame is decoded as etf only on an ``encoding='etf'`` connection.
+
+        .. versionadded:: 0.4.0
+        """
+        if msg.type == aiohttp.WSMsgType.TEXT:
+            return self.http.codec.loads(msg.data)
+        if msg.type == aiohttp.WSMsgType.BINARY:
+            if not self.compress:
+                if self.encoding == 'etf':
+                    return etf.loads(msg.data)
+                return self.http.codec.loads(msg.data)
+            buffer = self._buffer
+            buffer += msg.data
+            if len(buffer) < 4 or buffer[-4:] != b'\x00\x00\xff\xff':
+                return None
+            data = self._inflator.decompress(buffer)
+            buffer.clear()
+            if self.encoding == 'etf':
+                return etf.loads(data)
+            return self.http.codec.loads(data)
+        return None
+
+    async def send(self, payload: dict):
+        """Sends a payload to the gateway in the encoding of the connection.
+
+        .. versionadded:: 0.4.0
+        """
+        if self.encoding == 'etf':
+            await self.ws.send_bytes(etf.dumps(payload))
+        else:
+            await self.ws.send_str(self.http.codec.dumps(payload))
 
     async def dispatch_event(self, event, data):
+        client = self.http.get_client()
+
         if event == 'READY':
-            self.session_id = data['session_id']
-            self.http.get_client().user = await User.from_api_res(data['user'])
-            self.http.get_client().guilds = await Guild.from_api_res(data['guilds'])
-            return await self.http.get_client().raise_event('on_ready')
+            client.user = User.from_dict(data['user'], client)
+            guilds = Guild.from_dict(data['guilds'], client)
+            if self.shard is None:
+                client.guilds = guilds
+                return await client.raise_event('on_ready')
+            # The other shards' guilds stay, this shard's ones are replaced
+            shard_id, shard_count = self.shard
+            client.guilds = [guild for guild in client.guilds
+                             if (int(guild.id) >> 22) % shard_count != shard_id] + guilds
+            if self.manager is not None:
+                return await self.manager.shard_ready(self)
+            return await client.raise_event('on_shard_ready', shard_id)
 
         elif event == 'RESUMED':
-            return await self.http.get_client().raise_event('on_resumed')
+            return await client.raise_event('on_resumed')
 
         elif event == 'INVALID_SESSION':
-            return await self.http.get_client().raise_event('on_invalid_session', data)
+            return await client.raise_event('on_invalid_session', data)
 
         elif event == 'CHANNEL_CREATE':
-            return await self.http.get_client().raise_event('on_channel_create', await Channel.from_api_res(data))
+            return await client.raise_event('on_channel_create', Channel.from_dict(data, client))
 
         elif event == 'CHANNEL_UPDATE':
-            return await self.http.get_client().raise_event('on_channel_update', await Channel.from_api_res(data))
+            channel = Channel.from_dict(data, client)
+            client.permission_cache.invalidate(channel.guild_id, channel_id=channel.id)
+            return await client.raise_event('on_channel_update', channel)
 
         elif event == 'CHANNEL_DELETE':
-            return await self.http.get_client().raise_event('on_channel_delete', await Channel.from_api_res(data))
+            channel = Channel.from_dict(data, client)
+            client.permission_cache.invalidate(channel.guild_id, channel_id=channel.id)
+            return await client.raise_event('on_channel_delete', channel)
 
         elif event == 'CHANNEL_PINS_UPDATE':
-            return await self.http.get_client().raise_event('on_channel_pin', data['channel_id'],
-                                                            data['last_pin_timestamp'])
+            return await client.raise_event('on_channel_pin', Snowflake(data['channel_id']),
+                                            data['last_pin_timestamp'])
 
         elif event == 'GUILD_CREATE':
-            guild = await Guild.from_api_res(data)
-            return await self.http.get_client().raise_event('on_guild_create', guild)
+            guild = Guild.from_dict(data, client)
+            client.permission_cache.invalidate(guild.id)
+            return await client.raise_event('on_guild_create', guild)
+
+        elif event == 'GUILD_UPDATE':
+            guild = Guild.from_dict(data, client)
+            client.permission_cache.invalidate(guild.id)
+            return await client.raise_event('on_guild_update', guild)
 
         elif event == 'GUILD_DELETE':
-            guild = await Guild.from_api_res(data)
-            return await self.http.get_client().raise_event('on_guild_delete', guild)
+            guild = Guild.from_dict(data, client)
+            client.permission_cache.invalidate(guild.id)
+            return await client.raise_event('on_guild_delete', guild)
 
         elif event == 'GUILD_BAN_ADD':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_ban', guild_id, await User.from_api_res(data))
+            guild_id = Snowflake(data['guild_id'])
+            return await client.raise_event('on_ban', guild_id, User.from_dict(data, client))
 
         elif event == 'GUILD_BAN_REMOVE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_ban_remove', guild_id, await User.from_api_res(data))
+            guild_id = Snowflake(data['guild_id'])
+            return await client.raise_event('on_ban_remove', guild_id, User.from_dict(data, client))
 
         elif event == 'GUILD_EMOJIS_UPDATE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_emojis_update', guild_id,
-                                                            await Emoji.from_api_res(data['emojis']))
+            guild_id = Snowflake(data['guild_id'])
+            return await client.raise_event('on_guild_emojis_update', guild_id,
+                                            Emoji.from_dict(data['emojis'], client))
 
         elif event == 'GUILD_INTEGRATIONS_UPDATE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_integrations_update', guild_id)
+            guild_id = Snowflake(data['guild_id'])
+            return await client.raise_event('on_guild_integrations_update', guild_id)
 
         elif event == 'GUILD_MEMBER_ADD':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_member_add', guild_id,
-                                                            await GuildMember.from_api_res(data))
+            guild_id = Snowflake(data['guild_id'])
+            return await client.raise_event('on_guild_member_add', guild_id,
+                                            GuildMember.from_dict(data, client))
 
         elif event == 'GUILD_MEMBER_REMOVE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_member_remove', guild_id,
-                                                            await User.from_api_res(data['user']))
+            guild_id = Snowflake(data['guild_id'])
+            user = User.from_dict(data['user'], client)
+            client.permission_cache.invalidate(guild_id, member_id=user.id)
+            store = client.member_stores.get(guild_id)
+            if store is not None:
+                store.remove(user.id)
+            return await client.raise_event('on_guild_member_remove', guild_id, user)
 
         elif event == 'GUILD_MEMBER_UPDATE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_member_update', guild_id,
-                                                            await Role.from_api_res(data['roles']),
-                                                            await User.from_api_res(data['user']), data['nick'])
+            guild_id = Snowflake(data['guild_id'])
+            user = User.from_dict(data['user'], client)
+            client.permission_cache.invalidate(guild_id, member_id=user.id)
+            return await client.raise_event('on_guild_member_update', guild_id,
+                                            [Snowflake(x) for x in data['roles']], user, data['nick'])
 
         elif event == 'GUILD_MEMBERS_CHUNK':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_members_chunk', guild_id,
-                                                            await GuildMember.from_api_res(data['members']))
+            guild_id = Snowflake(data['guild_id'])
+            if client.columnar_members:
+                store = client.member_stores.get(guild_id)
+                if store is None:
+                    store = client.member_stores[guild_id] = MemberStore(client)
+                store.extend(data['members'])
+                return await client.raise_event('on_guild_members_chunk', guild_id, store)
+            return await client.raise_event('on_guild_members_chunk', guild_id,
+                                            GuildMember.from_dict(data['members'], client))
 
         elif event == 'GUILD_ROLE_CREATE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_role_create', guild_id,
-                                                            await Role.from_api_res(data['role']))
+            guild_id = Snowflake(data['guild_id'])
+            client.permission_cache.invalidate(guild_id)
+            return await client.raise_event('on_guild_role_create', guild_id,
+                                            Role.from_dict(data['role'], client))
 
         elif event == 'GUILD_ROLE_UPDATE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_role_update', guild_id,
-                                                            await Role.from_api_res(data['role']))
+            guild_id = Snowflake(data['guild_id'])
+            client.permission_cache.invalidate(guild_id)
+            return await client.raise_event('on_guild_role_update', guild_id,
+                                            Role.from_dict(data['role'], client))
 
         elif event == 'GUILD_ROLE_DELETE':
-            guild_id = data['guild_id']
-            return await self.http.get_client().raise_event('on_guild_role_delete', guild_id, data['role_id'])
+            guild_id = Snowflake(data['guild_id'])
+            client.permission_cache.invalidate(guild_id)
+            return await client.raise_event('on_guild_role_delete', guild_id, Snowflake(data['role_id']))
 
         elif event == 'MESSAGE_CREATE':
-            message = await ChannelMessage.from_api_res(data)
-            await self.http.get_client().raise_event('on_message', message)
+            message = ChannelMessage.from_dict(data, client)
+            await client.raise_event('on_message', message)
 
         elif event == 'MESSAGE_UPDATE':
-            message = await ChannelMessage.from_api_res(data)
-            await self.http.get_client().raise_event('on_message_create', message)
+            message = ChannelMessage.from_dict(data, client)
+            await client.raise_event('on_message_create', message)
 
         elif event == 'MESSAGE_DELETE':
-            await self.http.get_client().raise_event('on_message_delete', data['id'], data['channel_id'])
+            await client.raise_event('on_message_delete', Snowflake(data['id']), Snowflake(data['channel_id']))
 
         elif event == 'MESSAGE_DELETE_BULK':
-            await self.http.get_client().raise_event('on_message_delete_bulk', data['ids'], data['channel_id'])
+            await client.raise_event('on_message_delete_bulk', [Snowflake(x) for x in data['ids']],
+                                     Snowflake(data['channel_id']))
 
         elif event == 'MESSAGE_REACTION_ADD':
-            emoji = await Emoji.from_api_res(data['emoji'])
-            await self.http.get_client().raise_event(
-                'on_message_reaction_add', data['user_id'], data['channel_id'], data['message_id'], emoji)
+            emoji = Emoji.from_dict(data['emoji'], client)
+            await client.raise_event(
+                'on_message_reaction_add', Snowflake(data['user_id']), Snowflake(data['channel_id']),
+                Snowflake(data['message_id']), emoji)
 
         elif event == 'MESSAGE_REACTION_REMOVE':
-            emoji = await Emoji.from_api_res(data['emoji'])
-            await self.http.get_client().raise_event(
-                'on_message_reaction_remove', data['user_id'], data['channel_id'], data['message_id'], emoji)
+            emoji = Emoji.from_dict(data['emoji'], client)
+            await client.raise_event(
+                'on_message_reaction_remove', Snowflake(data['user_id']), Snowflake(data['channel_id']),
+                Snowflake(data['message_id']), emoji)
 
         elif event == 'MESSAGE_REACTION_REMOVE_ALL':
-            await self.http.get_client().raise_event(
-                'on_message_reaction_remove_all', data['channel_id'], data['message_id'])
+            await client.raise_event(
+                'on_message_reaction_remove_all', Snowflake(data['channel_id']), Snowflake(data['message_id']))
 
         elif event == 'PRESENCE_UPDATE':
-            await self.http.get_client().raise_event('on_presence_update', await User.from_api_res(data['user']),
-                                                     data['roles'], await Activity.from_api_res(data.get('game')),
-                                                     data['guild_id'],
-                                                     data['status'])
+            await client.raise_event('on_presence_update', User.from_dict(data['user'], client),
+                                     [Snowflake(x) for x in data['roles']],
+                                     Activity.from_dict(data.get('game'), client),
+                                     Snowflake(data['guild_id']),
+                                     data['status'])
 
         elif event == 'TYPING_START':
-            await self.http.get_client().raise_event('on_typing_start', data['user_id'], data['channel_id'],
-                                                     data['timestamp'])
+            await client.raise_event('on_typing_start', Snowflake(data['user_id']), Snowflake(data['channel_id']),
+                                     data['timestamp'])
 
         elif event == 'USER_UPDATE':
-            await self.http.get_client().raise_event('on_user_update', await User.from_api_res(data))
+            await client.raise_event('on_user_update', User.from_dict(data, client))
 
         elif event == 'VOICE_STATE_UPDATE':
-            await self.http.get_client().raise_event('on_voice_state_update', await VoiceState.from_api_res(data))
+            await client.raise_event('on_voice_state_update', VoiceState.from_dict(data, client))
 
         elif event == 'VOICE_SERVER_UPDATE':
-            await self.http.get_client().raise_event('on_voice_server_update', data['token'], data['guild_id'],
-                                                     data['endpoint'])
+            await client.raise_event('on_voice_server_update', data['token'], Snowflake(data['guild_id']),
+                                     data['endpoint'])
 
         elif event == 'WEBHOOKS_UPDATE':
-            await self.http.get_client().raise_event('on_webhooks_update', data['guild_id'], data['channel_id'])
+            await client.raise_event('on_webhooks_update', Snowflake(data['guild_id']), Snowflake(data['channel_id']))
 
         else:
             logger.critical(
@@ -31,6 +31,9 @@ setup(name='discord.aio',
       install_requires=[
           'aiohttp',
       ],
+      extras_require={
+          'speed': ['orjson'],
+      },
       zip_safe=False,
       keywords=['discord', 'wrapper', 'api', 'bot', 'asyncio'],
       python_requires='>=3.6',